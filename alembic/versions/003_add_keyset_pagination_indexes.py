@@ -0,0 +1,31 @@
+"""Add keyset pagination indexes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Cursor pagination orders by (created_at, id) / (changed_at, id)
+    op.create_index('idx_leave_requests_created_id', 'leave_requests', ['created_at', 'id'], unique=False)
+    op.create_index('idx_leave_requests_user_created_id', 'leave_requests', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('idx_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('idx_role_change_log_changed_id', 'role_change_log', ['changed_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_role_change_log_changed_id', table_name='role_change_log')
+    op.drop_index('idx_notifications_user_created_id', table_name='notifications')
+    op.drop_index('idx_leave_requests_user_created_id', table_name='leave_requests')
+    op.drop_index('idx_leave_requests_created_id', table_name='leave_requests')
@@ -0,0 +1,41 @@
+"""Add event outbox
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create event_outbox table
+    op.create_table(
+        'event_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_event_outbox_id'), 'event_outbox', ['id'], unique=False)
+    # The relay claims pending rows (processed_at IS NULL) in id order
+    op.create_index('idx_event_outbox_processed_id', 'event_outbox', ['processed_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_event_outbox_processed_id', table_name='event_outbox')
+    op.drop_index(op.f('ix_event_outbox_id'), table_name='event_outbox')
+    op.drop_table('event_outbox')
@@ -1,6 +1,7 @@
 """Analytics engine for attendance, leave, and salary statistics."""
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
+from sqlalchemy import func, and_, extract, cast, case, distinct, literal, null, select, tuple_, union_all, Date
+from sqlalchemy.sql import Select
 from datetime import date, datetime, timedelta
 from typing import Optional, Literal, Dict, List
 from decimal import Decimal
@@ -11,6 +12,51 @@ from api.models import Attendance, LeaveRequest, Payroll, Profile
 
 # Attendance Analytics Functions
 
+def build_period_start(dialect_name: str, group_by: Literal["day", "week", "month"]):
+    """
+    Build the SQL expression mapping an attendance date to its period start.
+    
+    Weeks start on Monday, as ISO weeks do. PostgreSQL uses date_trunc() and
+    SQLite date() modifiers; other dialects group by day, which
+    get_attendance_trends() rolls up to the requested period.
+    
+    Args:
+        dialect_name: Name of the database dialect (e.g. "postgresql")
+        group_by: Period grouping - "day", "week", or "month"
+    
+    Returns:
+        SQL expression of type Date
+    """
+    if group_by == "day":
+        return Attendance.date
+    
+    if dialect_name == "postgresql":
+        return cast(func.date_trunc(group_by, Attendance.date), Date)
+    
+    if dialect_name == "sqlite":
+        if group_by == "week":
+            # Next Sunday on or after the date, back to its Monday
+            return func.date(Attendance.date, "weekday 0", "-6 days", type_=Date)
+        return func.date(Attendance.date, "start of month", type_=Date)
+    
+    return Attendance.date
+
+
+def _period_key(day: date, group_by: Literal["day", "week", "month"]) -> str:
+    """Format the key of the period containing a date."""
+    if isinstance(day, datetime):
+        day = day.date()
+    
+    if group_by == "day":
+        return day.isoformat()
+    elif group_by == "week":
+        # ISO week format: YYYY-Www
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    else:  # month
+        return day.strftime("%Y-%m")
+
+
 def get_attendance_trends(
     db: Session,
     start_date: date,
@@ -22,6 +68,10 @@ def get_attendance_trends(
     Calculate attendance statistics for date range.
     Returns aggregated counts by status and period.
     
+    Records are counted in the database, grouped by period and status, so
+    only one row per period and status is loaded however many records fall
+    in the range.
+    
     Requirements: 18.1, 18.2, 18.3, 18.4, 18.5, 18.6, 18.7
     
     Args:
@@ -34,8 +84,14 @@ def get_attendance_trends(
     Returns:
         Dictionary with periods list and total_stats
     """
-    # Build base query
-    query = db.query(Attendance).filter(
+    period_start = build_period_start(db.get_bind().dialect.name, group_by).label("period_start")
+    
+    # Build aggregate query
+    query = db.query(
+        period_start,
+        Attendance.status,
+        func.count(Attendance.id)
+    ).filter(
         and_(
             Attendance.date >= start_date,
             Attendance.date <= end_date,
@@ -47,10 +103,9 @@ def get_attendance_trends(
     if employee_id is not None:
         query = query.filter(Attendance.user_id == employee_id)
     
-    # Fetch all matching records
-    records = query.all()
+    query = query.group_by(period_start, Attendance.status)
     
-    # Group records by period
+    # Group counts by period
     periods_data = defaultdict(lambda: {
         "present": 0,
         "absent": 0,
@@ -59,22 +114,14 @@ def get_attendance_trends(
         "total": 0
     })
     
-    for record in records:
-        # Determine period key based on group_by
-        if group_by == "day":
-            period_key = record.date.isoformat()
-        elif group_by == "week":
-            # ISO week format: YYYY-Www
-            year, week, _ = record.date.isocalendar()
-            period_key = f"{year}-W{week:02d}"
-        else:  # month
-            period_key = record.date.strftime("%Y-%m")
+    for day, record_status, count in query.all():
+        period_key = _period_key(day, group_by)
         
         # Increment counts
-        status_lower = record.status.lower().replace("-", "_")
+        status_lower = (record_status or "").lower().replace("-", "_")
         if status_lower in periods_data[period_key]:
-            periods_data[period_key][status_lower] += 1
-        periods_data[period_key]["total"] += 1
+            periods_data[period_key][status_lower] += count
+        periods_data[period_key]["total"] += count
     
     # Build periods list with attendance percentage
     periods = []
@@ -140,6 +187,94 @@ def get_attendance_trends(
 
 # Leave Analytics Functions
 
+# Dimensions of the rows returned by build_leave_statistics_statement()
+LEAVE_DIMENSION_TYPE = "type"
+LEAVE_DIMENSION_STATUS = "status"
+LEAVE_DIMENSION_TOTAL = "total"
+
+
+def build_leave_statistics_statement(
+    dialect_name: str,
+    start_date: date,
+    end_date: date,
+    department: Optional[str] = None
+) -> Select:
+    """
+    Build the statement aggregating leave requests for get_leave_statistics().
+    
+    Returns one row per leave type, one per status and one for all requests,
+    as (dimension, key, requests, days, employees), so its size does not
+    depend on the number of requests. PostgreSQL computes all three in one
+    pass with GROUPING SETS; other dialects (SQLite has no GROUPING SETS)
+    combine three grouped queries with UNION ALL.
+    
+    Args:
+        dialect_name: Name of the database dialect (e.g. "postgresql")
+        start_date: Start date for analysis
+        end_date: End date for analysis
+        department: Optional department filter
+    
+    Returns:
+        SELECT statement of the aggregate rows
+    """
+    aggregates = (
+        func.count(LeaveRequest.id).label("requests"),
+        func.sum(LeaveRequest.days_count).label("days"),
+        func.count(distinct(LeaveRequest.user_id)).label("employees"),
+    )
+    
+    def filtered(statement: Select) -> Select:
+        statement = statement.select_from(LeaveRequest).where(
+            LeaveRequest.start_date >= start_date,
+            LeaveRequest.end_date <= end_date,
+            LeaveRequest.deleted_at.is_(None)
+        )
+        if department:
+            statement = statement.join(Profile, LeaveRequest.user_id == Profile.user_id).where(
+                Profile.department == department
+            )
+        return statement
+    
+    if dialect_name == "postgresql":
+        by_type = func.grouping(LeaveRequest.leave_type) == 0
+        by_status = func.grouping(LeaveRequest.status) == 0
+        
+        return filtered(select(
+            case(
+                (by_type, LEAVE_DIMENSION_TYPE),
+                (by_status, LEAVE_DIMENSION_STATUS),
+                else_=LEAVE_DIMENSION_TOTAL
+            ).label("dimension"),
+            case(
+                (by_type, LeaveRequest.leave_type),
+                (by_status, LeaveRequest.status)
+            ).label("key"),
+            *aggregates
+        )).group_by(func.grouping_sets(
+            tuple_(LeaveRequest.leave_type),
+            tuple_(LeaveRequest.status),
+            tuple_()
+        ))
+    
+    return union_all(
+        filtered(select(
+            literal(LEAVE_DIMENSION_TYPE).label("dimension"),
+            LeaveRequest.leave_type.label("key"),
+            *aggregates
+        )).group_by(LeaveRequest.leave_type),
+        filtered(select(
+            literal(LEAVE_DIMENSION_STATUS).label("dimension"),
+            LeaveRequest.status.label("key"),
+            *aggregates
+        )).group_by(LeaveRequest.status),
+        filtered(select(
+            literal(LEAVE_DIMENSION_TOTAL).label("dimension"),
+            null().label("key"),
+            *aggregates
+        ))
+    )
+
+
 def get_leave_statistics(
     db: Session,
     start_date: date,
@@ -150,6 +285,10 @@ def get_leave_statistics(
     Calculate leave usage statistics.
     Returns counts by type, status, and approval rate.
     
+    All figures come from one aggregate query (see
+    build_leave_statistics_statement()), so memory use does not grow with
+    the number of requests in the range.
+    
     Requirements: 19.1, 19.2, 19.3, 19.4, 19.5, 19.6, 19.7
     
     Args:
@@ -161,51 +300,36 @@ def get_leave_statistics(
     Returns:
         Dictionary with by_type, by_status, approval_rate, and average_days_per_employee
     """
-    # Build base query
-    query = db.query(LeaveRequest).filter(
-        and_(
-            LeaveRequest.start_date >= start_date,
-            LeaveRequest.end_date <= end_date,
-            LeaveRequest.deleted_at.is_(None)
-        )
+    statement = build_leave_statistics_statement(
+        db.get_bind().dialect.name, start_date, end_date, department
     )
     
-    # Apply department filter if provided
-    if department:
-        query = query.join(Profile, LeaveRequest.user_id == Profile.user_id).filter(
-            Profile.department == department
-        )
-    
-    # Fetch all matching records
-    records = query.all()
-    
-    # Aggregate by leave type
-    by_type = defaultdict(int)
-    for record in records:
-        by_type[record.leave_type] += 1
-    
-    # Aggregate by status
-    by_status = defaultdict(int)
-    for record in records:
-        by_status[record.status] += 1
+    by_type = {}
+    by_status = {}
+    total_requests = 0
+    total_days = 0
+    unique_employees = 0
+    
+    for dimension, key, requests, days, employees in db.execute(statement):
+        if dimension == LEAVE_DIMENSION_TYPE:
+            by_type[key] = requests
+        elif dimension == LEAVE_DIMENSION_STATUS:
+            by_status[key] = requests
+        else:
+            total_requests = requests
+            total_days = int(days or 0)
+            unique_employees = employees
     
     # Calculate approval rate
-    total_requests = len(records)
     approved_count = by_status.get("Approved", 0)
     approval_rate = (approved_count / total_requests * 100) if total_requests > 0 else 0.0
     
     # Calculate average days per employee
-    employee_days = defaultdict(int)
-    for record in records:
-        employee_days[record.user_id] += record.days_count
-    
-    total_days = sum(employee_days.values())
-    unique_employees = len(employee_days)
     average_days_per_employee = (total_days / unique_employees) if unique_employees > 0 else 0.0
     
     return {
-        "by_type": dict(by_type),
-        "by_status": dict(by_status),
+        "by_type": by_type,
+        "by_status": by_status,
         "approval_rate": round(approval_rate, 2),
         "average_days_per_employee": round(average_days_per_employee, 2),
         "total_requests": total_requests,
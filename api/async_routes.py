@@ -0,0 +1,240 @@
+"""Async versions of the highest-traffic API routes.
+
+These routes run on the asyncio session stack from api.database instead of
+a blocking Session, so an in-flight request waiting on the database does
+not occupy one of Starlette's threadpool slots. The router is only mounted
+when ASYNC_DB_ENABLED is set, and is registered ahead of the sync routes so
+it takes over the same paths.
+"""
+from datetime import datetime, date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from api.auth import get_current_user
+from api.attendance_statements import (
+    build_check_in_statement,
+    build_check_out_statement,
+    attendance_event_payload,
+)
+from api.dashboard_cache import employee_dashboard_cache
+from api.dashboard_queries import build_employee_dashboard_statement, employee_dashboard_from_rows
+from api.database import get_async_db
+from api.db_routing import record_write
+from api.pagination import build_page_query, finish_page, wants_total
+from api.events import dispatch_event, EVENT_ATTENDANCE_UPDATED
+from api.models import Notification
+from api.outbox import record_event
+from api.schemas import (
+    CheckInResponse, CheckOutResponse, EmployeeDashboardResponse,
+    NotificationListResponse, NotificationResponse
+)
+
+
+router = APIRouter(tags=["Async"])
+
+
+@router.post("/api/attendance/check-in", response_model=CheckInResponse, status_code=status.HTTP_201_CREATED)
+async def check_in(
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Record employee check-in for the current day (async).
+
+    Requirements: 7.1, 7.3, 7.5, 7.6
+    """
+    user_id = current_user["user_id"]
+    today = date.today()
+    now = datetime.utcnow()
+
+    # Insert today's record in one statement; the unique (user_id, date)
+    # constraint turns a duplicate check-in into no returned row
+    statement = build_check_in_statement(db.get_bind().dialect.name, user_id, today, now)
+
+    try:
+        result = await db.execute(statement)
+        attendance = result.first()
+        if attendance is None:
+            await db.rollback()
+        else:
+            event_payload = attendance_event_payload(user_id, attendance, "check_in")
+            record_event(db, EVENT_ATTENDANCE_UPDATED, event_payload)
+            await db.commit()
+    except IntegrityError:
+        # Dialects without ON CONFLICT report the duplicate as an error
+        await db.rollback()
+        attendance = None
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to record check-in"
+        )
+
+    if attendance is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already checked in for today"
+        )
+
+    await run_in_threadpool(record_write, user_id)
+
+    # Dispatch attendance_updated event
+    # Requirements: 26.4
+    await run_in_threadpool(dispatch_event, EVENT_ATTENDANCE_UPDATED, event_payload)
+
+    return CheckInResponse(
+        attendance_id=attendance.id,
+        check_in_time=attendance.check_in.isoformat(),
+        date=attendance.date.isoformat(),
+        message="Check-in recorded successfully"
+    )
+
+
+@router.post("/api/attendance/check-out", response_model=CheckOutResponse)
+async def check_out(
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Record employee check-out for the current day (async).
+
+    Requirements: 7.2, 7.4
+    """
+    user_id = current_user["user_id"]
+    today = date.today()
+    now = datetime.utcnow()
+
+    # Set the check-out time and compute the status in one statement
+    # If worked less than 4 hours, mark as Half-day; otherwise, Present
+    try:
+        result = await db.execute(build_check_out_statement(user_id, today, now))
+        attendance = result.first()
+        if attendance is None:
+            await db.rollback()
+        else:
+            event_payload = attendance_event_payload(user_id, attendance, "check_out")
+            record_event(db, EVENT_ATTENDANCE_UPDATED, event_payload)
+            await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to record check-out"
+        )
+
+    # No row updated means there is no check-in record for today
+    if attendance is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No check-in record found for today. Please check in first."
+        )
+
+    await run_in_threadpool(record_write, user_id)
+
+    # Dispatch attendance_updated event
+    # Requirements: 26.4
+    await run_in_threadpool(dispatch_event, EVENT_ATTENDANCE_UPDATED, event_payload)
+
+    return CheckOutResponse(
+        attendance_id=attendance.id,
+        check_out_time=attendance.check_out.isoformat(),
+        status=attendance.status,
+        message="Check-out recorded successfully"
+    )
+
+
+@router.get("/api/dashboard/employee", response_model=EmployeeDashboardResponse)
+async def get_employee_dashboard(
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get employee dashboard data (async).
+
+    Requirements: 5.1, 5.2, 5.3, 5.4, 5.5
+    """
+    user_id = current_user["user_id"]
+    today = date.today()
+
+    cached = employee_dashboard_cache.get(user_id)
+    if cached is not None and cached[0] == today:
+        return cached[1]
+
+    result = await db.execute(build_employee_dashboard_statement(user_id, today))
+    response = employee_dashboard_from_rows(user_id, today, result.all())
+
+    employee_dashboard_cache.set(user_id, (today, response))
+
+    return response
+
+
+@router.get("/api/notifications", response_model=NotificationListResponse)
+async def get_notifications(
+    page: int = 1,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get notifications for the authenticated user (async).
+
+    Returns notifications ordered by created_at descending (newest first).
+    Pages are selected by page number or by the next_cursor of a previous
+    response; the total is skipped in cursor mode unless include_total is set.
+    """
+    user_id = current_user["user_id"]
+
+    # Requirements: 27.7
+
+    # Get unread count, and the total count in the same statement if requested
+    unread = func.count(Notification.id).filter(Notification.is_read == False)
+    if wants_total(include_total, cursor):
+        result = await db.execute(
+            select(func.count(Notification.id), unread).where(Notification.user_id == user_id)
+        )
+        total, unread_count = result.one()
+    else:
+        total = None
+        unread_count = await db.scalar(select(unread).where(Notification.user_id == user_id))
+
+    # Apply pagination, ordered by created_at descending (newest first)
+    statement = build_page_query(
+        select(Notification).where(Notification.user_id == user_id),
+        (Notification.created_at, Notification.id),
+        page, page_size, cursor
+    )
+    result = await db.execute(statement)
+    rows, next_cursor = finish_page(
+        result.scalars().all(), page_size,
+        lambda notification: (notification.created_at, notification.id)
+    )
+
+    notifications = [
+        NotificationResponse(
+            id=notification.id,
+            notification_type=notification.notification_type,
+            message=notification.message,
+            related_entity_type=notification.related_entity_type,
+            related_entity_id=notification.related_entity_id,
+            is_read=notification.is_read,
+            created_at=notification.created_at.isoformat()
+        )
+        for notification in rows
+    ]
+
+    return NotificationListResponse(
+        notifications=notifications,
+        unread_count=unread_count,
+        total=total,
+        page=page,
+        page_size=page_size,
+        next_cursor=next_cursor
+    )
@@ -0,0 +1,125 @@
+"""Single-statement attendance writes.
+
+Check-in is the highest-QPS write at shift start. Instead of reading the
+day's row before inserting it, check-in is one INSERT ... ON CONFLICT DO
+NOTHING ... RETURNING against the unique_user_date constraint: a returned
+row means the check-in was recorded, no row means the user had already
+checked in. Check-out is one conditional UPDATE ... RETURNING that sets
+check_out and derives the Half-day/Present status in SQL: no returned row
+means there was no check-in to close. The same statements serve the sync
+and async routes.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.dml import Insert, Update
+
+from api.models import Attendance
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+ON_CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Working less than this between check-in and check-out is a Half-day
+HALF_DAY_THRESHOLD = timedelta(hours=4)
+
+# Columns returned by the attendance write statements
+RETURNED_COLUMNS = (
+    Attendance.id,
+    Attendance.date,
+    Attendance.check_in,
+    Attendance.check_out,
+    Attendance.status,
+)
+
+
+def build_check_in_statement(dialect_name: str, user_id: int, today: date, now: datetime) -> Insert:
+    """
+    Build the check-in upsert for a user and day.
+
+    On PostgreSQL and SQLite the statement returns no row when the user has
+    already checked in. Other dialects raise IntegrityError on the unique
+    constraint instead.
+
+    Args:
+        dialect_name: Name of the database dialect (e.g. "postgresql")
+        user_id: ID of the user checking in
+        today: Attendance date
+        now: Check-in timestamp
+
+    Returns:
+        INSERT statement returning the attendance row's columns
+    """
+    insert_factory = ON_CONFLICT_INSERTS.get(dialect_name)
+
+    values = {
+        "user_id": user_id,
+        "date": today,
+        "check_in": now,
+        "status": "Present",
+    }
+
+    if insert_factory is None:
+        statement = insert(Attendance).values(**values)
+    else:
+        statement = insert_factory(Attendance).values(**values).on_conflict_do_nothing(
+            index_elements=[Attendance.user_id, Attendance.date]
+        )
+
+    return statement.returning(*RETURNED_COLUMNS)
+
+
+def build_check_out_statement(user_id: int, today: date, now: datetime) -> Update:
+    """
+    Build the check-out update for a user and day.
+
+    Sets check_out and computes the status in the same statement: Half-day
+    when checked in less than four hours before `now`, otherwise Present.
+    Rows without a check_in keep their status. Returns no row when the user
+    has no attendance record for the day.
+
+    Args:
+        user_id: ID of the user checking out
+        today: Attendance date
+        now: Check-out timestamp
+
+    Returns:
+        UPDATE statement returning the attendance row's columns
+    """
+    status = case(
+        (Attendance.check_in.is_(None), Attendance.status),
+        (Attendance.check_in > now - HALF_DAY_THRESHOLD, "Half-day"),
+        else_="Present"
+    )
+
+    return (
+        update(Attendance)
+        .where(Attendance.user_id == user_id, Attendance.date == today)
+        .values(check_out=now, status=status)
+        .returning(*RETURNED_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def attendance_event_payload(user_id: int, attendance, action: str) -> dict:
+    """
+    Build the attendance_updated event payload for a written row.
+
+    Args:
+        user_id: ID of the user the row belongs to
+        attendance: Row returned by a check-in or check-out statement
+        action: "check_in" or "check_out"
+
+    Returns:
+        JSON-serializable event payload
+    """
+    return {
+        "user_id": user_id,
+        "attendance_id": attendance.id,
+        "date": attendance.date.isoformat(),
+        "action": action,
+        "status": attendance.status
+    }
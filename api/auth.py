@@ -3,20 +3,55 @@ import os
 import re
 import bcrypt
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from functools import wraps
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-# JWT Configuration from environment variables
-JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
+# JWT Configuration from environment variables, read on first use so that
+# importing the application stays off the configuration path
+_jwt_config: Optional[Dict[str, Any]] = None
 
-if not JWT_SECRET_KEY:
-    raise ValueError("JWT_SECRET_KEY environment variable is not set")
+_JWT_CONFIG_NAMES = {
+    "JWT_SECRET_KEY": "secret_key",
+    "JWT_ALGORITHM": "algorithm",
+    "JWT_EXPIRATION_HOURS": "expiration_hours",
+}
+
+
+def get_jwt_config() -> Dict[str, Any]:
+    """
+    Get the JWT configuration, reading it from the environment on first use.
+    
+    Returns:
+        Dictionary with secret_key, algorithm and expiration_hours
+        
+    Raises:
+        ValueError: If JWT_SECRET_KEY is not set
+    """
+    global _jwt_config
+    
+    if _jwt_config is None:
+        secret_key = os.getenv("JWT_SECRET_KEY")
+        if not secret_key:
+            raise ValueError("JWT_SECRET_KEY environment variable is not set")
+        
+        _jwt_config = {
+            "secret_key": secret_key,
+            "algorithm": os.getenv("JWT_ALGORITHM", "HS256"),
+            "expiration_hours": int(os.getenv("JWT_EXPIRATION_HOURS", "24")),
+        }
+    
+    return _jwt_config
+
+
+def __getattr__(name: str):
+    """Expose JWT_SECRET_KEY, JWT_ALGORITHM and JWT_EXPIRATION_HOURS lazily."""
+    if name in _JWT_CONFIG_NAMES:
+        return get_jwt_config()[_JWT_CONFIG_NAMES[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def hash_password(password: str) -> str:
@@ -106,8 +141,10 @@ def create_access_token(user_id: int, role: str) -> str:
         
     Requirements: 1.3, 1.6, 17.3, 17.4
     """
+    config = get_jwt_config()
+    
     # Calculate expiration time using timezone-aware datetime
-    expire = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
+    expire = datetime.now(timezone.utc) + timedelta(hours=config["expiration_hours"])
     
     # Create token payload
     payload = {
@@ -118,32 +155,70 @@ def create_access_token(user_id: int, role: str) -> str:
     }
     
     # Encode and return token
-    encoded_jwt = jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    encoded_jwt = jwt.encode(payload, config["secret_key"], algorithm=config["algorithm"])
     return encoded_jwt
 
 
-def decode_access_token(token: str) -> dict:
+def create_scoped_token(user_id: int, role: str, scope: str, expires_in_seconds: int) -> str:
+    """
+    Generate a short-lived JWT only accepted where its scope is expected.
+    
+    Scoped tokens are meant for URLs (e.g. EventSource connections, which
+    cannot send an Authorization header) and are rejected as access tokens.
+    
+    Args:
+        user_id: User's database ID
+        role: User's role (Admin or Employee)
+        scope: What the token may be used for
+        expires_in_seconds: Token lifetime
+        
+    Returns:
+        Encoded JWT token string
+    """
+    config = get_jwt_config()
+    now = datetime.now(timezone.utc)
+    
+    payload = {
+        "user_id": user_id,
+        "role": role,
+        "scope": scope,
+        "exp": now + timedelta(seconds=expires_in_seconds),
+        "iat": now
+    }
+    
+    return jwt.encode(payload, config["secret_key"], algorithm=config["algorithm"])
+
+
+def decode_access_token(token: str, scope: Optional[str] = None) -> dict:
     """
     Validate and decode a JWT access token.
     
     Args:
         token: JWT token string to decode
+        scope: Scope the token must have (default: an unscoped access token)
         
     Returns:
         Decoded token payload as dictionary
         
     Raises:
-        JWTError: If token is invalid, expired, or signature verification fails
+        JWTError: If token is invalid, expired, has another scope, or
+            signature verification fails
         
     Requirements: 1.3, 1.6, 17.3, 17.4
     """
+    config = get_jwt_config()
+    
     try:
         # Decode and validate token signature
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
+        payload = jwt.decode(token, config["secret_key"], algorithms=[config["algorithm"]])
     except JWTError as e:
         # Re-raise JWT errors for caller to handle
         raise e
+    
+    if payload.get("scope") != scope:
+        raise JWTError("Token scope not accepted here")
+    
+    return payload
 
 
 # HTTP Bearer security scheme for extracting JWT from Authorization header
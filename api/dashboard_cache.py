@@ -0,0 +1,192 @@
+"""In-process caches for the dashboard endpoints.
+
+Dashboards are polled by every open tab, but the data behind them only
+changes when attendance, leave requests or the set of employees change.
+Responses are cached for a few seconds and dropped as soon as a relevant
+event is dispatched through api.events (or, for new employees, by the
+endpoints creating them), so a poll right after a check-in or leave
+decision still sees it. Each invalidation is also published on the push
+broker (api.push_broker, DASHBOARD_CACHE_CHANNEL), so every worker drops
+the same entries.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from api.events import (
+    register_handler,
+    EVENT_ATTENDANCE_UPDATED,
+    EVENT_LEAVE_REQUESTED,
+    EVENT_LEAVE_APPROVED,
+    EVENT_LEAVE_REJECTED,
+    EVENT_ROLE_CHANGED,
+)
+from api.push_broker import PushBroker, create_push_broker
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache lifetimes from environment variables (0 disables the cache)
+ADMIN_DASHBOARD_CACHE_SECONDS = float(os.getenv("ADMIN_DASHBOARD_CACHE_SECONDS", "5"))
+EMPLOYEE_DASHBOARD_CACHE_SECONDS = float(os.getenv("EMPLOYEE_DASHBOARD_CACHE_SECONDS", "10"))
+# Broker channel carrying cache invalidations between workers
+DASHBOARD_CACHE_CHANNEL = os.getenv("DASHBOARD_CACHE_CHANNEL", "dayflow_dashboard_cache")
+
+# Events that change what an employee's dashboard shows; their payloads carry the employee's user_id
+EMPLOYEE_DASHBOARD_EVENTS = (
+    EVENT_ATTENDANCE_UPDATED,
+    EVENT_LEAVE_REQUESTED,
+    EVENT_LEAVE_APPROVED,
+    EVENT_LEAVE_REJECTED,
+)
+
+# Events that change what the admin dashboard shows; a role change moves
+# a user in or out of the employee counts
+ADMIN_DASHBOARD_EVENTS = EMPLOYEE_DASHBOARD_EVENTS + (EVENT_ROLE_CHANGED,)
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire after a fixed time."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value, or None if missing, expired or caching is disabled."""
+        if self.ttl_seconds <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache a value for ttl_seconds."""
+        if self.ttl_seconds <= 0:
+            return
+
+        now = time.monotonic()
+
+        with self._lock:
+            # Drop expired entries, then the oldest, so the cache stays bounded
+            if len(self._entries) >= self.max_entries:
+                for stale_key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                    del self._entries[stale_key]
+            if len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+            self._entries[key] = (now + self.ttl_seconds, value)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+# Admin dashboard responses, keyed by pending list page
+admin_dashboard_cache = TTLCache(ADMIN_DASHBOARD_CACHE_SECONDS)
+
+# Employee dashboard responses, keyed by user ID
+employee_dashboard_cache = TTLCache(EMPLOYEE_DASHBOARD_CACHE_SECONDS)
+
+
+# Broker sharing invalidations with other workers, created on first use
+_cache_broker: Optional[PushBroker] = None
+_cache_broker_lock = threading.Lock()
+
+
+def invalidate_admin_dashboard(payload: Optional[dict] = None) -> None:
+    """
+    Drop cached admin dashboard responses in every worker.
+
+    Usable as an event handler, and called by the endpoints that add employees.
+
+    Args:
+        payload: Event payload (unused; any relevant event invalidates)
+    """
+    admin_dashboard_cache.invalidate()
+    _publish_invalidation({"cache": "admin"})
+
+
+def invalidate_employee_dashboard(payload: dict) -> None:
+    """
+    Event handler dropping the cached dashboard of the employee in the event,
+    in every worker.
+
+    Args:
+        payload: Event payload containing user_id
+    """
+    user_id = payload.get("user_id")
+    employee_dashboard_cache.invalidate(user_id)
+    _publish_invalidation({"cache": "employee", "user_id": user_id})
+
+
+def receive_invalidations(pushes: List[dict]) -> None:
+    """
+    Apply invalidations published by any worker.
+
+    Broker callback; each push names the cache and, for the employee
+    cache, the user_id to drop (None drops every entry).
+
+    Args:
+        pushes: Invalidations published on DASHBOARD_CACHE_CHANNEL
+    """
+    for push in pushes:
+        if push.get("cache") == "admin":
+            admin_dashboard_cache.invalidate()
+        else:
+            employee_dashboard_cache.invalidate(push.get("user_id"))
+
+
+def _publish_invalidation(push: dict) -> None:
+    """Publish an invalidation to the other workers."""
+    broker = _subscribe_to_invalidations()
+    try:
+        broker.publish([push])
+    except Exception as e:
+        # Other workers still drop the entry when its TTL runs out
+        logger.error(f"Failed to publish dashboard cache invalidation: {str(e)}", exc_info=True)
+
+
+def _subscribe_to_invalidations() -> PushBroker:
+    """Create and start the invalidation broker on first use."""
+    global _cache_broker
+
+    if _cache_broker is None:
+        with _cache_broker_lock:
+            if _cache_broker is None:
+                broker = create_push_broker(channel=DASHBOARD_CACHE_CHANNEL)
+                broker.start(receive_invalidations)
+                _cache_broker = broker
+
+    return _cache_broker
+
+
+def register_cache_invalidation_handlers() -> None:
+    """
+    Register the event handlers that invalidate the dashboard caches.
+
+    This function should be called once during application initialization.
+    """
+    for event_type in ADMIN_DASHBOARD_EVENTS:
+        register_handler(event_type, invalidate_admin_dashboard, inline=True)
+    for event_type in EMPLOYEE_DASHBOARD_EVENTS:
+        register_handler(event_type, invalidate_employee_dashboard, inline=True)
+
+    logger.info("Dashboard cache invalidation handlers registered successfully")
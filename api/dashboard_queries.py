@@ -0,0 +1,274 @@
+"""Aggregate queries behind the dashboard endpoints.
+
+Each dashboard used to issue one query per number it shows, and count
+attendance statuses by loading rows into Python. The statements here
+compute those numbers in the database, in a single round trip.
+"""
+from datetime import date
+from typing import Any, Sequence
+
+from sqlalchemy import (
+    Date, DateTime, Integer, String, Text, case, cast, func, literal, null, select, union_all
+)
+from sqlalchemy.sql import CompoundSelect, Select
+
+from api.models import User, Attendance, LeaveRequest
+from api.schemas import (
+    AttendanceRecord, AttendanceSummary, EmployeeDashboardResponse,
+    LeaveRequestResponse, TodayStatus
+)
+
+# Number of recent attendance records and leave requests on the employee dashboard
+EMPLOYEE_DASHBOARD_RECENT_LIMIT = 5
+
+# Row kinds in the employee dashboard statement
+ROW_SUMMARY = "summary"
+ROW_ATTENDANCE = "attendance"
+ROW_LEAVE = "leave"
+
+# Column layout shared by every branch of the employee dashboard statement;
+# each branch fills the columns it needs and leaves the rest NULL
+EMPLOYEE_DASHBOARD_COLUMNS = {
+    "kind": String,
+    "id": Integer,
+    "date": Date,
+    "end_date": Date,
+    "check_in": DateTime,
+    "check_out": DateTime,
+    "status": String,
+    "leave_type": String,
+    "days_count": Integer,
+    "remarks": Text,
+    "reviewed_by": Integer,
+    "reviewed_at": DateTime,
+    "admin_comments": Text,
+    "created_at": DateTime,
+    "updated_at": DateTime,
+    "present": Integer,
+    "absent": Integer,
+    "leave": Integer,
+    "pending": Integer,
+}
+
+
+def build_admin_stats_statement(today: date) -> Select:
+    """
+    Build the statement computing every admin dashboard count.
+
+    Returns one row with total_employees, on_leave_today, pending_approvals
+    and today's attendance histogram (present, absent, leave, half_day).
+    The histogram's present count is also the dashboard's present_today.
+
+    Args:
+        today: Date the dashboard is computed for
+
+    Returns:
+        SELECT statement returning a single row
+    """
+    total_employees = select(func.count(User.id)).where(
+        User.role == "Employee"
+    ).scalar_subquery()
+
+    # An employee is on leave today if they have an approved leave request that covers today
+    on_leave_today = select(func.count(LeaveRequest.id)).where(
+        LeaveRequest.status == "Approved",
+        LeaveRequest.start_date <= today,
+        LeaveRequest.end_date >= today
+    ).scalar_subquery()
+
+    pending_approvals = select(func.count(LeaveRequest.id)).where(
+        LeaveRequest.status == "Pending"
+    ).scalar_subquery()
+
+    def status_count(status: str):
+        return func.count(Attendance.id).filter(Attendance.status == status)
+
+    return select(
+        total_employees.label("total_employees"),
+        on_leave_today.label("on_leave_today"),
+        pending_approvals.label("pending_approvals"),
+        status_count("Present").label("present"),
+        status_count("Absent").label("absent"),
+        status_count("Leave").label("leave"),
+        status_count("Half-day").label("half_day"),
+    ).where(Attendance.date == today)
+
+
+def _employee_dashboard_branch(kind: str, **columns: Any) -> list:
+    """Build the select list of one branch in EMPLOYEE_DASHBOARD_COLUMNS order."""
+    selected = [literal(kind, String).label("kind")]
+    for name, column_type in list(EMPLOYEE_DASHBOARD_COLUMNS.items())[1:]:
+        value = columns.get(name)
+        if value is None:
+            value = cast(null(), column_type)
+        selected.append(value.label(name))
+    return selected
+
+
+def build_employee_dashboard_statement(user_id: int, today: date) -> CompoundSelect:
+    """
+    Build the statement returning everything on an employee's dashboard.
+
+    The result has one summary row (this month's attendance counts, the
+    pending leave count and today's attendance), followed by the most recent
+    attendance records and leave requests, all in the layout of
+    EMPLOYEE_DASHBOARD_COLUMNS. Use employee_dashboard_from_rows() to turn
+    the rows into a response.
+
+    Args:
+        user_id: ID of the employee
+        today: Date the dashboard is computed for
+
+    Returns:
+        UNION ALL statement over the summary row and the recent-record CTEs
+    """
+    month_start = date(today.year, today.month, 1)
+    if today.month == 12:
+        next_month_start = date(today.year + 1, 1, 1)
+    else:
+        next_month_start = date(today.year, today.month + 1, 1)
+
+    pending = select(func.count(LeaveRequest.id)).where(
+        LeaveRequest.user_id == user_id,
+        LeaveRequest.status == "Pending"
+    ).scalar_subquery()
+
+    def status_count(status: str):
+        return func.count(Attendance.id).filter(Attendance.status == status)
+
+    # Today always falls inside the month, so today's record comes from the same scan
+    def today_value(column):
+        return func.max(case((Attendance.date == today, column)))
+
+    summary = select(*_employee_dashboard_branch(
+        ROW_SUMMARY,
+        id=today_value(Attendance.id),
+        check_in=today_value(Attendance.check_in),
+        check_out=today_value(Attendance.check_out),
+        present=status_count("Present"),
+        absent=status_count("Absent"),
+        leave=status_count("Leave"),
+        pending=pending,
+    )).where(
+        Attendance.user_id == user_id,
+        Attendance.date >= month_start,
+        Attendance.date < next_month_start
+    )
+
+    recent_attendance = select(
+        Attendance.id, Attendance.date, Attendance.check_in, Attendance.check_out, Attendance.status
+    ).where(
+        Attendance.user_id == user_id
+    ).order_by(Attendance.date.desc()).limit(EMPLOYEE_DASHBOARD_RECENT_LIMIT).cte("recent_attendance")
+
+    recent_leaves = select(LeaveRequest).where(
+        LeaveRequest.user_id == user_id
+    ).order_by(LeaveRequest.created_at.desc()).limit(EMPLOYEE_DASHBOARD_RECENT_LIMIT).cte("recent_leaves")
+
+    attendance_rows = select(*_employee_dashboard_branch(
+        ROW_ATTENDANCE,
+        id=recent_attendance.c.id,
+        date=recent_attendance.c.date,
+        check_in=recent_attendance.c.check_in,
+        check_out=recent_attendance.c.check_out,
+        status=recent_attendance.c.status,
+    ))
+
+    leave_rows = select(*_employee_dashboard_branch(
+        ROW_LEAVE,
+        id=recent_leaves.c.id,
+        date=recent_leaves.c.start_date,
+        end_date=recent_leaves.c.end_date,
+        status=recent_leaves.c.status,
+        leave_type=recent_leaves.c.leave_type,
+        days_count=recent_leaves.c.days_count,
+        remarks=recent_leaves.c.remarks,
+        reviewed_by=recent_leaves.c.reviewed_by,
+        reviewed_at=recent_leaves.c.reviewed_at,
+        admin_comments=recent_leaves.c.admin_comments,
+        created_at=recent_leaves.c.created_at,
+        updated_at=recent_leaves.c.updated_at,
+    ))
+
+    return union_all(summary, attendance_rows, leave_rows)
+
+
+def _isoformat(value: Any) -> Any:
+    return value.isoformat() if value else None
+
+
+def employee_dashboard_from_rows(user_id: int, today: date, rows: Sequence[Any]) -> EmployeeDashboardResponse:
+    """
+    Build the employee dashboard response from build_employee_dashboard_statement() rows.
+
+    Args:
+        user_id: ID of the employee
+        today: Date the dashboard was computed for
+        rows: Result rows of the statement
+
+    Returns:
+        EmployeeDashboardResponse
+    """
+    summary = next(row for row in rows if row.kind == ROW_SUMMARY)
+
+    # UNION ALL does not preserve the order of the recent-record CTEs
+    attendance_rows = sorted(
+        (row for row in rows if row.kind == ROW_ATTENDANCE),
+        key=lambda row: row.date, reverse=True
+    )
+    leave_rows = sorted(
+        (row for row in rows if row.kind == ROW_LEAVE),
+        key=lambda row: row.created_at, reverse=True
+    )
+
+    recent_attendance = [
+        AttendanceRecord(
+            id=row.id,
+            user_id=user_id,
+            date=row.date,
+            check_in=_isoformat(row.check_in),
+            check_out=_isoformat(row.check_out),
+            status=row.status
+        )
+        for row in attendance_rows
+    ]
+
+    recent_leaves = [
+        LeaveRequestResponse(
+            id=row.id,
+            user_id=user_id,
+            leave_type=row.leave_type,
+            start_date=row.date,
+            end_date=row.end_date,
+            days_count=row.days_count,
+            remarks=row.remarks,
+            status=row.status,
+            reviewed_by=row.reviewed_by,
+            reviewed_at=_isoformat(row.reviewed_at),
+            admin_comments=row.admin_comments,
+            created_at=row.created_at.isoformat(),
+            updated_at=row.updated_at.isoformat()
+        )
+        for row in leave_rows
+    ]
+
+    # The summary row's id is today's attendance record, if there is one
+    today_status = TodayStatus(
+        checked_in=summary.id is not None,
+        check_in_time=_isoformat(summary.check_in),
+        checked_out=summary.check_out is not None,
+        check_out_time=_isoformat(summary.check_out)
+    )
+
+    return EmployeeDashboardResponse(
+        attendance_summary=AttendanceSummary(
+            present=summary.present,
+            absent=summary.absent,
+            leave=summary.leave,
+            current_month=today.strftime("%B %Y")
+        ),
+        recent_attendance=recent_attendance,
+        recent_leaves=recent_leaves,
+        pending_leaves_count=summary.pending or 0,
+        today_status=today_status
+    )
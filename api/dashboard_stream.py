@@ -0,0 +1,266 @@
+"""Live admin dashboard counters over Server-Sent Events.
+
+Each subscriber (an open admin dashboard tab) gets a full snapshot of the
+dashboard counters when it connects, then only the counters that changed,
+as deltas. The counters are recomputed once per process, not per tab:
+attendance and leave events mark them dirty, a single broadcaster task
+recomputes them with the admin dashboard's aggregate statement (bursts of
+events are coalesced) and fans the difference out to every subscriber.
+
+Events dispatched by other workers never reach this process, so the
+broadcaster also refreshes every DASHBOARD_STREAM_REFRESH_SECONDS while
+anyone is subscribed. The refresh also catches the reset at midnight.
+"""
+import os
+import json
+import asyncio
+import logging
+import contextvars
+from datetime import date
+from typing import Any, Dict, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from api.database import get_session_factory
+from api.dashboard_queries import build_admin_stats_statement
+from api.events import (
+    register_handler,
+    get_registered_handlers,
+    EVENT_ATTENDANCE_UPDATED,
+    EVENT_LEAVE_REQUESTED,
+    EVENT_LEAVE_APPROVED,
+    EVENT_LEAVE_REJECTED,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Stream configuration from environment variables
+DASHBOARD_STREAM_REFRESH_SECONDS = float(os.getenv("DASHBOARD_STREAM_REFRESH_SECONDS", "30"))
+DASHBOARD_STREAM_KEEPALIVE_SECONDS = float(os.getenv("DASHBOARD_STREAM_KEEPALIVE_SECONDS", "15"))
+
+# Events arriving within this window are folded into one recomputation
+COALESCE_SECONDS = 0.25
+
+# Messages buffered per subscriber before it is resynchronized with a snapshot
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Events that change the admin dashboard counters
+DASHBOARD_STREAM_EVENTS = (
+    EVENT_ATTENDANCE_UPDATED,
+    EVENT_LEAVE_REQUESTED,
+    EVENT_LEAVE_APPROVED,
+    EVENT_LEAVE_REJECTED,
+)
+
+
+def load_dashboard_counters(today: Optional[date] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Compute the admin dashboard counters.
+
+    Reads from the primary database, so that a recomputation triggered by an
+    event always sees the write behind it.
+
+    Args:
+        today: Date to compute the counters for (default: today)
+
+    Returns:
+        Dictionary with "stats" and "attendance_overview" counters, in the
+        shape of AdminDashboardResponse
+    """
+    db = get_session_factory()()
+    try:
+        row = db.execute(build_admin_stats_statement(today or date.today())).one()
+    finally:
+        db.close()
+
+    return {
+        "stats": {
+            "total_employees": row.total_employees,
+            "present_today": row.present,
+            "on_leave_today": row.on_leave_today,
+            "pending_approvals": row.pending_approvals,
+        },
+        "attendance_overview": {
+            "present": row.present,
+            "absent": row.absent,
+            "leave": row.leave,
+            "half_day": row.half_day,
+        },
+    }
+
+
+def diff_counters(old: Dict[str, Dict[str, int]], new: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """
+    Compute the changed counters between two snapshots.
+
+    Args:
+        old: Previous snapshot
+        new: Current snapshot
+
+    Returns:
+        Snapshot-shaped dictionary holding new - old for each changed
+        counter; empty if nothing changed
+    """
+    delta = {}
+    for section, counters in new.items():
+        changed = {
+            name: value - old[section][name]
+            for name, value in counters.items()
+            if value != old[section][name]
+        }
+        if changed:
+            delta[section] = changed
+    return delta
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Events message.
+
+    Args:
+        event: Event name
+        data: JSON-serializable message data
+
+    Returns:
+        Message text, terminated by a blank line
+    """
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class DashboardBroadcaster:
+    """Fan out admin dashboard counter changes to SSE subscribers."""
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._snapshot: Optional[Dict[str, Dict[str, int]]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dirty: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(self) -> asyncio.Queue:
+        """
+        Add a subscriber, starting the broadcaster if needed.
+
+        Returns:
+            Queue receiving ("snapshot" | "delta", data) messages, starting
+            with a snapshot
+
+        Raises:
+            Exception: If the first snapshot cannot be loaded
+        """
+        if self._task is None:
+            self._start()
+
+        if self._snapshot is None:
+            try:
+                snapshot = await run_in_threadpool(load_dashboard_counters)
+            except BaseException:
+                # Stop the task started above unless another subscriber joined meanwhile
+                if not self._subscribers and self._task is not None:
+                    self._task.cancel()
+                    self._task = None
+                raise
+            # A refresh may have stored a newer snapshot meanwhile
+            if self._snapshot is None:
+                self._snapshot = snapshot
+
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        queue.put_nowait(("snapshot", self._snapshot))
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """
+        Remove a subscriber, stopping the broadcaster when none are left.
+
+        Args:
+            queue: Queue returned by subscribe()
+        """
+        self._subscribers.discard(queue)
+
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            # Nobody tracks changes any more, so the snapshot goes stale
+            self._snapshot = None
+
+    def notify(self, payload: Optional[dict] = None) -> None:
+        """
+        Event handler marking the counters dirty.
+
+        Safe to call from any thread; does nothing while nobody is subscribed.
+
+        Args:
+            payload: Event payload (unused)
+        """
+        loop, dirty = self._loop, self._dirty
+        if self._task is None or loop is None or dirty is None:
+            return
+
+        try:
+            loop.call_soon_threadsafe(dirty.set)
+        except RuntimeError:
+            # The event loop has been closed
+            pass
+
+    def _start(self) -> None:
+        """Start the broadcaster task on the running event loop."""
+        for event_type in DASHBOARD_STREAM_EVENTS:
+            if self.notify not in get_registered_handlers(event_type):
+                register_handler(event_type, self.notify, inline=True)
+
+        self._loop = asyncio.get_running_loop()
+        self._dirty = asyncio.Event()
+        # Run in a fresh context so the task does not inherit the first
+        # subscriber's request state (e.g. its query metrics collector)
+        self._task = contextvars.Context().run(self._loop.create_task, self._run())
+
+    async def _run(self) -> None:
+        """Recompute the counters when dirty or due, and publish the changes."""
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=DASHBOARD_STREAM_REFRESH_SECONDS)
+                await asyncio.sleep(COALESCE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._dirty.clear()
+
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to refresh dashboard counters: {str(e)}", exc_info=True)
+
+    async def refresh(self) -> None:
+        """Recompute the counters and publish a delta if any changed."""
+        snapshot = await run_in_threadpool(load_dashboard_counters)
+        previous, self._snapshot = self._snapshot, snapshot
+
+        if previous is None:
+            self._publish(("snapshot", snapshot))
+            return
+
+        delta = diff_counters(previous, snapshot)
+        if delta:
+            self._publish(("delta", delta))
+
+    def _publish(self, message: tuple) -> None:
+        """Queue a message for every subscriber."""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # The subscriber fell behind; replace its backlog with the current state
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("snapshot", self._snapshot))
+
+
+# Process-wide broadcaster shared by all stream connections
+dashboard_broadcaster = DashboardBroadcaster()
@@ -1,8 +1,14 @@
 """Database connection and session management."""
 import os
-from sqlalchemy import create_engine
+import threading
+from typing import Any, Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from api.slow_queries import install_slow_query_log
 
 # Get database URL from environment variable
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -10,20 +16,329 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-# Create engine
-engine = create_engine(DATABASE_URL)
+# Connection pool strategies
+# - "queue": sized QueuePool with pre-ping/recycle (default)
+# - "null":  NullPool, one connection per checkout; use behind PgBouncer in
+#            transaction mode or on serverless functions where every cold
+#            instance would otherwise hold its own pool
+# - "lifo":  QueuePool that reuses the most recently returned connection, so
+#            idle connections above the working set can time out server-side
+#            on long-running uvicorn workers
+POOL_MODE_QUEUE = "queue"
+POOL_MODE_NULL = "null"
+POOL_MODE_LIFO = "lifo"
+
+SUPPORTED_POOL_MODES = {POOL_MODE_QUEUE, POOL_MODE_NULL, POOL_MODE_LIFO}
+
+# Pool configuration from environment variables
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", POOL_MODE_QUEUE).lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Async session stack (asyncpg / aiosqlite drivers), used by the async routes
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "false").lower() == "true"
+
+# Maps sync URL schemes to their asyncio driver equivalents
+ASYNC_DRIVER_SCHEMES = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_pool_options(
+    database_url: str,
+    pool_mode: str = DB_POOL_MODE,
+    use_async: bool = False
+) -> Dict[str, Any]:
+    """
+    Build create_engine() keyword arguments for a pool strategy.
+
+    SQLite URLs keep SQLAlchemy's own pool selection unless NullPool is
+    requested, since SQLite connections are local and sizing does not apply.
+
+    Args:
+        database_url: Database connection URL
+        pool_mode: One of "queue", "null" or "lifo"
+        use_async: Whether the options are for an asyncio engine
+
+    Returns:
+        Dictionary of pool-related engine options
+
+    Raises:
+        ValueError: If pool_mode is not a supported strategy
+    """
+    if pool_mode not in SUPPORTED_POOL_MODES:
+        raise ValueError(
+            f"Unsupported DB_POOL_MODE '{pool_mode}'. "
+            f"Must be one of: {', '.join(sorted(SUPPORTED_POOL_MODES))}"
+        )
+
+    if pool_mode == POOL_MODE_NULL:
+        return {"poolclass": NullPool}
+
+    if database_url.startswith("sqlite"):
+        return {}
+
+    return {
+        "poolclass": AsyncAdaptedQueuePool if use_async else QueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_use_lifo": pool_mode == POOL_MODE_LIFO,
+    }
+
+
+# Pool usage counters, keyed by engine, collected from pool events
+_pool_counters: Dict[int, Dict[str, int]] = {}
+_pool_counters_lock = threading.Lock()
+
+
+def _track_pool_usage(target_engine: Engine) -> None:
+    """Attach pool event listeners that record checkout and connect counts."""
+    counters = {
+        "connections_created": 0,
+        "checkouts": 0,
+        "checked_out": 0,
+        "peak_checked_out": 0,
+    }
+    _pool_counters[id(target_engine)] = counters
+
+    @event.listens_for(target_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        with _pool_counters_lock:
+            counters["connections_created"] += 1
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    @event.listens_for(target_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with _pool_counters_lock:
+            counters["checkouts"] += 1
+            counters["checked_out"] += 1
+            counters["peak_checked_out"] = max(counters["peak_checked_out"], counters["checked_out"])
+
+    @event.listens_for(target_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        with _pool_counters_lock:
+            counters["checked_out"] = max(counters["checked_out"] - 1, 0)
+
+
+def create_db_engine(database_url: str = DATABASE_URL, pool_mode: str = DB_POOL_MODE) -> Engine:
+    """
+    Create a SQLAlchemy engine using the configured pool strategy.
+
+    Args:
+        database_url: Database connection URL
+        pool_mode: One of "queue", "null" or "lifo"
+
+    Returns:
+        Configured Engine with pool usage tracking and the slow-query log attached
+    """
+    new_engine = create_engine(database_url, **get_pool_options(database_url, pool_mode))
+    _track_pool_usage(new_engine)
+    install_slow_query_log(new_engine)
+    return new_engine
+
+
+def _pool_mode_of(pool: Pool) -> Optional[str]:
+    """Work out the DB_POOL_MODE a pool was built for, or None for other pool classes."""
+    if isinstance(pool, NullPool):
+        return POOL_MODE_NULL
+    if isinstance(pool, QueuePool):
+        return POOL_MODE_LIFO if getattr(pool._pool, "use_lifo", False) else POOL_MODE_QUEUE
+    return None
+
+
+def get_pool_stats(target_engine: Optional[Engine] = None) -> Dict[str, Any]:
+    """
+    Get a snapshot of connection pool usage.
+
+    Combines the pool's own gauges (where the pool class provides them) with
+    the checkout counters collected since the engine was created.
+
+    Args:
+        target_engine: Engine to inspect (defaults to the application engine)
+
+    Returns:
+        Dictionary with the engine's pool mode, pool class, gauges and counters
+    """
+    target_engine = target_engine or get_engine()
+    pool = target_engine.pool
+
+    def gauge(name: str) -> Optional[int]:
+        method = getattr(pool, name, None)
+        return method() if callable(method) else None
+
+    with _pool_counters_lock:
+        counters = dict(_pool_counters.get(id(target_engine), {}))
+
+    return {
+        "pool_mode": _pool_mode_of(pool),
+        "pool_class": type(pool).__name__,
+        "size": gauge("size"),
+        "checked_in": gauge("checkedin"),
+        "checked_out": gauge("checkedout"),
+        "overflow": gauge("overflow"),
+        "connections_created": counters.get("connections_created", 0),
+        "checkouts": counters.get("checkouts", 0),
+        "peak_checked_out": counters.get("peak_checked_out", 0),
+        "status": pool.status(),
+    }
+
+
+# Engine and session factory, created on first use so that importing the
+# application does not load the database driver or build a pool on the
+# cold-start path. `engine` and `SessionLocal` remain importable through the
+# module __getattr__ below.
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_engine_lock = threading.Lock()
 
 # Base class for models
 Base = declarative_base()
 
 
+def get_engine() -> Engine:
+    """
+    Get the application's engine, creating it on first use.
+
+    Returns:
+        Engine using the configured pool strategy
+    """
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine()
+
+    return _engine
+
+
+def get_session_factory() -> sessionmaker:
+    """
+    Get the session factory, creating the engine on first use.
+
+    Returns:
+        sessionmaker bound to the application engine
+    """
+    global _session_factory
+
+    if _session_factory is None:
+        bind = get_engine()
+        with _engine_lock:
+            if _session_factory is None:
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=bind)
+
+    return _session_factory
+
+
+def __getattr__(name: str):
+    """Create the engine lazily for `from api.database import engine, SessionLocal`."""
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_db():
     """Dependency to get database session."""
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_async_database_url(database_url: str = DATABASE_URL) -> str:
+    """
+    Convert a sync database URL to its asyncio driver equivalent.
+
+    URLs that already name an async driver are returned unchanged.
+
+    Args:
+        database_url: Sync database connection URL
+
+    Returns:
+        Database URL using the asyncpg or aiosqlite driver
+
+    Raises:
+        ValueError: If the URL scheme has no known async driver
+    """
+    scheme, separator, rest = database_url.partition("://")
+
+    if scheme in ASYNC_DRIVER_SCHEMES.values():
+        return database_url
+
+    if scheme not in ASYNC_DRIVER_SCHEMES:
+        raise ValueError(f"No async driver configured for database scheme '{scheme}'")
+
+    return f"{ASYNC_DRIVER_SCHEMES[scheme]}{separator}{rest}"
+
+
+# Async engine and session factory, created on first use so the async
+# drivers are only imported when the async routes are enabled
+_async_engine = None
+_async_session_factory = None
+
+
+def get_async_engine():
+    """
+    Get the application's asyncio engine, creating it on first use.
+
+    Returns:
+        AsyncEngine using the configured pool strategy
+    """
+    global _async_engine
+
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                from sqlalchemy.ext.asyncio import create_async_engine
+
+                async_url = get_async_database_url(DATABASE_URL)
+                async_engine = create_async_engine(
+                    async_url,
+                    **get_pool_options(async_url, DB_POOL_MODE, use_async=True)
+                )
+                _track_pool_usage(async_engine.sync_engine)
+                install_slow_query_log(async_engine.sync_engine)
+                _async_engine = async_engine
+
+    return _async_engine
+
+
+def get_async_session_factory():
+    """
+    Get the async session factory, creating it on first use.
+
+    Returns:
+        async_sessionmaker bound to the asyncio engine
+    """
+    global _async_session_factory
+
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        bind = get_async_engine()
+        with _engine_lock:
+            if _async_session_factory is None:
+                _async_session_factory = async_sessionmaker(
+                    bind=bind,
+                    autoflush=False,
+                    expire_on_commit=False
+                )
+
+    return _async_session_factory
+
+
+async def get_async_db():
+    """Dependency to get an asyncio database session."""
+    async with get_async_session_factory()() as db:
+        yield db
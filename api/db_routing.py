@@ -0,0 +1,292 @@
+"""Read-replica routing for read-only endpoints.
+
+Dashboards, analytics and exports only read data. When DATABASE_REPLICA_URL
+is configured, the routes named in the routing policy get a session bound to
+the replica instead of the primary, so heavy reporting load moves off the
+write path.
+
+A read-your-writes guard keeps a user's reads on the primary for
+REPLICA_STICKY_SECONDS after that user performs a write, so replication lag
+never hides a change the user just made. Successful write requests set the
+LAST_WRITE_COOKIE cookie to the time of the write, which every worker
+checks, so the guard holds whichever worker serves the next read (browsers
+must send credentials, e.g. fetch with credentials: "include").
+
+Writes are also recorded per user: record_write is called for the actor and
+for any user whose data was changed on their behalf (an admin approving their
+leave), and each one is published on the push broker (api.push_broker,
+REPLICA_GUARD_CHANNEL) so every worker pins that user to the primary.
+"""
+import os
+import threading
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Set
+from fastapi import Cookie, Depends, Response
+from sqlalchemy.orm import Session, sessionmaker
+
+from api.auth import get_current_user
+from api.database import DB_POOL_MODE, create_db_engine, get_db
+from api.push_broker import PushBroker, create_push_broker
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Replica configuration from environment variables
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+# Broker channel carrying recorded writes between workers
+REPLICA_GUARD_CHANNEL = os.getenv("REPLICA_GUARD_CHANNEL", "dayflow_replica_guard")
+
+# Cookie carrying the time (Unix seconds) of the client's last write
+LAST_WRITE_COOKIE = "dayflow_last_write"
+
+# Route names used by the routing policy
+ROUTE_ADMIN_DASHBOARD = "admin_dashboard"
+ROUTE_EMPLOYEE_DASHBOARD = "employee_dashboard"
+ROUTE_ANALYTICS = "analytics"
+ROUTE_EXPORTS = "exports"
+
+DEFAULT_REPLICA_ROUTES = {
+    ROUTE_ADMIN_DASHBOARD,
+    ROUTE_EMPLOYEE_DASHBOARD,
+    ROUTE_ANALYTICS,
+    ROUTE_EXPORTS,
+}
+
+
+def _parse_replica_routes(value: Optional[str]) -> Set[str]:
+    """Parse the comma-separated DB_REPLICA_ROUTES setting."""
+    if value is None:
+        return set(DEFAULT_REPLICA_ROUTES)
+    return {route.strip() for route in value.split(",") if route.strip()}
+
+
+# Routing policy: route names whose reads may be served by the replica
+REPLICA_ROUTES = _parse_replica_routes(os.getenv("DB_REPLICA_ROUTES"))
+
+# Replica session factory, created on first use
+_replica_session_factory: Optional[sessionmaker] = None
+_replica_lock = threading.Lock()
+
+# Read-your-writes guard: maps user_id to the monotonic time of their last write
+_recent_writes: Dict[int, float] = {}
+_recent_writes_lock = threading.Lock()
+
+# Broker sharing recorded writes with other workers, created on first write
+_guard_broker: Optional[PushBroker] = None
+_guard_broker_lock = threading.Lock()
+
+
+def get_replica_session_factory() -> sessionmaker:
+    """
+    Get the replica session factory, creating the replica engine on first use.
+
+    Returns:
+        sessionmaker bound to the replica engine
+    """
+    global _replica_session_factory
+
+    if _replica_session_factory is None:
+        with _replica_lock:
+            if _replica_session_factory is None:
+                replica_engine = create_db_engine(DATABASE_REPLICA_URL, DB_POOL_MODE)
+                _replica_session_factory = sessionmaker(
+                    autocommit=False,
+                    autoflush=False,
+                    bind=replica_engine
+                )
+                logger.info("Created read-replica engine")
+
+    return _replica_session_factory
+
+
+def record_write(user_id: int) -> None:
+    """
+    Record that a user performed a write, or had their data written.
+
+    The user's reads stay on the primary for REPLICA_STICKY_SECONDS in this
+    worker and, through the push broker, in every other one.
+
+    Args:
+        user_id: ID of the user who wrote
+    """
+    if not DATABASE_REPLICA_URL:
+        return
+
+    _remember_write(user_id)
+
+    broker = _subscribe_to_writes()
+    try:
+        broker.publish([{"user_id": user_id}])
+    except Exception as e:
+        # The writer's own cookie still pins their reads on any worker
+        logger.error(f"Failed to publish write for user {user_id}: {str(e)}", exc_info=True)
+
+
+def receive_writes(pushes: List[dict]) -> None:
+    """
+    Record writes published by any worker.
+
+    Broker callback; each push is a {"user_id": ...} dict.
+
+    Args:
+        pushes: Writes published on REPLICA_GUARD_CHANNEL
+    """
+    for push in pushes:
+        _remember_write(push["user_id"])
+
+
+def _remember_write(user_id: int) -> None:
+    """Start the user's read-your-writes window in this worker."""
+    now = time.monotonic()
+
+    with _recent_writes_lock:
+        _recent_writes[user_id] = now
+
+        # Drop expired entries so the guard does not grow without bound
+        if len(_recent_writes) > 1000:
+            expired = [uid for uid, written_at in _recent_writes.items()
+                       if now - written_at >= REPLICA_STICKY_SECONDS]
+            for uid in expired:
+                del _recent_writes[uid]
+
+
+def _subscribe_to_writes() -> PushBroker:
+    """Create and start the write broker on first use."""
+    global _guard_broker
+
+    if _guard_broker is None:
+        with _guard_broker_lock:
+            if _guard_broker is None:
+                broker = create_push_broker(channel=REPLICA_GUARD_CHANNEL)
+                broker.start(receive_writes)
+                _guard_broker = broker
+
+    return _guard_broker
+
+
+def has_recent_write(user_id: int) -> bool:
+    """
+    Check whether a user wrote within the read-your-writes window.
+
+    Args:
+        user_id: ID of the user to check
+
+    Returns:
+        True if the user's reads should stay on the primary
+    """
+    with _recent_writes_lock:
+        written_at = _recent_writes.get(user_id)
+
+    return written_at is not None and time.monotonic() - written_at < REPLICA_STICKY_SECONDS
+
+
+def mark_write(response: Response) -> None:
+    """
+    Set the last-write cookie on the response to a successful write.
+
+    Args:
+        response: Response to the write request
+    """
+    if not DATABASE_REPLICA_URL:
+        return
+
+    response.set_cookie(
+        LAST_WRITE_COOKIE,
+        f"{time.time():.3f}",
+        max_age=max(int(REPLICA_STICKY_SECONDS) + 1, 1),
+        httponly=True,
+        samesite="lax"
+    )
+
+
+def cookie_has_recent_write(last_write_at: Optional[str]) -> bool:
+    """
+    Check whether a last-write cookie falls within the read-your-writes window.
+
+    Args:
+        last_write_at: LAST_WRITE_COOKIE value, if sent
+
+    Returns:
+        True if the client wrote within REPLICA_STICKY_SECONDS
+    """
+    if not last_write_at:
+        return False
+
+    try:
+        written_at = float(last_write_at)
+    except ValueError:
+        return False
+
+    return time.time() - written_at < REPLICA_STICKY_SECONDS
+
+
+def should_use_replica(route_name: str, user_id: Optional[int], last_write_at: Optional[str] = None) -> bool:
+    """
+    Decide whether a read for a route should be served by the replica.
+
+    Args:
+        route_name: Route name from the routing policy
+        user_id: ID of the user making the request
+        last_write_at: LAST_WRITE_COOKIE value sent with the request, if any
+
+    Returns:
+        True if a replica is configured, the route is routed to it, and the
+        user has not written recently
+    """
+    if not DATABASE_REPLICA_URL or route_name not in REPLICA_ROUTES:
+        return False
+
+    if cookie_has_recent_write(last_write_at):
+        return False
+
+    return user_id is None or not has_recent_write(user_id)
+
+
+def clear_recent_writes() -> None:
+    """
+    Clear the read-your-writes guard.
+
+    This is primarily useful for testing to ensure a clean state
+    between test runs.
+    """
+    with _recent_writes_lock:
+        _recent_writes.clear()
+
+
+def read_db(route_name: str) -> Callable:
+    """
+    Dependency factory for read-only routes.
+
+    Yields a replica session when the routing policy sends the route to the
+    replica, otherwise the primary session from get_db. The primary session
+    does not open a connection unless it is used.
+
+    Args:
+        route_name: Route name from the routing policy
+
+    Returns:
+        FastAPI dependency yielding a database session
+
+    Example:
+        @app.get("/api/dashboard/admin")
+        def get_admin_dashboard(db: Session = Depends(read_db("admin_dashboard"))):
+            ...
+    """
+    def dependency(
+        current_user: dict = Depends(get_current_user),
+        db: Session = Depends(get_db),
+        last_write_at: Optional[str] = Cookie(None, alias=LAST_WRITE_COOKIE)
+    ):
+        if not should_use_replica(route_name, current_user.get("user_id"), last_write_at):
+            yield db
+            return
+
+        replica_db = get_replica_session_factory()()
+        try:
+            yield replica_db
+        finally:
+            replica_db.close()
+
+    return dependency
@@ -0,0 +1,257 @@
+"""Conditional GET (ETag / If-None-Match) for polled endpoints.
+
+The dashboards and list pages are polled by the frontend, and most polls
+return exactly what the previous one did. Instead of re-running the queries
+to find out, the ETag is derived from a data version held in memory. A poll
+whose If-None-Match still matches gets a 304 without touching the database.
+
+The version is a random token replaced once per dispatched event (after
+its handlers have run) and once per successful write request that
+dispatched none. The worker replacing it publishes the new token on the
+push broker (api.push_broker, DATA_VERSION_CHANNEL) and every worker adopts
+it, so a write handled by any worker invalidates the ETags of all of them
+without a database write. The ETag also covers the caller's identity, the
+full request URL and the current date, as the dashboards show "today" and
+change at midnight without any write.
+"""
+import os
+import uuid
+import hashlib
+import logging
+import threading
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from jose import JWTError
+
+from api.auth import decode_access_token
+from api.events import register_handler, SUPPORTED_EVENT_TYPES
+from api.push_broker import PushBroker, create_push_broker
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Serve polled endpoints conditionally
+ETAGS_ENABLED = os.getenv("ETAGS_ENABLED", "true").lower() == "true"
+# Broker channel carrying data version changes between workers
+DATA_VERSION_CHANNEL = os.getenv("DATA_VERSION_CHANNEL", "dayflow_data_version")
+
+# Endpoints served with ETags
+CONDITIONAL_GET_PATHS = frozenset({
+    "/api/dashboard/admin",
+    "/api/dashboard/employee",
+    "/api/notifications",
+    "/api/v2/notifications",
+    "/api/leave/my-requests",
+    "/api/leave/all-requests",
+    "/api/employees",
+})
+
+# Methods that never change data
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Write requests that change nothing served with ETags
+NON_DATA_WRITE_PATHS = frozenset({
+    "/api/auth/login",
+    "/api/v2/dashboard/stream-token",
+})
+
+_data_version = uuid.uuid4().hex
+_version_lock = threading.Lock()
+
+# Broker carrying new versions to the other workers, subscribed on first use
+_version_broker: Optional[PushBroker] = None
+
+# Events dispatched while handling the current write request
+_request_events: ContextVar[Optional[List[dict]]] = ContextVar("etag_request_events", default=None)
+
+
+def get_data_version() -> str:
+    """Get this worker's current data version."""
+    return _data_version
+
+
+def receive_data_versions(pushes: List[Any]) -> None:
+    """
+    Adopt a data version published by a worker.
+
+    Broker callback; the last version in the batch wins.
+
+    Args:
+        pushes: Published {"version": ...} messages
+    """
+    global _data_version
+
+    versions = [push.get("version") for push in pushes if isinstance(push, dict) and push.get("version")]
+    if versions:
+        with _version_lock:
+            _data_version = versions[-1]
+
+
+def bump_data_version(payload: Optional[dict] = None) -> None:
+    """
+    Mark all ETags issued so far, by any worker, as stale.
+
+    Usable as an event handler; the payload is ignored. Publishing failures
+    are logged rather than raised.
+
+    Args:
+        payload: Event payload (unused)
+    """
+    global _data_version
+
+    version = uuid.uuid4().hex
+    with _version_lock:
+        _data_version = version
+
+    broker = _subscribe_to_versions()
+    try:
+        broker.publish([{"version": version}])
+    except Exception as e:
+        logger.error(f"Failed to publish data version: {str(e)}", exc_info=True)
+
+
+def track_request_events() -> List[dict]:
+    """
+    Start noting the events dispatched while handling the current request.
+
+    Returns:
+        List that receives the payload of each event dispatched from here on
+        in this context
+    """
+    dispatched: List[dict] = []
+    _request_events.set(dispatched)
+    return dispatched
+
+
+def note_event_dispatched(payload: dict) -> None:
+    """
+    Inline event handler noting the event on the current request, if any.
+
+    The event bumps the data version itself once its handlers have run, so
+    the request need not bump it again.
+
+    Args:
+        payload: Event payload
+    """
+    dispatched = _request_events.get()
+    if dispatched is not None:
+        dispatched.append(payload)
+
+
+def _subscribe_to_versions() -> PushBroker:
+    """Create and start the data version broker on first use."""
+    global _version_broker
+
+    if _version_broker is None:
+        with _version_lock:
+            if _version_broker is None:
+                broker = create_push_broker(channel=DATA_VERSION_CHANNEL)
+                broker.start(receive_data_versions)
+                _version_broker = broker
+
+    return _version_broker
+
+
+def compute_etag(request: Request) -> Optional[str]:
+    """
+    Compute the ETag for a request, if it is served conditionally.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        Weak ETag string, or None if the request is not an authenticated GET
+        to one of CONDITIONAL_GET_PATHS, or ETags are disabled
+    """
+    if not ETAGS_ENABLED or request.method != "GET":
+        return None
+
+    if request.url.path not in CONDITIONAL_GET_PATHS:
+        return None
+
+    # Unauthenticated requests go through to the endpoint, which rejects them
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        return None
+
+    if payload.get("user_id") is None or payload.get("role") is None:
+        return None
+
+    # Receive other workers' versions before issuing ETags against ours
+    _subscribe_to_versions()
+
+    key = "|".join([
+        get_data_version(),
+        date.today().isoformat(),
+        str(payload["user_id"]),
+        str(payload["role"]),
+        request.url.path,
+        request.url.query,
+    ])
+
+    return f'W/"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison).
+
+    Args:
+        if_none_match: If-None-Match header value, if any
+        etag: Current ETag
+
+    Returns:
+        True if the client's copy is still current
+    """
+    if not if_none_match:
+        return False
+
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return True
+
+    return False
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """
+    Build the headers sent with a conditionally served response.
+
+    The response may be stored by the browser but must be revalidated on
+    every use, which is what turns polls into conditional requests.
+
+    Args:
+        etag: Current ETag
+
+    Returns:
+        Dictionary of header names to values
+    """
+    return {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def register_version_handlers() -> None:
+    """
+    Register the event handlers that bump the data version.
+
+    This function should be called once during application initialization.
+    """
+    for event_type in SUPPORTED_EVENT_TYPES:
+        register_handler(event_type, note_event_dispatched, inline=True)
+        # Not inline: runs after the handlers registered before it, such as
+        # notification creation, so no ETag is issued for data they change
+        register_handler(event_type, bump_data_version)
+
+    logger.info("ETag version handlers registered successfully")
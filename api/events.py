@@ -3,19 +3,63 @@
 This module provides a central event dispatching system that allows
 different parts of the application to react to system events without
 tight coupling. Handlers can be registered for specific event types
-and will be invoked synchronously when events are dispatched.
+and are invoked when events are dispatched.
+
+Two dispatch modes are available (EVENT_DISPATCH_MODE):
+
+- "sync" (default): handlers run inside dispatch_event(), on the request's
+  thread, before the response is sent.
+- "background": handlers run on a bounded pool of worker threads fed by an
+  in-process queue, so the response no longer waits for notification
+  fan-out. Handlers registered with inline=True (cheap, in-process work
+  such as cache invalidation) still run inside dispatch_event().
+
+With the transactional outbox enabled (EVENT_OUTBOX_ENABLED, see
+api.outbox), events are also recorded in the event_outbox table in the
+same transaction as the change behind them. dispatch_event() then only
+runs the inline handlers, and the outbox relay delivers the event to the
+others once it claims the row.
+
+Payloads never carry the caller's database session. Handlers registered
+with with_session=True receive a session owned by the dispatcher in
+payload["db"], opened for the delivery and closed afterwards.
 
 Requirements: 26.1, 26.2, 26.3, 26.4, 26.5, 26.6, 26.7
 """
+import os
+import queue
+import time
 import logging
-from typing import Callable, Dict, List, Any
+import threading
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Dispatch configuration from environment variables
+EVENT_DISPATCH_MODE = os.getenv("EVENT_DISPATCH_MODE", "sync").lower()
+EVENT_WORKERS = int(os.getenv("EVENT_WORKERS", "4"))
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+EVENT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("EVENT_QUEUE_TIMEOUT_SECONDS", "0.5"))
+EVENT_DRAIN_TIMEOUT_SECONDS = float(os.getenv("EVENT_DRAIN_TIMEOUT_SECONDS", "10"))
+EVENT_OUTBOX_ENABLED = os.getenv("EVENT_OUTBOX_ENABLED", "false").lower() == "true"
+
 # Event handler registry: maps event types to lists of handler functions
 _event_handlers: Dict[str, List[Callable]] = {}
 
+# Handlers that receive a dispatcher-owned session in payload["db"]
+_session_handlers: Set[Callable] = set()
+
+# Handlers that always run inside dispatch_event(), even in background mode
+_inline_handlers: Set[Callable] = set()
+
+# Wakes the outbox relay after an event is dispatched (set by api.outbox)
+_outbox_wakeup: Optional[Callable[[], None]] = None
+
+# Registration functions deferred until handlers are first needed
+_deferred_registrations: List[Callable[[], None]] = []
+_deferred_lock = threading.RLock()
+
 # Supported event types
 EVENT_LEAVE_REQUESTED = "leave_requested"
 EVENT_LEAVE_APPROVED = "leave_approved"
@@ -23,6 +67,7 @@ EVENT_LEAVE_REJECTED = "leave_rejected"
 EVENT_ATTENDANCE_UPDATED = "attendance_updated"
 EVENT_PAYSLIP_GENERATED = "payslip_generated"
 EVENT_SALARY_UPDATED = "salary_updated"
+EVENT_ROLE_CHANGED = "role_changed"
 
 SUPPORTED_EVENT_TYPES = {
     EVENT_LEAVE_REQUESTED,
@@ -31,10 +76,16 @@ SUPPORTED_EVENT_TYPES = {
     EVENT_ATTENDANCE_UPDATED,
     EVENT_PAYSLIP_GENERATED,
     EVENT_SALARY_UPDATED,
+    EVENT_ROLE_CHANGED,
 }
 
 
-def register_handler(event_type: str, handler: Callable[[dict], None]) -> None:
+def register_handler(
+    event_type: str,
+    handler: Callable[[dict], None],
+    with_session: bool = False,
+    inline: bool = False
+) -> None:
     """
     Register an event handler for a specific event type.
     
@@ -45,6 +96,9 @@ def register_handler(event_type: str, handler: Callable[[dict], None]) -> None:
     Args:
         event_type: The type of event to handle (e.g., "leave_requested")
         handler: A callable that accepts a dict payload and returns None
+        with_session: Whether the handler needs a database session in payload["db"]
+        inline: Whether the handler must run inside dispatch_event() even in
+            background mode (for cheap, in-process work)
         
     Requirements: 26.5
     
@@ -61,16 +115,217 @@ def register_handler(event_type: str, handler: Callable[[dict], None]) -> None:
         _event_handlers[event_type] = []
     
     _event_handlers[event_type].append(handler)
+    
+    if with_session:
+        _session_handlers.add(handler)
+    if inline:
+        _inline_handlers.add(handler)
+    
     logger.info(f"Registered handler for event type: {event_type}")
 
 
+def defer_registration(register: Callable[[], None]) -> None:
+    """
+    Defer a handler registration function until handlers are first needed.
+    
+    The function runs once, on the first dispatch_event() or
+    get_registered_handlers() call, so the modules it imports stay off the
+    application's import path.
+    
+    Args:
+        register: A callable that registers handlers when invoked
+        
+    Example:
+        def register_audit_handlers() -> None:
+            from api.audit import register_handlers
+            register_handlers()
+        
+        defer_registration(register_audit_handlers)
+    """
+    with _deferred_lock:
+        _deferred_registrations.append(register)
+
+
+def _run_deferred_registrations() -> None:
+    """Run any pending deferred registrations."""
+    if not _deferred_registrations:
+        return
+    
+    with _deferred_lock:
+        pending = list(_deferred_registrations)
+        
+        for register in pending:
+            try:
+                register()
+            except Exception as e:
+                logger.error(f"Error running deferred handler registration: {str(e)}", exc_info=True)
+        
+        # Cleared only once registered, so concurrent dispatches wait above
+        del _deferred_registrations[:len(pending)]
+
+
+def _deliver(event_type: str, payload: dict, handlers: List[Callable]) -> List[Exception]:
+    """
+    Invoke handlers for one event, isolating their failures.
+    
+    A database session is opened on first use by a with_session handler,
+    shared by the remaining handlers of this delivery, and closed at the end.
+    
+    Args:
+        event_type: The type of event being delivered
+        payload: Event payload, without a database session
+        handlers: Handlers to invoke, in order
+    
+    Returns:
+        Exceptions raised by failing handlers, in order
+    """
+    errors = []
+    db = None
+    try:
+        for handler in handlers:
+            try:
+                if handler in _session_handlers:
+                    if db is None:
+                        from api.database import get_session_factory
+                        db = get_session_factory()()
+                    handler({**payload, "db": db})
+                else:
+                    handler(payload)
+            except Exception as e:
+                # Log the error but don't block other handlers or the main request
+                logger.error(
+                    f"Error executing handler for event {event_type}: {str(e)}",
+                    exc_info=True
+                )
+                errors.append(e)
+                if db is not None:
+                    db.rollback()
+    finally:
+        if db is not None:
+            db.close()
+    
+    return errors
+
+
+class EventBus:
+    """
+    Bounded in-process queue of events drained by a pool of worker threads.
+    
+    Workers start on the first publish. When the queue is full, publish()
+    waits up to EVENT_QUEUE_TIMEOUT_SECONDS for space and then delivers the
+    event on the caller's thread, so events are never dropped and a burst
+    slows its producers down instead of growing the queue without bound.
+    """
+    
+    def __init__(
+        self,
+        workers: int = EVENT_WORKERS,
+        max_size: int = EVENT_QUEUE_SIZE,
+        put_timeout: float = EVENT_QUEUE_TIMEOUT_SECONDS
+    ):
+        self.workers = max(1, workers)
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue[Optional[Tuple[str, dict, List[Callable]]]]" = queue.Queue(maxsize=max_size)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._accepting = True
+    
+    @property
+    def pending(self) -> int:
+        """Number of events waiting in the queue."""
+        return self._queue.qsize()
+    
+    def publish(self, event_type: str, payload: dict, handlers: List[Callable]) -> None:
+        """
+        Queue an event for delivery to the given handlers.
+        
+        Args:
+            event_type: The type of event
+            payload: Event payload, without a database session
+            handlers: Handlers to invoke
+        """
+        if not self._accepting:
+            # Shutting down: deliver directly rather than lose the event
+            _deliver(event_type, payload, handlers)
+            return
+        
+        self._ensure_workers()
+        
+        try:
+            self._queue.put((event_type, payload, handlers), timeout=self.put_timeout)
+        except queue.Full:
+            logger.warning(f"Event queue full; delivering {event_type} on the dispatching thread")
+            _deliver(event_type, payload, handlers)
+    
+    def shutdown(self, timeout: float = EVENT_DRAIN_TIMEOUT_SECONDS) -> bool:
+        """
+        Stop accepting events, drain the queue and stop the workers.
+        
+        Args:
+            timeout: Maximum seconds to wait for queued events to be delivered
+            
+        Returns:
+            True if every queued event was delivered in time
+        """
+        with self._lock:
+            self._accepting = False
+            threads, self._threads = self._threads, []
+        
+        # One stop marker per worker, queued behind the pending events
+        for _ in threads:
+            self._queue.put(None)
+        
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        
+        drained = not any(thread.is_alive() for thread in threads)
+        if not drained:
+            logger.warning(f"Event queue not drained within {timeout}s; {self.pending} events pending")
+        
+        with self._lock:
+            self._accepting = True
+        
+        return drained
+    
+    def _ensure_workers(self) -> None:
+        """Start the worker threads if they are not running."""
+        if self._threads:
+            return
+        
+        with self._lock:
+            if self._threads:
+                return
+            
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"event-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def _work(self) -> None:
+        """Deliver queued events until a stop marker is received."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                _deliver(*item)
+            finally:
+                self._queue.task_done()
+
+
+# Process-wide event bus used in background dispatch mode
+event_bus = EventBus()
+
+
 def dispatch_event(event_type: str, payload: dict) -> None:
     """
     Dispatch an event to all registered handlers.
     
-    Executes all handlers registered for the given event type synchronously
-    within the current request. If a handler raises an exception, it is logged
-    but does not prevent other handlers from executing or block the main request.
+    In sync mode, executes all handlers within the current request. In
+    background mode, inline handlers run here and the rest are queued on the
+    event bus. If a handler raises an exception, it is logged but does not
+    prevent other handlers from executing or block the main request.
     
     Args:
         event_type: The type of event being dispatched
@@ -90,24 +345,89 @@ def dispatch_event(event_type: str, payload: dict) -> None:
     if event_type not in SUPPORTED_EVENT_TYPES:
         logger.warning(f"Dispatching unsupported event type: {event_type}")
     
-    handlers = _event_handlers.get(event_type, [])
+    _run_deferred_registrations()
+    
+    handlers = list(_event_handlers.get(event_type, []))
     
     if not handlers:
         logger.debug(f"No handlers registered for event type: {event_type}")
         return
     
+    # The caller's session may be closed before queued handlers run;
+    # with_session handlers get a session from the dispatcher instead
+    if "db" in payload:
+        payload = {key: value for key, value in payload.items() if key != "db"}
+    
     logger.info(f"Dispatching event: {event_type} with payload: {payload}")
     
-    # Execute all handlers synchronously
-    for handler in handlers:
-        try:
-            handler(payload)
-        except Exception as e:
-            # Log the error but don't block other handlers or the main request
-            logger.error(
-                f"Error executing handler for event {event_type}: {str(e)}",
-                exc_info=True
-            )
+    if EVENT_DISPATCH_MODE != "background" and not EVENT_OUTBOX_ENABLED:
+        _deliver(event_type, payload, handlers)
+        return
+    
+    inline_handlers = [handler for handler in handlers if handler in _inline_handlers]
+    queued_handlers = [handler for handler in handlers if handler not in _inline_handlers]
+    
+    if inline_handlers:
+        _deliver(event_type, payload, inline_handlers)
+    
+    if EVENT_OUTBOX_ENABLED:
+        # The outbox relay delivers the recorded event to the other handlers
+        if _outbox_wakeup is not None:
+            _outbox_wakeup()
+    elif queued_handlers:
+        event_bus.publish(event_type, payload, queued_handlers)
+
+
+def deliver_queued_handlers(event_type: str, payload: dict) -> None:
+    """
+    Deliver an event to the handlers that do not run inline.
+    
+    Used by the outbox relay for events recorded in the event_outbox table,
+    whose inline handlers already ran in dispatch_event(). Every handler is
+    invoked even if an earlier one fails.
+    
+    Args:
+        event_type: The type of event
+        payload: Event payload, without a database session
+    
+    Raises:
+        Exception: The first handler failure, so the event is retried
+    """
+    _run_deferred_registrations()
+    
+    handlers = [
+        handler for handler in _event_handlers.get(event_type, [])
+        if handler not in _inline_handlers
+    ]
+    errors = _deliver(event_type, payload, handlers) if handlers else []
+    if errors:
+        raise errors[0]
+
+
+def set_outbox_wakeup(wakeup: Optional[Callable[[], None]]) -> None:
+    """
+    Set the callable that wakes the outbox relay after a dispatch.
+    
+    Args:
+        wakeup: Callable taking no arguments, or None to unset
+    """
+    global _outbox_wakeup
+    _outbox_wakeup = wakeup
+
+
+def shutdown_event_bus(timeout: float = EVENT_DRAIN_TIMEOUT_SECONDS) -> bool:
+    """
+    Deliver all queued events and stop the event bus workers.
+    
+    Intended to run on application shutdown.
+    
+    Args:
+        timeout: Maximum seconds to wait for queued events
+        
+    Returns:
+        True if every queued event was delivered in time
+    """
+    return event_bus.shutdown(timeout)
 
 
 def clear_handlers() -> None:
@@ -119,6 +439,12 @@ def clear_handlers() -> None:
     """
     global _event_handlers
     _event_handlers = {}
+    _session_handlers.clear()
+    _inline_handlers.clear()
+    
+    with _deferred_lock:
+        _deferred_registrations.clear()
+    
     logger.info("Cleared all event handlers")
 
 
@@ -134,4 +460,6 @@ def get_registered_handlers(event_type: str) -> List[Callable]:
     Returns:
         List of handler functions registered for the event type
     """
+    _run_deferred_registrations()
+    
     return _event_handlers.get(event_type, []).copy()
@@ -1,12 +1,33 @@
-"""Feature flag management module."""
+"""Feature flag management module.
+
+Gated requests check flags against a process-wide snapshot instead of the
+database. The snapshot is reloaded after FEATURE_FLAG_CACHE_TTL_SECONDS,
+and immediately after a flag is updated: the updating worker publishes
+the change on the push broker (api.push_broker, FEATURE_FLAG_CHANNEL) and
+every worker drops its snapshot.
+"""
+import os
+import time
+import logging
+import threading
+from types import MappingProxyType
 from sqlalchemy.orm import Session
-from typing import Dict, Optional, Callable
+from typing import Any, Dict, Mapping, Optional, Callable
 from fastapi import HTTPException, status, Request, Depends
 from api.models import FeatureFlag
 from api.database import get_db
+from api.push_broker import PushBroker, create_push_broker
 from datetime import datetime
 from functools import wraps
 
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Longest a flag change made outside update_feature_flag can go unnoticed
+FEATURE_FLAG_CACHE_TTL_SECONDS = float(os.getenv("FEATURE_FLAG_CACHE_TTL_SECONDS", "30"))
+# Broker channel carrying flag changes between workers
+FEATURE_FLAG_CHANNEL = os.getenv("FEATURE_FLAG_CHANNEL", "dayflow_feature_flags")
+
 
 def is_feature_enabled(db: Session, feature_name: str) -> bool:
     """
@@ -122,43 +143,125 @@ def seed_default_feature_flags(db: Session) -> None:
 
 
 
-# Request-scoped cache for feature flags
-_request_feature_flag_cache: Dict[int, Dict[str, bool]] = {}
+# Process-wide snapshot of all flags, replaced wholesale on reload
+_flag_snapshot: Optional[Mapping[str, bool]] = None
+_snapshot_loaded_at = 0.0
+# Bumped by every invalidation, so a load that started before one is discarded
+_snapshot_generation = 0
+_snapshot_lock = threading.Lock()
+_load_lock = threading.Lock()
 
+# Broker carrying invalidations to the other workers, subscribed on first load
+_flag_broker: Optional[PushBroker] = None
 
-def get_feature_flags_cached(db: Session, request_id: int) -> Dict[str, bool]:
+
+def get_feature_flags_snapshot(db: Optional[Session] = None) -> Mapping[str, bool]:
     """
-    Get feature flags with per-request caching.
+    Get all feature flags from the process-wide snapshot.
     
-    Caches feature flags for the duration of a single request to avoid
-    repeated database queries.
+    The snapshot is loaded on first use and reloaded once it is older than
+    FEATURE_FLAG_CACHE_TTL_SECONDS or has been invalidated, so most checks
+    are a dictionary lookup without a database query.
     
     Args:
-        db: Database session
-        request_id: Unique identifier for the current request
+        db: Database session to load with (default: a new session)
     
     Returns:
-        Dict[str, bool]: Dictionary mapping feature names to enabled status
+        Mapping[str, bool]: Read-only mapping of feature names to enabled status
     
     Requirements: 32.6
     """
-    if request_id not in _request_feature_flag_cache:
-        _request_feature_flag_cache[request_id] = get_all_feature_flags(db)
+    snapshot = _flag_snapshot
+    if snapshot is not None and time.monotonic() - _snapshot_loaded_at < FEATURE_FLAG_CACHE_TTL_SECONDS:
+        return snapshot
+    
+    _subscribe_to_changes()
+    
+    # One request reloads while the others wait for its result
+    with _load_lock:
+        with _snapshot_lock:
+            if _flag_snapshot is not None and time.monotonic() - _snapshot_loaded_at < FEATURE_FLAG_CACHE_TTL_SECONDS:
+                return _flag_snapshot
+            generation = _snapshot_generation
+        
+        snapshot = MappingProxyType(_load_feature_flags(db))
+        
+        with _snapshot_lock:
+            if generation == _snapshot_generation:
+                _store_snapshot(snapshot)
     
-    return _request_feature_flag_cache[request_id]
+    return snapshot
 
 
-def clear_request_cache(request_id: int) -> None:
+def invalidate_feature_flags(payload: Optional[Any] = None) -> None:
     """
-    Clear the feature flag cache for a specific request.
+    Discard this worker's snapshot, so the next check reloads it.
     
-    Should be called at the end of request processing to prevent memory leaks.
+    Usable as a broker callback; the payload is ignored.
     
     Args:
-        request_id: Unique identifier for the request
+        payload: Changed flags (unused)
     """
-    if request_id in _request_feature_flag_cache:
-        del _request_feature_flag_cache[request_id]
+    global _flag_snapshot, _snapshot_generation
+    
+    with _snapshot_lock:
+        _flag_snapshot = None
+        _snapshot_generation += 1
+
+
+def notify_feature_flags_changed(feature_name: str) -> None:
+    """
+    Invalidate the snapshot in this worker and every other one.
+    
+    Call after committing a flag change.
+    
+    Args:
+        feature_name: The flag that changed
+    """
+    invalidate_feature_flags()
+    
+    broker = _subscribe_to_changes()
+    try:
+        broker.publish([{"feature_name": feature_name}])
+    except Exception as e:
+        # Other workers still pick the change up within the TTL
+        logger.error(f"Failed to notify workers of feature flag change: {str(e)}", exc_info=True)
+
+
+def _store_snapshot(snapshot: Mapping[str, bool]) -> None:
+    """Install a freshly loaded snapshot; the caller holds _snapshot_lock."""
+    global _flag_snapshot, _snapshot_loaded_at
+    
+    _flag_snapshot = snapshot
+    _snapshot_loaded_at = time.monotonic()
+
+
+def _load_feature_flags(db: Optional[Session]) -> Dict[str, bool]:
+    """Load all flags with the given session, or a short-lived one."""
+    if db is not None:
+        return get_all_feature_flags(db)
+    
+    from api.database import get_session_factory
+    
+    db = get_session_factory()()
+    try:
+        return get_all_feature_flags(db)
+    finally:
+        db.close()
+
+
+def _subscribe_to_changes() -> PushBroker:
+    """Create and start the invalidation broker on first use."""
+    global _flag_broker
+    
+    if _flag_broker is None:
+        with _snapshot_lock:
+            if _flag_broker is None:
+                broker = create_push_broker(channel=FEATURE_FLAG_CHANNEL)
+                broker.start(invalidate_feature_flags)
+                _flag_broker = broker
+    
+    return _flag_broker
 
 
 def require_feature(feature_name: str):
@@ -166,7 +269,8 @@ def require_feature(feature_name: str):
     Dependency to check if a feature is enabled before route execution.
     
     Returns 404 when feature is disabled to hide the endpoint.
-    Caches feature flags per request to avoid repeated database queries.
+    Checks the process-wide flag snapshot, so the database is only queried
+    when the snapshot is reloaded.
     
     Args:
         feature_name: Name of the feature to check
@@ -185,22 +289,11 @@ def require_feature(feature_name: str):
             ...
     """
     def dependency(request: Request, db: Session = Depends(get_db)):
-        # Use request id as cache key
-        request_id = id(request)
-        
-        try:
-            # Get cached feature flags for this request
-            feature_flags = get_feature_flags_cached(db, request_id)
-            
-            # Check if feature is enabled
-            if not feature_flags.get(feature_name, False):
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Feature not found or not available"
-                )
-        finally:
-            # Clean up cache after check (will be recreated if needed again in same request)
-            pass
+        if not get_feature_flags_snapshot(db).get(feature_name, False):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Feature not found or not available"
+            )
         
         return True
     
@@ -1,16 +1,54 @@
 from fastapi import FastAPI, HTTPException, Depends, status, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from typing import Optional
 from datetime import datetime, date
 import os
 import logging
-
-from api.database import get_db
+import importlib
+import threading
+
+from api.database import get_db, ASYNC_DB_ENABLED
+from api.db_routing import (
+    read_db,
+    record_write,
+    mark_write,
+    ROUTE_ADMIN_DASHBOARD,
+    ROUTE_EMPLOYEE_DASHBOARD
+)
 from api.models import User, Profile, Attendance, LeaveRequest, Payroll, Notification
+from api.attendance_statements import (
+    build_check_in_statement,
+    build_check_out_statement,
+    attendance_event_payload,
+)
+from api.pagination import paginate, wants_total
+from api.dashboard_queries import (
+    build_admin_stats_statement,
+    build_employee_dashboard_statement,
+    employee_dashboard_from_rows,
+)
+from api.dashboard_cache import (
+    admin_dashboard_cache,
+    employee_dashboard_cache,
+    invalidate_admin_dashboard,
+    register_cache_invalidation_handlers,
+)
+from api.etags import (
+    SAFE_METHODS,
+    NON_DATA_WRITE_PATHS,
+    bump_data_version,
+    track_request_events,
+    compute_etag,
+    etag_matches,
+    etag_headers,
+    register_version_handlers,
+)
 from api.schemas import (
     SignupRequest, SignupResponse, LoginRequest, TokenResponse,
     ProfileMeResponse, ProfileResponse, UserResponse, ProfileUpdate, ProfileUpdateResponse,
@@ -20,7 +58,7 @@ from api.schemas import (
     LeaveRequestCreate, LeaveRequestCreateResponse, LeaveRequestResponse, 
     LeaveRequestListResponse, LeaveRequestWithEmployee, LeaveRequestAllResponse,
     LeaveReview, LeaveReviewResponse,
-    EmployeeDashboardResponse, AttendanceSummary, TodayStatus,
+    EmployeeDashboardResponse,
     AdminDashboardResponse, AdminDashboardStats, AttendanceOverview,
     PayrollResponse, PayrollCreate, PayrollUpdate, PayrollCreateResponse,
     NotificationListResponse, NotificationResponse, NotificationMarkReadResponse
@@ -41,17 +79,17 @@ from api.events import (
     EVENT_ATTENDANCE_UPDATED
 )
 
-# Import v2 routers
-from api.v2_admin import router as v2_admin_router
-from api.v2_analytics import router as v2_analytics_router
-from api.v2_export import router as v2_export_router
-from api.v2_notifications import router as v2_notifications_router
-
-# Import notification system
-from api.notifications import register_notification_handlers
+from api.events import defer_registration, shutdown_event_bus, EVENT_OUTBOX_ENABLED
+from api.outbox import record_event, outbox_relay
 
 # Import WebSocket handler
-from api.websockets import handle_websocket_connection
+from api.websockets import handle_websocket_connection, push_gateway
+
+# Import query instrumentation
+from api.query_metrics import (
+    install_query_listeners, start_collection, finish_collection,
+    build_response_headers, DB_QUERY_HEADERS, UNMATCHED_ROUTE
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -63,7 +101,120 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Configure CORS
+# Count SQL statements per request and route
+install_query_listeners()
+
+
+@app.middleware("http")
+async def query_metrics_middleware(request: Request, call_next):
+    """
+    Collect SQL statement counts and timings for each request.
+    
+    Totals are aggregated under the matched route template (requests that
+    match no route share one bucket), and returned in X-DB-* response
+    headers when DB_QUERY_HEADERS is enabled.
+    """
+    collector, token = start_collection(request.url.path)
+    try:
+        response = await call_next(request)
+    finally:
+        route = request.scope.get("route")
+        finish_collection(collector, token, getattr(route, "path", None) or UNMATCHED_ROUTE)
+    
+    if DB_QUERY_HEADERS:
+        response.headers.update(build_response_headers(collector))
+    
+    return response
+
+
+# v2 routers are imported and mounted on the first request that needs them,
+# keeping their modules off the cold-start import path
+V2_ROUTER_MODULES = (
+    "api.v2_admin",
+    "api.v2_analytics",
+    "api.v2_dashboard",
+    "api.v2_export",
+    "api.v2_notifications",
+)
+
+# Request paths that need the v2 routes: the v2 API and the OpenAPI docs
+V2_ROUTER_PATH_PREFIXES = ("/api/v2/", "/docs", "/redoc", "/openapi.json")
+
+_v2_routers_included = False
+_v2_routers_lock = threading.Lock()
+
+
+def include_v2_routers() -> None:
+    """
+    Import and mount the v2 routers, once.
+    
+    Resets the cached OpenAPI schema so the docs include the v2 routes.
+    """
+    global _v2_routers_included
+    
+    if _v2_routers_included:
+        return
+    
+    with _v2_routers_lock:
+        if _v2_routers_included:
+            return
+        
+        for module_name in V2_ROUTER_MODULES:
+            app.include_router(importlib.import_module(module_name).router)
+        
+        app.openapi_schema = None
+        _v2_routers_included = True
+        logger.info("Mounted v2 routers")
+
+
+@app.middleware("http")
+async def v2_routers_middleware(request: Request, call_next):
+    """Mount the v2 routers before routing the first request for them."""
+    if not _v2_routers_included and request.url.path.startswith(V2_ROUTER_PATH_PREFIXES):
+        include_v2_routers()
+    
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def read_your_writes_middleware(request: Request, call_next):
+    """Mark successful writes with the cookie that keeps reads off the replica."""
+    response = await call_next(request)
+    
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        mark_write(response)
+    
+    return response
+
+
+@app.middleware("http")
+async def conditional_get_middleware(request: Request, call_next):
+    """
+    Answer unchanged polls of the dashboards and lists with 304 Not Modified.
+    
+    A successful write request that dispatched no event bumps the data
+    version (events bump it themselves), so that ETags issued before the
+    write, by any worker, no longer match.
+    """
+    etag = compute_etag(request)
+    if etag is not None and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    
+    is_write = request.method not in SAFE_METHODS and request.url.path not in NON_DATA_WRITE_PATHS
+    dispatched_events = track_request_events() if is_write else None
+    
+    response = await call_next(request)
+    
+    if etag is not None and response.status_code == status.HTTP_200_OK:
+        response.headers.update(etag_headers(etag))
+    elif is_write and response.status_code < 400 and not dispatched_events:
+        await run_in_threadpool(bump_data_version)
+    
+    return response
+
+
+# Configure CORS. Added after the middleware above so it is the outermost
+# layer, and responses they return early (such as 304s) get CORS headers too
 cors_origins = os.getenv("CORS_ORIGINS", "*").split(",")
 app.add_middleware(
     CORSMiddleware,
@@ -73,14 +224,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Register notification handlers
-register_notification_handlers()
 
-# Include v2 routers
-app.include_router(v2_admin_router)
-app.include_router(v2_analytics_router)
-app.include_router(v2_export_router)
-app.include_router(v2_notifications_router)
+def register_deferred_notification_handlers() -> None:
+    """Import the notification system and register its handlers."""
+    from api.notifications import register_notification_handlers
+    register_notification_handlers()
+
+
+# Register notification handlers on the first event dispatch
+defer_registration(register_deferred_notification_handlers)
+defer_registration(register_cache_invalidation_handlers)
+defer_registration(register_version_handlers)
+
+@app.on_event("startup")
+def start_outbox_relay() -> None:
+    """Start relaying outbox events to their handlers, when enabled."""
+    if EVENT_OUTBOX_ENABLED:
+        outbox_relay.start()
+
+
+@app.on_event("shutdown")
+def drain_event_bus() -> None:
+    """Deliver events still queued for background handlers, then stop the push broker."""
+    outbox_relay.stop()
+    shutdown_event_bus()
+    push_gateway.close()
+
+
+# Async ports of the hot routes take over the same paths when enabled.
+# Registered before the sync routes below so they are matched first.
+if ASYNC_DB_ENABLED:
+    from api.async_routes import router as async_router
+    app.include_router(async_router)
 
 
 # Global Exception Handlers
@@ -268,6 +443,9 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
+    # The new user changes the admin dashboard's employee counts
+    invalidate_admin_dashboard()
+    
     # Return user data without password_hash
     return SignupResponse(
         user_id=new_user.id,
@@ -439,6 +617,8 @@ def update_my_profile(
             detail="Failed to update profile"
         )
     
+    record_write(user_id)
+    
     profile_response = ProfileResponse.model_validate(profile)
     
     return ProfileUpdateResponse(
@@ -455,6 +635,8 @@ def get_employees(
     page: int = 1,
     page_size: int = 10,
     department: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     current_user: dict = Depends(require_role(["Admin"])),
     db: Session = Depends(get_db)
 ):
@@ -462,7 +644,9 @@ def get_employees(
     Get list of all employees with pagination and filtering.
     
     Admin-only endpoint that returns employee list with key information.
-    Supports pagination via page and page_size query parameters.
+    Supports pagination via page and page_size query parameters, or via the
+    next_cursor of a previous response (ordered by user ID). The total is
+    counted in page mode and skipped in cursor mode unless include_total is set.
     Supports filtering by department.
     
     Requirements: 4.1, 4.5, 16.5
@@ -488,11 +672,13 @@ def get_employees(
         query = query.filter(Profile.department == department)
     
     # Get total count before pagination
-    total = query.count()
+    total = query.count() if wants_total(include_total, cursor) else None
     
     # Apply pagination
-    offset = (page - 1) * page_size
-    results = query.offset(offset).limit(page_size).all()
+    results, next_cursor = paginate(
+        query, (User.id,), lambda row: (row[0].id,),
+        page, page_size, cursor, descending=False
+    )
     
     # Build employee list
     employees = []
@@ -514,7 +700,8 @@ def get_employees(
         employees=employees,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
@@ -588,6 +775,11 @@ def create_employee(
             detail="Failed to create employee"
         )
     
+    record_write(current_user["user_id"])
+    
+    # The new employee changes the admin dashboard's employee counts
+    invalidate_admin_dashboard()
+    
     # Build response
     user_response = UserResponse(
         id=new_user.id,
@@ -707,6 +899,9 @@ def update_employee_profile(
             detail="Failed to update employee profile"
         )
     
+    record_write(current_user["user_id"])
+    record_write(employee_id)
+    
     profile_response = ProfileResponse.model_validate(profile)
     
     return ProfileUpdateResponse(
@@ -736,30 +931,22 @@ def check_in(
     today = date.today()
     now = datetime.utcnow()
     
-    # Check for existing attendance record for today
-    existing_record = db.query(Attendance).filter(
-        Attendance.user_id == user_id,
-        Attendance.date == today
-    ).first()
-    
-    if existing_record:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Already checked in for today"
-        )
-    
-    # Create new attendance record
-    attendance = Attendance(
-        user_id=user_id,
-        date=today,
-        check_in=now,
-        status="Present"
-    )
+    # Insert today's record in one statement; the unique (user_id, date)
+    # constraint turns a duplicate check-in into no returned row
+    statement = build_check_in_statement(db.get_bind().dialect.name, user_id, today, now)
     
     try:
-        db.add(attendance)
-        db.commit()
-        db.refresh(attendance)
+        attendance = db.execute(statement).first()
+        if attendance is None:
+            db.rollback()
+        else:
+            event_payload = attendance_event_payload(user_id, attendance, "check_in")
+            record_event(db, EVENT_ATTENDANCE_UPDATED, event_payload)
+            db.commit()
+    except IntegrityError:
+        # Dialects without ON CONFLICT report the duplicate as an error
+        db.rollback()
+        attendance = None
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -767,15 +954,17 @@ def check_in(
             detail="Failed to record check-in"
         )
     
+    if attendance is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already checked in for today"
+        )
+    
+    record_write(user_id)
+    
     # Dispatch attendance_updated event
     # Requirements: 26.4
-    dispatch_event(EVENT_ATTENDANCE_UPDATED, {
-        "user_id": user_id,
-        "attendance_id": attendance.id,
-        "date": attendance.date.isoformat(),
-        "action": "check_in",
-        "status": attendance.status
-    })
+    dispatch_event(EVENT_ATTENDANCE_UPDATED, event_payload)
     
     return CheckInResponse(
         attendance_id=attendance.id,
@@ -802,33 +991,16 @@ def check_out(
     today = date.today()
     now = datetime.utcnow()
     
-    # Check for existing check-in record for today
-    attendance = db.query(Attendance).filter(
-        Attendance.user_id == user_id,
-        Attendance.date == today
-    ).first()
-    
-    if not attendance:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No check-in record found for today. Please check in first."
-        )
-    
-    # Update attendance record with check-out time
-    attendance.check_out = now
-    
-    # Compute status based on hours worked
+    # Set the check-out time and compute the status in one statement
     # If worked less than 4 hours, mark as Half-day; otherwise, Present
-    if attendance.check_in:
-        hours_worked = (now - attendance.check_in).total_seconds() / 3600
-        if hours_worked < 4:
-            attendance.status = "Half-day"
-        else:
-            attendance.status = "Present"
-    
     try:
-        db.commit()
-        db.refresh(attendance)
+        attendance = db.execute(build_check_out_statement(user_id, today, now)).first()
+        if attendance is None:
+            db.rollback()
+        else:
+            event_payload = attendance_event_payload(user_id, attendance, "check_out")
+            record_event(db, EVENT_ATTENDANCE_UPDATED, event_payload)
+            db.commit()
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -836,15 +1008,18 @@ def check_out(
             detail="Failed to record check-out"
         )
     
+    # No row updated means there is no check-in record for today
+    if attendance is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No check-in record found for today. Please check in first."
+        )
+    
+    record_write(user_id)
+    
     # Dispatch attendance_updated event
     # Requirements: 26.4
-    dispatch_event(EVENT_ATTENDANCE_UPDATED, {
-        "user_id": user_id,
-        "attendance_id": attendance.id,
-        "date": attendance.date.isoformat(),
-        "action": "check_out",
-        "status": attendance.status
-    })
+    dispatch_event(EVENT_ATTENDANCE_UPDATED, event_payload)
     
     return CheckOutResponse(
         attendance_id=attendance.id,
@@ -922,6 +1097,33 @@ def get_attendance_history(
 
 # Leave Management Endpoints
 
+def leave_event_payload(leave_request: LeaveRequest, reviewed_by: Optional[int] = None) -> dict:
+    """
+    Build the payload of a leave request event.
+    
+    Args:
+        leave_request: Leave request the event is about
+        reviewed_by: ID of the reviewing admin, for approvals and rejections
+    
+    Returns:
+        JSON-serializable event payload
+    """
+    payload = {
+        "user_id": leave_request.user_id,
+        "request_id": leave_request.id,
+        "leave_type": leave_request.leave_type,
+        "start_date": leave_request.start_date.isoformat(),
+        "end_date": leave_request.end_date.isoformat(),
+        "days_count": leave_request.days_count
+    }
+    
+    if reviewed_by is not None:
+        payload["reviewed_by"] = reviewed_by
+        payload["admin_comments"] = leave_request.admin_comments
+    
+    return payload
+
+
 @app.post("/api/leave/request", response_model=LeaveRequestCreateResponse, status_code=status.HTTP_201_CREATED)
 def create_leave_request(
     request: LeaveRequestCreate,
@@ -962,6 +1164,10 @@ def create_leave_request(
     
     try:
         db.add(leave_request)
+        # Flush to assign the ID recorded with the event
+        db.flush()
+        event_payload = leave_event_payload(leave_request)
+        record_event(db, EVENT_LEAVE_REQUESTED, event_payload)
         db.commit()
         db.refresh(leave_request)
     except Exception as e:
@@ -971,17 +1177,11 @@ def create_leave_request(
             detail="Failed to create leave request"
         )
     
+    record_write(user_id)
+    
     # Dispatch leave_requested event
     # Requirements: 26.1
-    dispatch_event(EVENT_LEAVE_REQUESTED, {
-        "user_id": user_id,
-        "request_id": leave_request.id,
-        "leave_type": leave_request.leave_type,
-        "start_date": leave_request.start_date.isoformat(),
-        "end_date": leave_request.end_date.isoformat(),
-        "days_count": leave_request.days_count,
-        "db": db
-    })
+    dispatch_event(EVENT_LEAVE_REQUESTED, event_payload)
     
     return LeaveRequestCreateResponse(
         leave_request=LeaveRequestResponse.model_validate(leave_request),
@@ -996,14 +1196,18 @@ def get_my_leave_requests(
     status_filter: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get leave requests for the authenticated employee.
     
-    Supports pagination (page, page_size), status filtering, and date range filtering.
-    Orders by created_at descending. Returns leave requests with metadata.
+    Supports pagination (page, page_size, or the next_cursor of a previous
+    response), status filtering, and date range filtering. Orders by
+    created_at descending. Returns leave requests with metadata; the total
+    is skipped in cursor mode unless include_total is set.
     
     Requirements: 10.1, 10.2, 10.3, 10.5, 16.5
     """
@@ -1041,15 +1245,14 @@ def get_my_leave_requests(
     if end_date:
         query = query.filter(LeaveRequest.end_date <= end_date)
     
-    # Order by created_at descending
-    query = query.order_by(LeaveRequest.created_at.desc())
-    
     # Get total count before pagination
-    total = query.count()
+    total = query.count() if wants_total(include_total, cursor) else None
     
-    # Apply pagination
-    offset = (page - 1) * page_size
-    results = query.offset(offset).limit(page_size).all()
+    # Apply pagination, ordered by created_at descending
+    results, next_cursor = paginate(
+        query, (LeaveRequest.created_at, LeaveRequest.id), lambda leave_req: (leave_req.created_at, leave_req.id),
+        page, page_size, cursor
+    )
     
     # Convert to response format
     leave_requests = []
@@ -1074,7 +1277,8 @@ def get_my_leave_requests(
         leave_requests=leave_requests,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
@@ -1085,6 +1289,8 @@ def get_all_leave_requests(
     status_filter: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     current_user: dict = Depends(require_role(["Admin"])),
     db: Session = Depends(get_db)
 ):
@@ -1132,15 +1338,14 @@ def get_all_leave_requests(
     if end_date:
         query = query.filter(LeaveRequest.end_date <= end_date)
     
-    # Order by created_at descending
-    query = query.order_by(LeaveRequest.created_at.desc())
-    
     # Get total count before pagination
-    total = query.count()
+    total = query.count() if wants_total(include_total, cursor) else None
     
-    # Apply pagination
-    offset = (page - 1) * page_size
-    results = query.offset(offset).limit(page_size).all()
+    # Apply pagination, ordered by created_at descending
+    results, next_cursor = paginate(
+        query, (LeaveRequest.created_at, LeaveRequest.id), lambda row: (row[0].created_at, row[0].id),
+        page, page_size, cursor
+    )
     
     # Convert to response format with employee details
     leave_requests = []
@@ -1169,7 +1374,8 @@ def get_all_leave_requests(
         leave_requests=leave_requests,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
@@ -1215,7 +1421,10 @@ def approve_leave_request(
     if review.comments:
         leave_request.admin_comments = review.comments
     
+    event_payload = leave_event_payload(leave_request, reviewed_by=admin_id)
+    
     try:
+        record_event(db, EVENT_LEAVE_APPROVED, event_payload)
         db.commit()
         db.refresh(leave_request)
     except Exception as e:
@@ -1225,19 +1434,12 @@ def approve_leave_request(
             detail="Failed to approve leave request"
         )
     
+    record_write(admin_id)
+    record_write(leave_request.user_id)
+    
     # Dispatch leave_approved event
     # Requirements: 26.2
-    dispatch_event(EVENT_LEAVE_APPROVED, {
-        "user_id": leave_request.user_id,
-        "request_id": leave_request.id,
-        "leave_type": leave_request.leave_type,
-        "start_date": leave_request.start_date.isoformat(),
-        "end_date": leave_request.end_date.isoformat(),
-        "days_count": leave_request.days_count,
-        "reviewed_by": admin_id,
-        "admin_comments": leave_request.admin_comments,
-        "db": db
-    })
+    dispatch_event(EVENT_LEAVE_APPROVED, event_payload)
     
     # Build response
     leave_response = LeaveRequestResponse(
@@ -1304,7 +1506,10 @@ def reject_leave_request(
     if review.comments:
         leave_request.admin_comments = review.comments
     
+    event_payload = leave_event_payload(leave_request, reviewed_by=admin_id)
+    
     try:
+        record_event(db, EVENT_LEAVE_REJECTED, event_payload)
         db.commit()
         db.refresh(leave_request)
     except Exception as e:
@@ -1314,19 +1519,12 @@ def reject_leave_request(
             detail="Failed to reject leave request"
         )
     
+    record_write(admin_id)
+    record_write(leave_request.user_id)
+    
     # Dispatch leave_rejected event
     # Requirements: 26.3
-    dispatch_event(EVENT_LEAVE_REJECTED, {
-        "user_id": leave_request.user_id,
-        "request_id": leave_request.id,
-        "leave_type": leave_request.leave_type,
-        "start_date": leave_request.start_date.isoformat(),
-        "end_date": leave_request.end_date.isoformat(),
-        "days_count": leave_request.days_count,
-        "reviewed_by": admin_id,
-        "admin_comments": leave_request.admin_comments,
-        "db": db
-    })
+    dispatch_event(EVENT_LEAVE_REJECTED, event_payload)
     
     # Build response
     leave_response = LeaveRequestResponse(
@@ -1357,7 +1555,7 @@ def reject_leave_request(
 @app.get("/api/dashboard/employee", response_model=EmployeeDashboardResponse)
 def get_employee_dashboard(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(read_db(ROUTE_EMPLOYEE_DASHBOARD))
 ):
     """
     Get employee dashboard data.
@@ -1365,185 +1563,91 @@ def get_employee_dashboard(
     Returns attendance summary for current month, last 5 attendance records,
     last 5 leave requests, pending leave requests count, and today's attendance status.
     
+    The whole payload is fetched in a single statement and cached per user
+    until the user checks in/out or one of their leave requests changes.
+    
     Requirements: 5.1, 5.2, 5.3, 5.4, 5.5
     """
     user_id = current_user["user_id"]
     today = date.today()
     
-    # Calculate current month date range
-    month_start = date(today.year, today.month, 1)
-    if today.month == 12:
-        month_end = date(today.year, 12, 31)
-    else:
-        from datetime import timedelta
-        next_month = date(today.year, today.month + 1, 1)
-        month_end = next_month - timedelta(days=1)
-    
-    # Calculate attendance summary for current month
-    attendance_records = db.query(Attendance).filter(
-        Attendance.user_id == user_id,
-        Attendance.date >= month_start,
-        Attendance.date <= month_end
-    ).all()
-    
-    present_count = sum(1 for record in attendance_records if record.status == "Present")
-    absent_count = sum(1 for record in attendance_records if record.status == "Absent")
-    leave_count = sum(1 for record in attendance_records if record.status == "Leave")
-    
-    attendance_summary = AttendanceSummary(
-        present=present_count,
-        absent=absent_count,
-        leave=leave_count,
-        current_month=today.strftime("%B %Y")
-    )
-    
-    # Fetch last 5 attendance records
-    recent_attendance_records = db.query(Attendance).filter(
-        Attendance.user_id == user_id
-    ).order_by(Attendance.date.desc()).limit(5).all()
+    cached = employee_dashboard_cache.get(user_id)
+    if cached is not None and cached[0] == today:
+        return cached[1]
     
-    recent_attendance = []
-    for record in recent_attendance_records:
-        recent_attendance.append(AttendanceRecord(
-            id=record.id,
-            user_id=record.user_id,
-            date=record.date,
-            check_in=record.check_in.isoformat() if record.check_in else None,
-            check_out=record.check_out.isoformat() if record.check_out else None,
-            status=record.status
-        ))
+    rows = db.execute(build_employee_dashboard_statement(user_id, today)).all()
+    response = employee_dashboard_from_rows(user_id, today, rows)
     
-    # Fetch last 5 leave requests
-    recent_leave_records = db.query(LeaveRequest).filter(
-        LeaveRequest.user_id == user_id
-    ).order_by(LeaveRequest.created_at.desc()).limit(5).all()
+    employee_dashboard_cache.set(user_id, (today, response))
     
-    recent_leaves = []
-    for leave_req in recent_leave_records:
-        recent_leaves.append(LeaveRequestResponse(
-            id=leave_req.id,
-            user_id=leave_req.user_id,
-            leave_type=leave_req.leave_type,
-            start_date=leave_req.start_date,
-            end_date=leave_req.end_date,
-            days_count=leave_req.days_count,
-            remarks=leave_req.remarks,
-            status=leave_req.status,
-            reviewed_by=leave_req.reviewed_by,
-            reviewed_at=leave_req.reviewed_at.isoformat() if leave_req.reviewed_at else None,
-            admin_comments=leave_req.admin_comments,
-            created_at=leave_req.created_at.isoformat(),
-            updated_at=leave_req.updated_at.isoformat()
-        ))
-    
-    # Count pending leave requests
-    pending_leaves_count = db.query(LeaveRequest).filter(
-        LeaveRequest.user_id == user_id,
-        LeaveRequest.status == "Pending"
-    ).count()
-    
-    # Get today's attendance status
-    today_attendance = db.query(Attendance).filter(
-        Attendance.user_id == user_id,
-        Attendance.date == today
-    ).first()
-    
-    if today_attendance:
-        today_status = TodayStatus(
-            checked_in=True,
-            check_in_time=today_attendance.check_in.isoformat() if today_attendance.check_in else None,
-            checked_out=today_attendance.check_out is not None,
-            check_out_time=today_attendance.check_out.isoformat() if today_attendance.check_out else None
-        )
-    else:
-        today_status = TodayStatus(
-            checked_in=False,
-            check_in_time=None,
-            checked_out=False,
-            check_out_time=None
-        )
-    
-    return EmployeeDashboardResponse(
-        attendance_summary=attendance_summary,
-        recent_attendance=recent_attendance,
-        recent_leaves=recent_leaves,
-        pending_leaves_count=pending_leaves_count,
-        today_status=today_status
-    )
-
+    return response
 
 
 @app.get("/api/dashboard/admin", response_model=AdminDashboardResponse)
 def get_admin_dashboard(
+    pending_limit: int = 50,
+    pending_cursor: Optional[str] = None,
     current_user: dict = Depends(require_role(["Admin"])),
-    db: Session = Depends(get_db)
+    db: Session = Depends(read_db(ROUTE_ADMIN_DASHBOARD))
 ):
     """
     Get admin dashboard data.
     
     Returns organization-wide statistics including total employees, present today,
     on leave today, pending leave approvals, attendance overview by status for today,
-    and all pending leave requests.
+    and pending leave requests (newest first, up to pending_limit per page; further
+    pages via pending_next_cursor).
+    
+    Responses are cached in-process for a few seconds and invalidated by
+    attendance and leave events.
     
     Requirements: 6.1, 6.2, 6.3
     """
+    if pending_limit < 1 or pending_limit > 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pending limit must be between 1 and 100"
+        )
+    
     today = date.today()
+    cache_key = (today, pending_limit, pending_cursor)
     
-    # Calculate total employees count
-    total_employees = db.query(User).filter(User.role == "Employee").count()
-    
-    # Count employees present today
-    present_today = db.query(Attendance).filter(
-        Attendance.date == today,
-        Attendance.status == "Present"
-    ).count()
-    
-    # Count employees on leave today
-    # An employee is on leave today if they have an approved leave request that covers today
-    on_leave_today = db.query(LeaveRequest).filter(
-        LeaveRequest.status == "Approved",
-        LeaveRequest.start_date <= today,
-        LeaveRequest.end_date >= today
-    ).count()
-    
-    # Count pending leave approvals
-    pending_approvals = db.query(LeaveRequest).filter(
-        LeaveRequest.status == "Pending"
-    ).count()
+    cached_response = admin_dashboard_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
+    
+    # Compute all counts and today's attendance histogram in one statement
+    counts = db.execute(build_admin_stats_statement(today)).one()
     
     # Build stats
     stats = AdminDashboardStats(
-        total_employees=total_employees,
-        present_today=present_today,
-        on_leave_today=on_leave_today,
-        pending_approvals=pending_approvals
+        total_employees=counts.total_employees,
+        present_today=counts.present,
+        on_leave_today=counts.on_leave_today,
+        pending_approvals=counts.pending_approvals
     )
     
-    # Calculate attendance overview by status for today
-    attendance_today = db.query(Attendance).filter(
-        Attendance.date == today
-    ).all()
-    
-    present_count = sum(1 for record in attendance_today if record.status == "Present")
-    absent_count = sum(1 for record in attendance_today if record.status == "Absent")
-    leave_count = sum(1 for record in attendance_today if record.status == "Leave")
-    half_day_count = sum(1 for record in attendance_today if record.status == "Half-day")
-    
     attendance_overview = AttendanceOverview(
-        present=present_count,
-        absent=absent_count,
-        leave=leave_count,
-        half_day=half_day_count
+        present=counts.present,
+        absent=counts.absent,
+        leave=counts.leave,
+        half_day=counts.half_day
     )
     
-    # Fetch all pending leave requests with employee details
-    pending_leave_records = db.query(LeaveRequest, User, Profile).join(
+    # Fetch one page of pending leave requests with employee details
+    pending_query = db.query(LeaveRequest, User, Profile).join(
         User, LeaveRequest.user_id == User.id
     ).join(
         Profile, User.id == Profile.user_id
     ).filter(
         LeaveRequest.status == "Pending"
-    ).order_by(LeaveRequest.created_at.desc()).all()
+    )
+    
+    pending_leave_records, pending_next_cursor = paginate(
+        pending_query, (LeaveRequest.created_at, LeaveRequest.id),
+        lambda row: (row[0].created_at, row[0].id),
+        1, pending_limit, pending_cursor
+    )
     
     pending_leave_requests = []
     for leave_req, user, profile in pending_leave_records:
@@ -1567,11 +1671,16 @@ def get_admin_dashboard(
             department=profile.department
         ))
     
-    return AdminDashboardResponse(
+    response = AdminDashboardResponse(
         stats=stats,
         attendance_overview=attendance_overview,
-        pending_leave_requests=pending_leave_requests
+        pending_leave_requests=pending_leave_requests,
+        pending_next_cursor=pending_next_cursor
     )
+    
+    admin_dashboard_cache.set(cache_key, response)
+    
+    return response
 
 
 
@@ -1717,6 +1826,9 @@ def create_employee_payroll(
             detail="Failed to create payroll record"
         )
     
+    record_write(current_user["user_id"])
+    record_write(employee_id)
+    
     # Build response
     payroll_response = PayrollResponse(
         id=payroll.id,
@@ -1778,6 +1890,9 @@ def update_employee_payroll(
             detail="Failed to update payroll record"
         )
     
+    record_write(current_user["user_id"])
+    record_write(employee_id)
+    
     # Build response
     payroll_response = PayrollResponse(
         id=payroll.id,
@@ -1806,6 +1921,8 @@ def update_employee_payroll(
 def get_notifications(
     page: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1813,6 +1930,8 @@ def get_notifications(
     Get notifications for the authenticated user.
     
     Returns notifications ordered by created_at descending (newest first).
+    Pages are selected by page number or by the next_cursor of a previous
+    response; the total is skipped in cursor mode unless include_total is set.
     """
     user_id = current_user["user_id"]
     
@@ -1821,21 +1940,22 @@ def get_notifications(
     # Build query for user's notifications
     query = db.query(Notification).filter(Notification.user_id == user_id)
     
-    # Order by created_at descending (newest first)
-    query = query.order_by(Notification.created_at.desc())
-    
-    # Get total count before pagination
-    total = query.count()
-    
-    # Get unread count
-    unread_count = db.query(Notification).filter(
-        Notification.user_id == user_id,
-        Notification.is_read == False
-    ).count()
-    
-    # Apply pagination
-    offset = (page - 1) * page_size
-    results = query.offset(offset).limit(page_size).all()
+    # Get unread count, and the total count in the same statement if requested
+    unread = func.count(Notification.id).filter(Notification.is_read == False)
+    if wants_total(include_total, cursor):
+        total, unread_count = db.query(func.count(Notification.id), unread).filter(
+            Notification.user_id == user_id
+        ).one()
+    else:
+        total = None
+        unread_count = db.query(unread).filter(Notification.user_id == user_id).scalar()
+    
+    # Apply pagination, ordered by created_at descending (newest first)
+    results, next_cursor = paginate(
+        query, (Notification.created_at, Notification.id),
+        lambda notification: (notification.created_at, notification.id),
+        page, page_size, cursor
+    )
     
     # Convert to response format
     notifications = []
@@ -1855,7 +1975,8 @@ def get_notifications(
         unread_count=unread_count,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
@@ -2,7 +2,7 @@
 from datetime import datetime, date
 from sqlalchemy import (
     Column, Integer, String, DateTime, Date, Text, 
-    ForeignKey, CheckConstraint, UniqueConstraint, DECIMAL, Boolean, JSON
+    ForeignKey, CheckConstraint, UniqueConstraint, DECIMAL, Boolean, JSON, Index
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
@@ -122,6 +122,9 @@ class LeaveRequest(Base):
     __table_args__ = (
         CheckConstraint("leave_type IN ('Sick', 'Casual', 'Vacation', 'Unpaid')", name="check_leave_type"),
         CheckConstraint("status IN ('Pending', 'Approved', 'Rejected')", name="check_status"),
+        # Keyset pagination over (created_at, id), overall and per user
+        Index("idx_leave_requests_created_id", "created_at", "id"),
+        Index("idx_leave_requests_user_created_id", "user_id", "created_at", "id"),
     )
 
 
@@ -246,6 +249,11 @@ class Notification(Base):
     # Relationships
     user = relationship("User", back_populates="notifications")
 
+    __table_args__ = (
+        # Keyset pagination over (created_at, id) per user
+        Index("idx_notifications_user_created_id", "user_id", "created_at", "id"),
+    )
+
 
 class RoleChangeLog(Base):
     """Role change audit log model."""
@@ -258,6 +266,11 @@ class RoleChangeLog(Base):
     changed_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     changed_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Keyset pagination over (changed_at, id)
+        Index("idx_role_change_log_changed_id", "changed_at", "id"),
+    )
+
 
 class FeatureFlag(Base):
     """Feature flag model for feature toggles."""
@@ -268,3 +281,23 @@ class FeatureFlag(Base):
     enabled = Column(Boolean, default=False)
     description = Column(Text)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EventOutbox(Base):
+    """Domain events recorded in the same transaction as the change behind them."""
+    __tablename__ = "event_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSONType, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    # Earliest time a failed event is retried; NULL until its first failure
+    next_attempt_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The relay claims pending rows (processed_at IS NULL) in id order
+        Index("idx_event_outbox_processed_id", "processed_at", "id"),
+    )
@@ -7,9 +7,8 @@ push notifications for real-time updates.
 Requirements: 27.1, 27.2, 27.3, 27.4, 27.5, 27.6
 """
 import logging
-import asyncio
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, List, Optional
 from sqlalchemy.orm import Session
 
 from api.models import Notification
@@ -77,22 +76,104 @@ def create_notification(
         raise
 
 
+def create_notifications(
+    db: Session,
+    user_ids: Iterable[int],
+    notification_type: str,
+    message: str,
+    related_entity_type: Optional[str] = None,
+    related_entity_id: Optional[int] = None
+) -> List[Notification]:
+    """
+    Create the same notification for several users in one transaction.
+    
+    Either every user is notified or, if the commit fails, none is.
+    
+    Args:
+        db: Database session
+        user_ids: IDs of the users to notify
+        notification_type: Type of notification (e.g., "leave_requested")
+        message: Human-readable notification message
+        related_entity_type: Optional type of related entity (e.g., "leave_request")
+        related_entity_id: Optional ID of related entity
+        
+    Returns:
+        Created Notification objects
+        
+    Requirements: 27.5, 27.6
+    """
+    now = datetime.utcnow()
+    notifications = [
+        Notification(
+            user_id=user_id,
+            notification_type=notification_type,
+            message=message,
+            related_entity_type=related_entity_type,
+            related_entity_id=related_entity_id,
+            is_read=False,
+            created_at=now
+        )
+        for user_id in user_ids
+    ]
+    
+    if not notifications:
+        return []
+    
+    try:
+        db.add_all(notifications)
+        db.commit()
+        logger.info(f"Created {len(notifications)} {notification_type} notifications")
+        return notifications
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to create {notification_type} notifications: {str(e)}", exc_info=True)
+        raise
+
+
+
+def _already_notified(db: Session, user_id: int, notification_type: str, request_id: int) -> bool:
+    """
+    Check whether a user already has a notification for a leave request.
+    
+    Lets handlers skip work when the outbox relay redelivers an event.
+    
+    Args:
+        db: Database session
+        user_id: ID of the user to check
+        notification_type: Type of notification
+        request_id: ID of the leave request
+        
+    Returns:
+        True if a matching notification exists
+    """
+    from sqlalchemy import exists
+    
+    return db.query(exists().where(
+        Notification.user_id == user_id,
+        Notification.notification_type == notification_type,
+        Notification.related_entity_type == "leave_request",
+        Notification.related_entity_id == request_id
+    )).scalar()
+
 
 def handle_leave_approved(payload: dict) -> None:
     """
     Handler for leave_approved event.
     
-    Creates a notification for the employee whose leave was approved.
-    Pushes real-time update via WebSocket if user is connected.
-    Falls back to database storage if no active connections.
+    Creates a notification for the employee whose leave was approved,
+    then pushes a real-time update via WebSocket if the user is connected.
+    A redelivered event for an already notified employee does nothing.
     Expects 'db' key in payload with database session.
     
     Args:
         payload: Event payload containing user_id, request_id, leave_type, db, etc.
         
+    Raises:
+        Exception: If the notification cannot be stored, so the event is retried
+        
     Requirements: 27.1, 27.4, 27.5
     """
-    from api.websockets import push_update
+    from api.websockets import push_gateway
     
     db = payload.get("db")
     if not db:
@@ -107,33 +188,11 @@ def handle_leave_approved(payload: dict) -> None:
     
     message = f"Your {leave_type} leave request from {start_date} to {end_date} has been approved."
     
-    # Try to push via WebSocket first
-    try:
-        # Run async push_update in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        pushed = loop.run_until_complete(push_update(
-            user_id=user_id,
-            update_type="leave_approved",
-            payload={
-                "request_id": request_id,
-                "message": message,
-                "leave_type": leave_type,
-                "start_date": start_date,
-                "end_date": end_date
-            }
-        ))
-        loop.close()
-        
-        if pushed:
-            logger.info(f"Pushed leave_approved update via WebSocket to user {user_id}")
-        else:
-            logger.debug(f"No active WebSocket connections for user {user_id}, falling back to database")
-    except Exception as e:
-        logger.error(f"Failed to push WebSocket update: {str(e)}", exc_info=True)
-        pushed = False
+    if _already_notified(db, user_id, "leave_approved", request_id):
+        logger.info(f"User {user_id} already notified about approved leave request {request_id}")
+        return
     
-    # Always create database notification as fallback/backup
+    # Store the notification first, so a failure is retried before anything is pushed
     try:
         create_notification(
             db=db,
@@ -146,6 +205,16 @@ def handle_leave_approved(payload: dict) -> None:
         logger.info(f"Notification sent to user {user_id} for approved leave request {request_id}")
     except Exception as e:
         logger.error(f"Failed to create notification for leave approval: {str(e)}", exc_info=True)
+        raise
+    
+    # Push via WebSocket if the user is connected
+    push_gateway.submit([(user_id, "leave_approved", {
+        "request_id": request_id,
+        "message": message,
+        "leave_type": leave_type,
+        "start_date": start_date,
+        "end_date": end_date
+    })])
 
 
 def handle_leave_rejected(payload: dict) -> None:
@@ -153,17 +222,20 @@ def handle_leave_rejected(payload: dict) -> None:
     Handler for leave_rejected event.
     
     Creates a notification for the employee whose leave was rejected,
-    including admin comments if provided.
-    Pushes real-time update via WebSocket if user is connected.
-    Falls back to database storage if no active connections.
+    including admin comments if provided, then pushes a real-time update
+    via WebSocket if the user is connected. A redelivered event for an
+    already notified employee does nothing.
     Expects 'db' key in payload with database session.
     
     Args:
         payload: Event payload containing user_id, request_id, leave_type, admin_comments, db, etc.
         
+    Raises:
+        Exception: If the notification cannot be stored, so the event is retried
+        
     Requirements: 27.2, 27.4, 27.5
     """
-    from api.websockets import push_update
+    from api.websockets import push_gateway
     
     db = payload.get("db")
     if not db:
@@ -182,34 +254,11 @@ def handle_leave_rejected(payload: dict) -> None:
     if admin_comments:
         message += f" Reason: {admin_comments}"
     
-    # Try to push via WebSocket first
-    try:
-        # Run async push_update in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        pushed = loop.run_until_complete(push_update(
-            user_id=user_id,
-            update_type="leave_rejected",
-            payload={
-                "request_id": request_id,
-                "message": message,
-                "leave_type": leave_type,
-                "start_date": start_date,
-                "end_date": end_date,
-                "admin_comments": admin_comments
-            }
-        ))
-        loop.close()
-        
-        if pushed:
-            logger.info(f"Pushed leave_rejected update via WebSocket to user {user_id}")
-        else:
-            logger.debug(f"No active WebSocket connections for user {user_id}, falling back to database")
-    except Exception as e:
-        logger.error(f"Failed to push WebSocket update: {str(e)}", exc_info=True)
-        pushed = False
+    if _already_notified(db, user_id, "leave_rejected", request_id):
+        logger.info(f"User {user_id} already notified about rejected leave request {request_id}")
+        return
     
-    # Always create database notification as fallback/backup
+    # Store the notification first, so a failure is retried before anything is pushed
     try:
         create_notification(
             db=db,
@@ -222,24 +271,40 @@ def handle_leave_rejected(payload: dict) -> None:
         logger.info(f"Notification sent to user {user_id} for rejected leave request {request_id}")
     except Exception as e:
         logger.error(f"Failed to create notification for leave rejection: {str(e)}", exc_info=True)
+        raise
+    
+    # Push via WebSocket if the user is connected
+    push_gateway.submit([(user_id, "leave_rejected", {
+        "request_id": request_id,
+        "message": message,
+        "leave_type": leave_type,
+        "start_date": start_date,
+        "end_date": end_date,
+        "admin_comments": admin_comments
+    })])
 
 
 def handle_leave_requested(payload: dict) -> None:
     """
     Handler for leave_requested event.
     
-    Creates notifications for all admin users when a new leave request is submitted.
-    Pushes real-time updates via WebSocket to all connected admins.
-    Falls back to database storage if no active connections.
+    Creates notifications for all admin users when a new leave request is
+    submitted, committed together, then pushes one real-time update to all
+    connected admins (the role:Admin channel). Admins already notified about
+    the request are skipped, so a redelivered event adds no duplicates.
     Expects 'db' key in payload with database session.
     
     Args:
         payload: Event payload containing user_id, request_id, leave_type, db, etc.
         
+    Raises:
+        Exception: If the notifications cannot be stored, so the event is retried
+        
     Requirements: 27.3, 27.4, 27.5
     """
+    from sqlalchemy import and_, exists
     from api.models import User, Profile
-    from api.websockets import push_update
+    from api.websockets import push_gateway, role_channel
     
     db = payload.get("db")
     if not db:
@@ -270,52 +335,43 @@ def handle_leave_requested(payload: dict) -> None:
     
     message = f"{requester_name} has requested {leave_type} leave from {start_date} to {end_date} ({days_count} days)."
     
-    # Get all admin users
+    # Store a notification for every admin in one transaction
     try:
-        admin_users = db.query(User).filter(User.role == "Admin").all()
-        
-        for admin in admin_users:
-            # Try to push via WebSocket first
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                pushed = loop.run_until_complete(push_update(
-                    user_id=admin.id,
-                    update_type="leave_requested",
-                    payload={
-                        "request_id": request_id,
-                        "message": message,
-                        "requester_id": requester_id,
-                        "requester_name": requester_name,
-                        "leave_type": leave_type,
-                        "start_date": start_date,
-                        "end_date": end_date,
-                        "days_count": days_count
-                    }
-                ))
-                loop.close()
-                
-                if pushed:
-                    logger.info(f"Pushed leave_requested update via WebSocket to admin {admin.id}")
-            except Exception as e:
-                logger.error(f"Failed to push WebSocket update to admin {admin.id}: {str(e)}", exc_info=True)
-            
-            # Always create database notification as fallback/backup
-            try:
-                create_notification(
-                    db=db,
-                    user_id=admin.id,
-                    notification_type="leave_requested",
-                    message=message,
-                    related_entity_type="leave_request",
-                    related_entity_id=request_id
-                )
-            except Exception as e:
-                logger.error(f"Failed to create notification for admin {admin.id}: {str(e)}", exc_info=True)
-        
-        logger.info(f"Notifications sent to {len(admin_users)} admins for leave request {request_id}")
+        already_notified = exists().where(and_(
+            Notification.user_id == User.id,
+            Notification.notification_type == "leave_requested",
+            Notification.related_entity_type == "leave_request",
+            Notification.related_entity_id == request_id
+        ))
+        admin_ids = [
+            admin.id
+            for admin in db.query(User).filter(User.role == "Admin", ~already_notified).all()
+        ]
+        create_notifications(
+            db=db,
+            user_ids=admin_ids,
+            notification_type="leave_requested",
+            message=message,
+            related_entity_type="leave_request",
+            related_entity_id=request_id
+        )
+        logger.info(f"Notifications sent to {len(admin_ids)} admins for leave request {request_id}")
     except Exception as e:
+        db.rollback()
         logger.error(f"Failed to notify admins about leave request: {str(e)}", exc_info=True)
+        raise
+    
+    # Push to all connected admins through their role channel
+    push_gateway.submit([(role_channel("Admin"), "leave_requested", {
+        "request_id": request_id,
+        "message": message,
+        "requester_id": requester_id,
+        "requester_name": requester_name,
+        "leave_type": leave_type,
+        "start_date": start_date,
+        "end_date": end_date,
+        "days_count": days_count
+    })])
 
 
 def handle_attendance_updated(payload: dict) -> None:
@@ -323,7 +379,7 @@ def handle_attendance_updated(payload: dict) -> None:
     Handler for attendance_updated event.
     
     Pushes real-time updates via WebSocket to all connected admins
-    when an employee checks in or checks out.
+    (the role:Admin channel) when an employee checks in or checks out.
     Does not create database notifications (attendance updates are not
     critical enough to warrant persistent notifications).
     Expects 'db' key in payload with database session.
@@ -334,7 +390,7 @@ def handle_attendance_updated(payload: dict) -> None:
     Requirements: 27.4, 27.5
     """
     from api.models import User, Profile
-    from api.websockets import push_update
+    from api.websockets import push_gateway, role_channel
     
     db = payload.get("db")
     if not db:
@@ -366,38 +422,18 @@ def handle_attendance_updated(payload: dict) -> None:
     action_text = "checked in" if action == "check_in" else "checked out"
     message = f"{employee_name} has {action_text} on {date}"
     
-    # Get all admin users
-    try:
-        admin_users = db.query(User).filter(User.role == "Admin").all()
-        
-        for admin in admin_users:
-            # Try to push via WebSocket
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                pushed = loop.run_until_complete(push_update(
-                    user_id=admin.id,
-                    update_type="attendance_updated",
-                    payload={
-                        "attendance_id": attendance_id,
-                        "employee_id": user_id,
-                        "employee_name": employee_name,
-                        "date": date,
-                        "action": action,
-                        "status": status,
-                        "message": message
-                    }
-                ))
-                loop.close()
-                
-                if pushed:
-                    logger.info(f"Pushed attendance_updated update via WebSocket to admin {admin.id}")
-            except Exception as e:
-                logger.error(f"Failed to push WebSocket update to admin {admin.id}: {str(e)}", exc_info=True)
-        
-        logger.info(f"Attendance update pushed to {len(admin_users)} admins")
-    except Exception as e:
-        logger.error(f"Failed to notify admins about attendance update: {str(e)}", exc_info=True)
+    # Push to all connected admins through their role channel
+    push_gateway.submit([(role_channel("Admin"), "attendance_updated", {
+        "attendance_id": attendance_id,
+        "employee_id": user_id,
+        "employee_name": employee_name,
+        "date": date,
+        "action": action,
+        "status": status,
+        "message": message
+    })])
+    
+    logger.info(f"Attendance update pushed to admins for user {user_id}")
 
 
 
@@ -407,7 +443,8 @@ def register_notification_handlers() -> None:
     
     This function should be called once during application initialization
     to register all notification handlers with the event dispatcher.
-    Handlers expect a 'db' key in the event payload containing the database session.
+    Handlers expect a 'db' key in the event payload containing the database session,
+    which the event dispatcher provides.
     
     Requirements: 27.1, 27.2, 27.3, 27.4, 27.5
     """
@@ -420,9 +457,9 @@ def register_notification_handlers() -> None:
     )
     
     # Register handlers
-    register_handler(EVENT_LEAVE_APPROVED, handle_leave_approved)
-    register_handler(EVENT_LEAVE_REJECTED, handle_leave_rejected)
-    register_handler(EVENT_LEAVE_REQUESTED, handle_leave_requested)
-    register_handler(EVENT_ATTENDANCE_UPDATED, handle_attendance_updated)
+    register_handler(EVENT_LEAVE_APPROVED, handle_leave_approved, with_session=True)
+    register_handler(EVENT_LEAVE_REJECTED, handle_leave_rejected, with_session=True)
+    register_handler(EVENT_LEAVE_REQUESTED, handle_leave_requested, with_session=True)
+    register_handler(EVENT_ATTENDANCE_UPDATED, handle_attendance_updated, with_session=True)
     
     logger.info("Notification handlers registered successfully")
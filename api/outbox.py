@@ -0,0 +1,324 @@
+"""Transactional outbox for domain events.
+
+dispatch_event() runs after the business change has been committed, so a
+crash in between loses the event. With EVENT_OUTBOX_ENABLED, write paths
+also call record_event() before committing: the event is stored in the
+event_outbox table in the same transaction as the change, and exists if
+and only if the change does.
+
+A relay delivers recorded events to the registered (non-inline) handlers.
+It claims pending rows in batches with SELECT ... FOR UPDATE SKIP LOCKED,
+so relays in several API workers share the work without delivering a row
+twice, and marks them processed in the same transaction. A relay that dies
+mid-batch releases its locks without marking the rows, and another relay
+delivers them again: delivery is at-least-once, so handlers must tolerate
+the occasional duplicate.
+
+A failed delivery is retried with exponential backoff: the row is not
+claimed again until its next_attempt_at, which doubles from
+EVENT_OUTBOX_RETRY_SECONDS after each failure.
+
+The relay runs as a background thread in each API process, woken right
+after each dispatch and otherwise polling every EVENT_OUTBOX_POLL_SECONDS.
+It can also be run on its own with `python -m api.outbox`.
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Select
+
+from api.events import EVENT_OUTBOX_ENABLED, deliver_queued_handlers, set_outbox_wakeup
+from api.models import EventOutbox
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Relay configuration from environment variables
+EVENT_OUTBOX_BATCH_SIZE = int(os.getenv("EVENT_OUTBOX_BATCH_SIZE", "100"))
+EVENT_OUTBOX_POLL_SECONDS = float(os.getenv("EVENT_OUTBOX_POLL_SECONDS", "1"))
+EVENT_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EVENT_OUTBOX_MAX_ATTEMPTS", "5"))
+EVENT_OUTBOX_RETRY_SECONDS = float(os.getenv("EVENT_OUTBOX_RETRY_SECONDS", "5"))
+EVENT_OUTBOX_RETENTION_HOURS = float(os.getenv("EVENT_OUTBOX_RETENTION_HOURS", "24"))
+
+# How often the relay deletes processed rows past the retention period
+PURGE_INTERVAL_SECONDS = 600
+
+
+def record_event(db: Session, event_type: str, payload: dict) -> Optional[EventOutbox]:
+    """
+    Record an event in the outbox as part of the session's transaction.
+
+    Call before committing the change behind the event; nothing is recorded
+    unless the outbox is enabled. The payload must be JSON-serializable.
+
+    Args:
+        db: Database session holding the business change
+        event_type: The type of event
+        payload: Event payload (without a database session)
+
+    Returns:
+        The pending EventOutbox row, or None if the outbox is disabled
+    """
+    if not EVENT_OUTBOX_ENABLED:
+        return None
+
+    row = EventOutbox(
+        event_type=event_type,
+        payload=payload,
+        created_at=datetime.utcnow(),
+        attempts=0
+    )
+    db.add(row)
+    return row
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Get how long to wait before retrying an event.
+
+    Args:
+        attempts: Failed deliveries so far (at least 1)
+
+    Returns:
+        EVENT_OUTBOX_RETRY_SECONDS, doubled for each failure after the first
+    """
+    return timedelta(seconds=EVENT_OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1))
+
+
+def build_claim_statement(batch_size: int = EVENT_OUTBOX_BATCH_SIZE, now: Optional[datetime] = None) -> Select:
+    """
+    Build the statement locking a batch of pending events.
+
+    Rows locked by another relay are skipped rather than waited for
+    (FOR UPDATE SKIP LOCKED; SQLite ignores the locking clause). The locks
+    are held until the claiming transaction ends. Rows still waiting out a
+    retry backoff are not claimed.
+
+    Args:
+        batch_size: Maximum number of rows to claim
+        now: Current time (default: utcnow)
+
+    Returns:
+        SELECT statement for the oldest pending EventOutbox rows due for delivery
+    """
+    if now is None:
+        now = datetime.utcnow()
+
+    return (
+        select(EventOutbox)
+        .where(
+            EventOutbox.processed_at.is_(None),
+            or_(EventOutbox.next_attempt_at.is_(None), EventOutbox.next_attempt_at <= now)
+        )
+        .order_by(EventOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def claim_pending_events(db: Session, batch_size: int = EVENT_OUTBOX_BATCH_SIZE) -> List[EventOutbox]:
+    """
+    Lock a batch of pending events for delivery.
+
+    Args:
+        db: Database session
+        batch_size: Maximum number of rows to claim
+
+    Returns:
+        Claimed rows, oldest first
+    """
+    return list(db.scalars(build_claim_statement(batch_size)).all())
+
+
+def relay_batch(
+    session_factory: Optional[Callable[[], Session]] = None,
+    batch_size: int = EVENT_OUTBOX_BATCH_SIZE
+) -> int:
+    """
+    Claim, deliver and mark processed one batch of pending events.
+
+    A row whose delivery fails is left pending until its retry backoff has
+    passed, and marked processed (with its error) after
+    EVENT_OUTBOX_MAX_ATTEMPTS.
+
+    Args:
+        session_factory: Session factory (default: the application's)
+        batch_size: Maximum number of events to deliver
+
+    Returns:
+        Number of events claimed
+    """
+    if session_factory is None:
+        from api.database import get_session_factory
+        session_factory = get_session_factory()
+
+    db = session_factory()
+    try:
+        rows = claim_pending_events(db, batch_size)
+
+        for row in rows:
+            try:
+                deliver_queued_handlers(row.event_type, row.payload)
+                row.processed_at = datetime.utcnow()
+            except Exception as e:
+                row.attempts += 1
+                row.last_error = str(e)[:1000]
+                if row.attempts >= EVENT_OUTBOX_MAX_ATTEMPTS:
+                    row.processed_at = datetime.utcnow()
+                    logger.error(f"Giving up on outbox event {row.id} ({row.event_type}) after {row.attempts} attempts")
+                else:
+                    row.next_attempt_at = datetime.utcnow() + retry_delay(row.attempts)
+                    logger.warning(f"Failed to deliver outbox event {row.id} ({row.event_type}): {str(e)}")
+
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def purge_processed_events(
+    session_factory: Optional[Callable[[], Session]] = None,
+    retention_hours: float = EVENT_OUTBOX_RETENTION_HOURS
+) -> int:
+    """
+    Delete processed events older than the retention period.
+
+    Args:
+        session_factory: Session factory (default: the application's)
+        retention_hours: Hours to keep processed events for
+
+    Returns:
+        Number of rows deleted
+    """
+    if session_factory is None:
+        from api.database import get_session_factory
+        session_factory = get_session_factory()
+
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+
+    db = session_factory()
+    try:
+        deleted = db.query(EventOutbox).filter(
+            EventOutbox.processed_at.isnot(None),
+            EventOutbox.processed_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class OutboxRelay:
+    """Background thread relaying outbox events to their handlers."""
+
+    def __init__(
+        self,
+        session_factory: Optional[sessionmaker] = None,
+        batch_size: int = EVENT_OUTBOX_BATCH_SIZE,
+        poll_seconds: float = EVENT_OUTBOX_POLL_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_purge = 0.0
+
+    def start(self) -> None:
+        """Start the relay thread and have dispatches wake it."""
+        if self._thread is not None:
+            return
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+        set_outbox_wakeup(self.wake)
+        logger.info("Outbox relay started")
+
+    def wake(self) -> None:
+        """Ask the relay to look for pending events now."""
+        self._wakeup.set()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the relay thread after delivering the events already pending.
+
+        Args:
+            timeout: Maximum seconds to wait for the thread
+        """
+        if self._thread is None:
+            return
+
+        set_outbox_wakeup(None)
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info("Outbox relay stopped")
+
+    def run_until_empty(self) -> int:
+        """
+        Deliver pending events until none are left.
+
+        Returns:
+            Number of events claimed
+        """
+        total = 0
+        while True:
+            claimed = relay_batch(self.session_factory, self.batch_size)
+            total += claimed
+            if claimed < self.batch_size:
+                return total
+
+    def _run(self) -> None:
+        """Relay events until stopped, then drain what is pending."""
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+
+            try:
+                self.run_until_empty()
+
+                if time.monotonic() - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                    self._last_purge = time.monotonic()
+                    purge_processed_events(self.session_factory)
+            except Exception as e:
+                logger.error(f"Outbox relay failed: {str(e)}", exc_info=True)
+                # Back off instead of spinning on a failing database
+                self._stopping.wait(self.poll_seconds)
+
+        try:
+            self.run_until_empty()
+        except Exception as e:
+            logger.error(f"Outbox relay failed to drain on shutdown: {str(e)}", exc_info=True)
+
+
+# Process-wide relay started with the application when the outbox is enabled
+outbox_relay = OutboxRelay()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not EVENT_OUTBOX_ENABLED:
+        logger.warning("EVENT_OUTBOX_ENABLED is not set; only previously recorded events will be relayed")
+
+    relay = OutboxRelay()
+    relay.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        relay.stop()
@@ -0,0 +1,192 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+OFFSET pagination makes the database walk and discard every row before the
+requested page, so deep pages get linearly slower. Keyset pagination
+instead remembers the sort key of the last row returned, e.g.
+(created_at, id), and asks for rows strictly after it, which an index can
+seek to directly.
+
+List endpoints accept an opaque `cursor` taken from a previous response's
+`next_cursor`. Without a cursor they keep their page/page_size behaviour,
+and every response carries a `next_cursor` for switching to cursor mode.
+"""
+import json
+import base64
+import binascii
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+# Key column values are encoded according to their Python type
+_DECODERS = {
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    int: int,
+    str: str,
+}
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of a row as an opaque cursor.
+
+    Args:
+        values: Sort key values, in key column order
+
+    Returns:
+        URL-safe cursor string
+    """
+    encoded = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(encoded, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key_columns: Sequence[Any]) -> Tuple[Any, ...]:
+    """
+    Decode a cursor into sort key values for the given key columns.
+
+    Args:
+        cursor: Cursor string from a previous response
+        key_columns: Columns the list is ordered by
+
+    Returns:
+        Tuple of sort key values
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+        if not isinstance(values, list) or len(values) != len(key_columns):
+            raise ValueError("cursor does not match the sort key")
+
+        return tuple(
+            _DECODERS[column.type.python_type](value)
+            for column, value in zip(key_columns, values)
+        )
+    except (ValueError, TypeError, KeyError, UnicodeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def wants_total(include_total: Optional[bool], cursor: Optional[str]) -> bool:
+    """
+    Decide whether a list response should include the total count.
+
+    The count scans every matching row, so by default it is only run in
+    page mode; cursor mode skips it unless explicitly requested.
+
+    Args:
+        include_total: Explicit choice from the request, if any
+        cursor: Cursor from the request, if any
+
+    Returns:
+        True if the total count should be computed
+    """
+    if include_total is None:
+        return cursor is None
+    return include_total
+
+
+def build_page_query(
+    query: Any,
+    key_columns: Sequence[Any],
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    descending: bool = True
+) -> Any:
+    """
+    Order and limit a Query or Select for one page.
+
+    With a cursor, rows after the cursor's sort key are selected; otherwise
+    the page is selected by OFFSET. One extra row is fetched so that
+    finish_page() can tell whether another page exists.
+
+    Args:
+        query: ORM Query or Select statement
+        key_columns: Columns giving a unique ordering, e.g. (created_at, id)
+        page: Page number for OFFSET mode (1-indexed)
+        page_size: Number of rows per page
+        cursor: Cursor from a previous response, if any
+        descending: Whether the list is ordered newest first
+
+    Returns:
+        Query or Select limited to page_size + 1 rows
+    """
+    if cursor:
+        key = tuple_(*key_columns)
+        after = decode_cursor(cursor, key_columns)
+        query = query.filter(key < after if descending else key > after)
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in key_columns])
+
+    if not cursor:
+        query = query.offset((page - 1) * page_size)
+
+    return query.limit(page_size + 1)
+
+
+def finish_page(
+    rows: List[Any],
+    page_size: int,
+    row_key: Callable[[Any], Sequence[Any]]
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim the extra row fetched by build_page_query() and build the next cursor.
+
+    Args:
+        rows: Rows returned by the page query
+        page_size: Number of rows per page
+        row_key: Returns a row's sort key values, in key column order
+
+    Returns:
+        Tuple of (rows for this page, cursor for the next page or None)
+    """
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    return rows, encode_cursor(row_key(rows[-1]))
+
+
+def paginate(
+    query: Any,
+    key_columns: Sequence[Any],
+    row_key: Callable[[Any], Sequence[Any]],
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of an ORM Query.
+
+    Args:
+        query: ORM Query, filtered but not ordered
+        key_columns: Columns giving a unique ordering, e.g. (created_at, id)
+        row_key: Returns a row's sort key values, in key column order
+        page: Page number for OFFSET mode (1-indexed)
+        page_size: Number of rows per page
+        cursor: Cursor from a previous response, if any
+        descending: Whether the list is ordered newest first
+
+    Returns:
+        Tuple of (rows for this page, cursor for the next page or None)
+
+    Example:
+        leave_requests, next_cursor = paginate(
+            query,
+            (LeaveRequest.created_at, LeaveRequest.id),
+            lambda leave_req: (leave_req.created_at, leave_req.id),
+            page, page_size, cursor
+        )
+    """
+    page_query = build_page_query(query, key_columns, page, page_size, cursor, descending)
+    return finish_page(page_query.all(), page_size, row_key)
@@ -0,0 +1,292 @@
+"""Brokers carrying WebSocket pushes between API workers.
+
+Each worker only holds the WebSocket connections it accepted, so a push
+produced while handling a request must reach every worker to find the
+recipient's sockets. The push gateway publishes each batch of pushes to a
+broker, and every worker subscribes to the broker and delivers what it
+receives to its local connections.
+
+Two backends are available (PUSH_BROKER):
+
+- "memory" (default): publishing delivers straight to this worker's
+  connections. Enough for a single worker.
+- "postgres": batches are sent with pg_notify() on PUSH_BROKER_CHANNEL and
+  every worker LISTENs on it from a background thread. Requires psycopg2
+  and a PostgreSQL DATABASE_URL.
+"""
+import os
+import json
+import select
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, List, Optional, Sequence
+
+from sqlalchemy.engine import make_url
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Broker configuration from environment variables
+PUSH_BROKER = os.getenv("PUSH_BROKER", "memory").lower()
+PUSH_BROKER_CHANNEL = os.getenv("PUSH_BROKER_CHANNEL", "dayflow_push")
+
+BROKER_MEMORY = "memory"
+BROKER_POSTGRES = "postgres"
+
+SUPPORTED_BROKERS = {BROKER_MEMORY, BROKER_POSTGRES}
+
+# pg_notify() payloads must stay below 8000 bytes
+PG_NOTIFY_MAX_BYTES = 7900
+
+# Seconds between listener wakeups to check for shutdown, and before reconnecting
+LISTEN_POLL_SECONDS = 1.0
+RECONNECT_SECONDS = 2.0
+
+# Receives a batch of pushes on this worker; returns what it scheduled, if anything
+Deliver = Callable[[List[Any]], Any]
+
+
+class PushBroker(ABC):
+    """Transport for push batches between workers."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    @abstractmethod
+    def start(self, deliver: Deliver) -> None:
+        """
+        Subscribe this worker, delivering received batches with `deliver`.
+
+        Safe to call repeatedly; only the first call subscribes.
+
+        Args:
+            deliver: Callable delivering a batch to local connections
+        """
+
+    @abstractmethod
+    def publish(self, pushes: Sequence[Any]) -> Any:
+        """
+        Publish a batch of pushes to every subscribed worker.
+
+        Args:
+            pushes: JSON-serializable pushes
+
+        Returns:
+            Whatever local delivery scheduled, if it happened synchronously
+        """
+
+    @abstractmethod
+    def stop(self) -> None:
+        """Unsubscribe and release connections."""
+
+
+class InMemoryBroker(PushBroker):
+    """Deliver published batches to this worker only."""
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def stop(self) -> None:
+        self._deliver = None
+
+    def publish(self, pushes: Sequence[Any]) -> Any:
+        if self._deliver is None:
+            return None
+        return self._deliver(list(pushes))
+
+
+def split_notifications(pushes: Sequence[Any], max_bytes: int = PG_NOTIFY_MAX_BYTES) -> List[str]:
+    """
+    Serialize a batch into as few notification payloads as fit the limit.
+
+    Args:
+        pushes: JSON-serializable pushes
+        max_bytes: Largest payload size in bytes
+
+    Returns:
+        JSON arrays of pushes, each at most max_bytes long
+
+    Raises:
+        ValueError: If a single push does not fit in one notification
+    """
+    payloads = []
+    current: List[str] = []
+    size = 2
+
+    for push in pushes:
+        encoded = json.dumps(push, separators=(",", ":"))
+        encoded_size = len(encoded.encode("utf-8"))
+
+        if encoded_size + 2 > max_bytes:
+            raise ValueError(f"Push of {encoded_size} bytes exceeds the notification limit")
+
+        if current and size + encoded_size + 1 > max_bytes:
+            payloads.append(f"[{','.join(current)}]")
+            current, size = [], 2
+
+        size += encoded_size + (1 if current else 0)
+        current.append(encoded)
+
+    if current:
+        payloads.append(f"[{','.join(current)}]")
+
+    return payloads
+
+
+class PostgresBroker(PushBroker):
+    """Fan batches out to all workers with PostgreSQL LISTEN/NOTIFY."""
+
+    def __init__(self, database_url: str, channel: str = PUSH_BROKER_CHANNEL):
+        super().__init__()
+        # psycopg2 takes a libpq URL, without SQLAlchemy's driver suffix
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self._publish_connection = None
+        self._publish_lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+        if self._listener is not None:
+            return
+
+        self._stopping.clear()
+        self._listener = threading.Thread(target=self._listen, name="push-broker-listener", daemon=True)
+        self._listener.start()
+        logger.info(f"Listening for pushes on PostgreSQL channel '{self.channel}'")
+
+    def publish(self, pushes: Sequence[Any]) -> None:
+        if not pushes:
+            return None
+
+        try:
+            payloads = split_notifications(pushes)
+        except ValueError as e:
+            logger.error(f"Push batch not published: {str(e)}")
+            return None
+
+        with self._publish_lock:
+            # Retry once on a fresh connection if the current one has dropped
+            for attempt in range(2):
+                try:
+                    if self._publish_connection is None or self._publish_connection.closed:
+                        self._publish_connection = self._connect()
+                    with self._publish_connection.cursor() as cursor:
+                        for payload in payloads:
+                            cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                    return None
+                except Exception as e:
+                    self._close_publish_connection()
+                    if attempt:
+                        logger.error(f"Failed to publish pushes: {str(e)}", exc_info=True)
+
+        return None
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._listener is not None:
+            self._listener.join(LISTEN_POLL_SECONDS * 2)
+            self._listener = None
+
+        with self._publish_lock:
+            self._close_publish_connection()
+
+    def receive(self, payload: str) -> None:
+        """
+        Deliver one notification payload to this worker's connections.
+
+        Args:
+            payload: JSON array of pushes
+        """
+        if self._deliver is None:
+            return
+
+        try:
+            pushes = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed push notification")
+            return
+
+        self._deliver(pushes)
+
+    def _connect(self):
+        """Open an autocommit psycopg2 connection."""
+        import psycopg2
+
+        connection = psycopg2.connect(self.dsn)
+        connection.autocommit = True
+        return connection
+
+    def _close_publish_connection(self) -> None:
+        if self._publish_connection is not None:
+            try:
+                self._publish_connection.close()
+            except Exception:
+                pass
+            self._publish_connection = None
+
+    def _listen(self) -> None:
+        """LISTEN on the channel until stopped, reconnecting after failures."""
+        from psycopg2 import sql
+
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+
+                while not self._stopping.is_set():
+                    readable, _, _ = select.select([connection], [], [], LISTEN_POLL_SECONDS)
+                    if not readable:
+                        continue
+
+                    connection.poll()
+                    while connection.notifies:
+                        self.receive(connection.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Push broker listener failed: {str(e)}", exc_info=True)
+                self._stopping.wait(RECONNECT_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+
+def create_push_broker(
+    broker: str = PUSH_BROKER,
+    database_url: Optional[str] = None,
+    channel: str = PUSH_BROKER_CHANNEL
+) -> PushBroker:
+    """
+    Create the push broker selected by PUSH_BROKER.
+
+    Args:
+        broker: "memory" or "postgres"
+        database_url: Database URL for the postgres broker (default: DATABASE_URL)
+        channel: PostgreSQL notification channel for the postgres broker
+
+    Returns:
+        Unstarted push broker
+
+    Raises:
+        ValueError: If the broker is unsupported or has no PostgreSQL URL
+    """
+    if broker not in SUPPORTED_BROKERS:
+        raise ValueError(
+            f"Unsupported PUSH_BROKER '{broker}'. "
+            f"Must be one of: {', '.join(sorted(SUPPORTED_BROKERS))}"
+        )
+
+    if broker == BROKER_MEMORY:
+        return InMemoryBroker()
+
+    database_url = database_url or os.getenv("DATABASE_URL", "")
+    if not database_url.startswith("postgres"):
+        raise ValueError("PUSH_BROKER=postgres requires a PostgreSQL DATABASE_URL")
+
+    return PostgresBroker(database_url, channel)
@@ -0,0 +1,82 @@
+"""Wire protocols for WebSocket pushes.
+
+Clients choose a protocol in their auth message ("protocol"):
+
+- "json" (default): text frames of JSON.
+- "msgpack": binary frames of MessagePack, smaller and cheaper to decode.
+  Only offered when the optional msgpack package is installed; otherwise
+  the connection falls back to JSON.
+
+Frame compression (permessage-deflate) is not configured here: uvicorn
+negotiates it with the browser during the HTTP upgrade (on by default, see
+its --ws-per-message-deflate option) and it applies to either protocol.
+
+A push is encoded at most once per protocol however many connections it
+fans out to.
+"""
+import json
+from typing import Any, Dict, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency
+    msgpack = None
+
+PROTOCOL_JSON = "json"
+PROTOCOL_MSGPACK = "msgpack"
+
+
+def available_protocols() -> list:
+    """Protocols this server can speak, preferred first."""
+    if msgpack is not None:
+        return [PROTOCOL_MSGPACK, PROTOCOL_JSON]
+    return [PROTOCOL_JSON]
+
+
+def negotiate_protocol(requested: Optional[Any]) -> str:
+    """
+    Pick the protocol for a connection.
+
+    Args:
+        requested: The protocol named in the auth message, if any
+
+    Returns:
+        The requested protocol if available, otherwise "json"
+    """
+    if requested in available_protocols():
+        return requested
+    return PROTOCOL_JSON
+
+
+class PushMessage:
+    """
+    A message pushed to WebSocket connections.
+
+    JSON is encoded up front, which also rejects unserializable payloads
+    before anything is queued; other encodings are made on first use and
+    reused for every connection after.
+    """
+
+    __slots__ = ("data", "_encoded")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._encoded: Dict[str, Union[str, bytes]] = {PROTOCOL_JSON: json.dumps(data)}
+
+    def encode(self, protocol: str = PROTOCOL_JSON) -> Union[str, bytes]:
+        """
+        Get the message in a protocol's encoding.
+
+        Args:
+            protocol: "json" or "msgpack"
+
+        Returns:
+            str for JSON (a text frame), bytes for MessagePack (a binary frame)
+        """
+        encoded = self._encoded.get(protocol)
+        if encoded is None:
+            if protocol != PROTOCOL_MSGPACK or msgpack is None:
+                raise ValueError(f"Unsupported push protocol '{protocol}'")
+            encoded = msgpack.packb(self.data, use_bin_type=True)
+            self._encoded[protocol] = encoded
+        return encoded
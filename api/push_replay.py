@@ -0,0 +1,125 @@
+"""Replay buffer for WebSocket pushes.
+
+Every push is numbered with a sequence id, monotonic within this worker,
+and kept in a bounded ring buffer per channel (user:<id>, role:<role>,
+dept:<name>). A client that reconnects sends the last sequence id it saw,
+and is replayed the messages it missed from the buffers of its channels
+instead of refetching all notifications.
+
+Sequence ids are only meaningful within one worker's stream: clients also
+send the stream id they were given, and a client resuming another stream
+(a restart, or a different worker) or one whose messages have already
+been dropped from the buffers is told to refetch instead.
+"""
+import os
+import uuid
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Replay configuration from environment variables
+WS_REPLAY_BUFFER_SIZE = int(os.getenv("WS_REPLAY_BUFFER_SIZE", "100"))
+WS_REPLAY_MAX_CHANNELS = int(os.getenv("WS_REPLAY_MAX_CHANNELS", "10000"))
+
+
+class ReplayBuffer:
+    """Per-channel ring buffers of recent push messages."""
+
+    def __init__(self, size: int = WS_REPLAY_BUFFER_SIZE, max_channels: int = WS_REPLAY_MAX_CHANNELS):
+        self.size = size
+        self.max_channels = max_channels
+        self.stream_id = uuid.uuid4().hex
+        self._seq = 0
+        # Least recently pushed channels first
+        self._buffers: "OrderedDict[str, Deque[Tuple[int, Any]]]" = OrderedDict()
+        # Highest sequence id dropped from each channel's buffer
+        self._dropped_through: Dict[str, int] = {}
+        # Highest sequence id held by any channel dropped as least recently used
+        self._evicted_through = 0
+        self._lock = threading.Lock()
+
+    @property
+    def seq(self) -> int:
+        """The latest sequence id issued."""
+        return self._seq
+
+    def record(self, channel: str, build_message: Callable[[int], Any]) -> Any:
+        """
+        Number a message and keep it in a channel's buffer.
+
+        Args:
+            channel: Channel the message is pushed to
+            build_message: Builds the message for a sequence id
+
+        Returns:
+            The message
+        """
+        with self._lock:
+            self._seq += 1
+            message = build_message(self._seq)
+
+            if self.size <= 0:
+                self._dropped_through[channel] = self._seq
+                return message
+
+            buffer = self._buffers.get(channel)
+            if buffer is None:
+                buffer = deque(maxlen=self.size)
+                self._buffers[channel] = buffer
+                self._evict_channels()
+            else:
+                self._buffers.move_to_end(channel)
+
+            if len(buffer) == self.size:
+                self._dropped_through[channel] = buffer[0][0]
+            buffer.append((self._seq, message))
+
+            return message
+
+    def since(self, channels: Iterable[str], last_seq: int, stream_id: Optional[str] = None) -> Optional[List[Any]]:
+        """
+        Get the messages pushed to any of the channels after a sequence id.
+
+        Args:
+            channels: The connection's channels
+            last_seq: Last sequence id the client received
+            stream_id: Stream the sequence id belongs to (default: this one)
+
+        Returns:
+            Missed messages in sequence order, or None if some may have been
+            lost and the client must refetch
+        """
+        with self._lock:
+            if (stream_id is not None and stream_id != self.stream_id) or last_seq > self._seq:
+                return None
+
+            missed = []
+            for channel in channels:
+                if self._dropped_through.get(channel, 0) > last_seq:
+                    return None
+
+                buffer = self._buffers.get(channel)
+                if buffer is None:
+                    if self._evicted_through > last_seq:
+                        return None
+                    continue
+
+                missed.extend(entry for entry in buffer if entry[0] > last_seq)
+
+            missed.sort(key=lambda entry: entry[0])
+            return [message for _, message in missed]
+
+    def clear(self) -> None:
+        """Drop all buffered messages."""
+        with self._lock:
+            self._buffers.clear()
+            self._dropped_through.clear()
+            self._evicted_through = 0
+
+    def _evict_channels(self) -> None:
+        """Drop the least recently pushed channels beyond max_channels."""
+        while len(self._buffers) > self.max_channels:
+            channel, buffer = self._buffers.popitem(last=False)
+            self._dropped_through.pop(channel, None)
+            if buffer:
+                self._evicted_through = max(self._evicted_through, buffer[-1][0])
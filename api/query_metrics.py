@@ -0,0 +1,221 @@
+"""Per-request database query instrumentation.
+
+SQLAlchemy cursor events feed a request-scoped collector that counts SQL
+statements and time spent in the database for each request. Statements
+executed repeatedly with the same shape inside one request are flagged as
+likely N+1 patterns. Totals are aggregated per route so admins can see
+which endpoints make the most round trips.
+"""
+import os
+import re
+import time
+import logging
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Return query counts in response headers (opt-in)
+DB_QUERY_HEADERS = os.getenv("DB_QUERY_HEADERS", "false").lower() == "true"
+
+# Number of executions of one statement shape within a request that is
+# reported as a likely N+1 pattern
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+
+# Response header names
+HEADER_QUERY_COUNT = "X-DB-Query-Count"
+HEADER_QUERY_TIME = "X-DB-Query-Time-Ms"
+HEADER_N_PLUS_ONE = "X-DB-N-Plus-One"
+
+# Route key for requests that matched no route, so that arbitrary request
+# paths (scanners, typos) cannot grow the statistics without bound
+UNMATCHED_ROUTE = "<unmatched>"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a SQL statement to its shape.
+
+    Statements are already parameterized by SQLAlchemy, so collapsing
+    whitespace is enough for identical queries to compare equal.
+    """
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryCollector:
+    """Collects the SQL statements executed while handling one request."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.statement_count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        """Record one executed statement and its duration in seconds."""
+        self.statement_count += 1
+        self.total_time += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def likely_n_plus_one(self, threshold: int = DB_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """
+        Get statement shapes repeated often enough to look like N+1 queries.
+
+        Returns:
+            List of (statement shape, execution count), most repeated first
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    @property
+    def total_time_ms(self) -> float:
+        """Total database time in milliseconds."""
+        return round(self.total_time * 1000, 2)
+
+
+# Collector for the request being handled in the current context
+_current_collector: ContextVar[Optional[QueryCollector]] = ContextVar("query_collector", default=None)
+
+# Aggregated statistics per route
+_route_stats: Dict[str, Dict[str, float]] = {}
+_route_stats_lock = threading.Lock()
+
+_listeners_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Remember when a statement started executing."""
+    conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record a finished statement with the current request's collector."""
+    start_times = conn.info.get("query_start_times")
+    if not start_times:
+        return
+
+    duration = time.perf_counter() - start_times.pop()
+
+    collector = _current_collector.get()
+    if collector is not None:
+        collector.record(statement, duration)
+
+
+def install_query_listeners() -> None:
+    """
+    Attach the cursor event listeners to all engines.
+
+    Listeners are registered on the Engine class, so they cover the primary,
+    replica and asyncio engines alike. Safe to call more than once.
+    """
+    global _listeners_installed
+
+    if _listeners_installed:
+        return
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _listeners_installed = True
+    logger.info("Installed database query instrumentation")
+
+
+def start_collection(route: str) -> Tuple[QueryCollector, object]:
+    """
+    Start collecting queries for a request.
+
+    Args:
+        route: Route path the request is handled by
+
+    Returns:
+        Tuple of (collector, token to pass to finish_collection)
+    """
+    collector = QueryCollector(route)
+    token = _current_collector.set(collector)
+    return collector, token
+
+
+def finish_collection(collector: QueryCollector, token: object, route: Optional[str] = None) -> None:
+    """
+    Stop collecting queries for a request and aggregate its totals.
+
+    Args:
+        collector: Collector returned by start_collection
+        token: Token returned by start_collection
+        route: Matched route template, if known after routing
+    """
+    _current_collector.reset(token)
+
+    if route:
+        collector.route = route
+
+    suspects = collector.likely_n_plus_one()
+    for shape, count in suspects:
+        logger.warning(
+            f"Possible N+1 query pattern on {collector.route}: "
+            f"statement executed {count} times in one request: {shape[:200]}"
+        )
+
+    with _route_stats_lock:
+        stats = _route_stats.setdefault(collector.route, {
+            "requests": 0,
+            "statements": 0,
+            "total_time_ms": 0.0,
+            "max_statements": 0,
+            "n_plus_one_requests": 0,
+        })
+        stats["requests"] += 1
+        stats["statements"] += collector.statement_count
+        stats["total_time_ms"] = round(stats["total_time_ms"] + collector.total_time_ms, 2)
+        stats["max_statements"] = max(stats["max_statements"], collector.statement_count)
+        if suspects:
+            stats["n_plus_one_requests"] += 1
+
+
+def get_current_collector() -> Optional[QueryCollector]:
+    """Get the collector for the request being handled, if any."""
+    return _current_collector.get()
+
+
+def get_route_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Get aggregated query statistics per route.
+
+    Returns:
+        Dictionary mapping route paths to request, statement and time totals
+    """
+    with _route_stats_lock:
+        return {route: dict(stats) for route, stats in _route_stats.items()}
+
+
+def clear_route_stats() -> None:
+    """
+    Clear aggregated route statistics.
+
+    This is primarily useful for testing to ensure a clean state
+    between test runs.
+    """
+    with _route_stats_lock:
+        _route_stats.clear()
+
+
+def build_response_headers(collector: QueryCollector) -> Dict[str, str]:
+    """
+    Build the opt-in query count response headers for a request.
+
+    Args:
+        collector: Collector for the finished request
+
+    Returns:
+        Dictionary of header names to values
+    """
+    return {
+        HEADER_QUERY_COUNT: str(collector.statement_count),
+        HEADER_QUERY_TIME: str(collector.total_time_ms),
+        HEADER_N_PLUS_ONE: str(len(collector.likely_n_plus_one())),
+    }
@@ -4,6 +4,8 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from api.models import User, RoleChangeLog
+from api.events import dispatch_event, EVENT_ROLE_CHANGED
+from api.outbox import record_event
 
 
 def update_user_role(
@@ -16,7 +18,7 @@ def update_user_role(
     Update a user's role and create an audit log entry.
     
     Validates the new role, prevents self-role-change, updates the user's role,
-    and creates an audit log entry.
+    creates an audit log entry, and dispatches a role_changed event.
     
     Args:
         user_id: ID of the user whose role is being changed
@@ -80,7 +82,15 @@ def update_user_role(
         db=db
     )
     
+    event_payload = {
+        "user_id": user_id,
+        "old_role": old_role,
+        "new_role": new_role,
+        "changed_by": admin_id
+    }
+    
     try:
+        record_event(db, EVENT_ROLE_CHANGED, event_payload)
         db.commit()
         db.refresh(user)
     except Exception as e:
@@ -90,6 +100,8 @@ def update_user_role(
             detail="Failed to update user role"
         )
     
+    dispatch_event(EVENT_ROLE_CHANGED, event_payload)
+    
     return user
 
 
@@ -118,9 +118,10 @@ class LeaveRequestCreateResponse(BaseModel):
 class LeaveRequestListResponse(BaseModel):
     """Response model for leave request list with pagination."""
     leave_requests: list[LeaveRequestResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class LeaveRequestWithEmployee(BaseModel):
@@ -148,9 +149,10 @@ class LeaveRequestWithEmployee(BaseModel):
 class LeaveRequestAllResponse(BaseModel):
     """Response model for all leave requests with employee details."""
     leave_requests: list[LeaveRequestWithEmployee]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class LeaveReview(BaseModel):
@@ -183,9 +185,10 @@ class EmployeeListItem(BaseModel):
 class EmployeeListResponse(BaseModel):
     """Response model for employee list with pagination."""
     employees: list[EmployeeListItem]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class EmployeeDetailResponse(BaseModel):
@@ -353,6 +356,7 @@ class AdminDashboardResponse(BaseModel):
     stats: AdminDashboardStats
     attendance_overview: AttendanceOverview
     pending_leave_requests: list[LeaveRequestWithEmployee]
+    pending_next_cursor: Optional[str] = None
 
 
 # Feature Flag Schemas
@@ -380,6 +384,52 @@ class FeatureFlagUpdateResponse(BaseModel):
     message: str
 
 
+# Database Diagnostics Schemas
+class PoolStatsResponse(BaseModel):
+    """Response model for database connection pool statistics."""
+    pool_mode: str
+    pool_class: str
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    connections_created: int
+    checkouts: int
+    peak_checked_out: int
+    status: str
+
+
+class PushStatsResponse(BaseModel):
+    """Response model for WebSocket push statistics."""
+    connections: int
+    queued_messages: int
+    messages_sent: int
+    messages_dropped: int
+    evicted_slow: int
+    evicted_timeout: int
+    evicted_error: int
+    evicted_user_limit: int
+    rejected_global_limit: int
+    reaped_idle: int
+
+
+class RouteQueryStats(BaseModel):
+    """SQL statement totals for a single route."""
+    route: str
+    requests: int
+    statements: int
+    total_time_ms: float
+    avg_statements: float
+    max_statements: int
+    n_plus_one_requests: int
+
+
+class QueryStatsResponse(BaseModel):
+    """Response model for per-route database query statistics."""
+    routes: list[RouteQueryStats]
+    n_plus_one_threshold: int
+
+
 
 # Analytics Schemas
 class PeriodStats(BaseModel):
@@ -461,9 +511,10 @@ class NotificationListResponse(BaseModel):
     """Response model for notification list with pagination."""
     notifications: list[NotificationResponse]
     unread_count: int
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class NotificationMarkReadResponse(BaseModel):
@@ -499,6 +550,7 @@ class RoleUpdateResponse(BaseModel):
 class RoleChangeLogListResponse(BaseModel):
     """Response model for role change log list with pagination."""
     changes: list[RoleChangeLogResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
@@ -0,0 +1,183 @@
+"""Slow-query log with EXPLAIN capture.
+
+Statements that run longer than DB_SLOW_QUERY_MS are written as JSON lines
+to a rotating log file with their SQL, the shape of their bound parameters
+(types only, never values), the route that issued them and, on PostgreSQL,
+the planner's EXPLAIN output. DB_SLOW_QUERY_SAMPLE_RATE limits how many
+slow statements are recorded so the log can stay on in production.
+"""
+import os
+import json
+import time
+import random
+import logging
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api.query_metrics import get_current_collector
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Slow-query log configuration from environment variables
+# The log is disabled unless DB_SLOW_QUERY_LOG names a file
+DB_SLOW_QUERY_LOG = os.getenv("DB_SLOW_QUERY_LOG")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+DB_SLOW_QUERY_SAMPLE_RATE = float(os.getenv("DB_SLOW_QUERY_SAMPLE_RATE", "1.0"))
+DB_SLOW_QUERY_EXPLAIN = os.getenv("DB_SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+DB_SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("DB_SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+DB_SLOW_QUERY_LOG_BACKUPS = int(os.getenv("DB_SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# Statements worth asking the planner about
+EXPLAINABLE_PREFIXES = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+# Dedicated logger writing only to the rotating slow-query file
+_slow_query_logger = logging.getLogger("api.slow_queries.records")
+_slow_query_logger.propagate = False
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """
+    Describe bound parameters by type without exposing their values.
+
+    Args:
+        parameters: Parameters as passed to the DBAPI cursor
+        executemany: Whether the statement ran once per parameter set
+
+    Returns:
+        JSON-serializable description of the parameter types
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameter_shape(parameters[0]) if parameters else None
+        return {"executemany": len(parameters), "first": first}
+
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+
+    return type(parameters).__name__
+
+
+def _explain(conn, statement: str, parameters: Any) -> Optional[List[str]]:
+    """
+    Capture the planner's estimated plan for a statement on PostgreSQL.
+
+    Uses a separate DBAPI cursor so the caller's results are untouched.
+    Returns None when the plan cannot be captured.
+    """
+    if conn.dialect.name != "postgresql":
+        return None
+
+    if not statement.lstrip().upper().startswith(EXPLAINABLE_PREFIXES):
+        return None
+
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+    except Exception as e:
+        logger.debug(f"Could not open cursor for EXPLAIN: {e}")
+        return None
+
+    # A savepoint keeps a failed EXPLAIN from aborting the caller's transaction
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE off) {statement}", parameters)
+            plan = [row[0] for row in cursor.fetchall()]
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            logger.debug(f"Could not capture EXPLAIN plan: {e}")
+            return None
+    except Exception as e:
+        logger.debug(f"Could not capture EXPLAIN plan: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Remember when a statement started executing."""
+    conn.info.setdefault("slow_query_start_times", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record the statement if it was slow and selected by sampling."""
+    start_times = conn.info.get("slow_query_start_times")
+    if not start_times:
+        return
+
+    duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+
+    if duration_ms < DB_SLOW_QUERY_MS:
+        return
+
+    if random.random() >= DB_SLOW_QUERY_SAMPLE_RATE:
+        return
+
+    collector = get_current_collector()
+    plan = None
+    if DB_SLOW_QUERY_EXPLAIN and not executemany:
+        plan = _explain(conn, statement, parameters)
+
+    record = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "duration_ms": round(duration_ms, 2),
+        "route": collector.route if collector else None,
+        "statement": statement,
+        "parameters": parameter_shape(parameters, executemany),
+        "plan": plan,
+    }
+
+    _slow_query_logger.warning(json.dumps(record, default=str))
+
+
+def _configure_log_file(path: str) -> None:
+    """Point the slow-query logger at a rotating log file."""
+    for handler in list(_slow_query_logger.handlers):
+        if getattr(handler, "baseFilename", None) == os.path.abspath(path):
+            return
+        # One slow-query log per process; replace a previously configured file
+        _slow_query_logger.removeHandler(handler)
+        handler.close()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=DB_SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=DB_SLOW_QUERY_LOG_BACKUPS
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _slow_query_logger.addHandler(handler)
+    _slow_query_logger.setLevel(logging.WARNING)
+
+
+def install_slow_query_log(target_engine: Engine, log_path: Optional[str] = None) -> bool:
+    """
+    Attach the slow-query recorder to an engine.
+
+    Args:
+        target_engine: Engine to watch (the sync engine of an AsyncEngine)
+        log_path: Log file path (defaults to DB_SLOW_QUERY_LOG)
+
+    Returns:
+        True if the recorder was attached, False if the log is disabled
+    """
+    log_path = log_path or DB_SLOW_QUERY_LOG
+    if not log_path:
+        return False
+
+    _configure_log_file(log_path)
+
+    if not event.contains(target_engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(target_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target_engine, "after_cursor_execute", _after_cursor_execute)
+
+    return True
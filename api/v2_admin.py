@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import Dict, Optional
 
-from api.database import get_db
+from api.database import get_db, get_pool_stats
 from api.auth import require_role
 from api.models import FeatureFlag, RoleChangeLog, User, Profile
 from api.schemas import (
@@ -15,10 +15,18 @@ from api.schemas import (
     RoleUpdateResponse,
     RoleChangeLogListResponse,
     RoleChangeLogResponse,
-    UserResponse
+    UserResponse,
+    PoolStatsResponse,
+    PushStatsResponse,
+    QueryStatsResponse,
+    RouteQueryStats
 )
-from api.feature_flags import get_all_feature_flags
+from api.feature_flags import get_all_feature_flags, notify_feature_flags_changed
 from api.role_management import update_user_role
+from api.db_routing import record_write
+from api.pagination import paginate, wants_total
+from api.query_metrics import get_route_stats, DB_N_PLUS_ONE_THRESHOLD
+from api.websockets import get_push_stats
 from datetime import datetime
 
 
@@ -52,7 +60,8 @@ def update_feature_flag(
     """
     Update a feature flag state (Admin only).
     
-    Enables or disables a specific feature flag.
+    Enables or disables a specific feature flag, and invalidates the flag
+    snapshot of every worker.
     
     Requirements: 32.5
     """
@@ -81,6 +90,9 @@ def update_feature_flag(
             detail="Failed to update feature flag"
         )
     
+    # Gated routes in every worker see the change on their next check
+    notify_feature_flags_changed(feature_name)
+    
     # Build response
     flag_response = FeatureFlagResponse(
         feature_name=feature_flag.feature_name,
@@ -129,6 +141,8 @@ def update_user_role_endpoint(
         admin_id=admin_id,
         db=db
     )
+    record_write(admin_id)
+    record_write(user_id)
     
     # Build response
     user_response = UserResponse(
@@ -150,6 +164,8 @@ def get_role_changes(
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous page"),
+    include_total: Optional[bool] = Query(None, description="Count all matching entries"),
     current_user: dict = Depends(require_role(["Admin"])),
     db: Session = Depends(get_db)
 ):
@@ -162,6 +178,8 @@ def get_role_changes(
         user_id: Optional user ID to filter by
         page: Page number (1-indexed)
         page_size: Number of items per page
+        cursor: Cursor from a previous response; selects the page after it instead of page
+        include_total: Whether to count all matching entries (default: only in page mode)
         current_user: Authenticated admin user
         db: Database session
         
@@ -178,10 +196,14 @@ def get_role_changes(
         query = query.filter(RoleChangeLog.user_id == user_id)
     
     # Get total count
-    total = query.count()
+    total = query.count() if wants_total(include_total, cursor) else None
     
     # Apply pagination and ordering (most recent first)
-    changes = query.order_by(RoleChangeLog.changed_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+    changes, next_cursor = paginate(
+        query, (RoleChangeLog.changed_at, RoleChangeLog.id),
+        lambda change: (change.changed_at, change.id),
+        page, page_size, cursor
+    )
     
     # Build response
     change_responses = [
@@ -200,5 +222,66 @@ def get_role_changes(
         changes=change_responses,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/db/pool-stats", response_model=PoolStatsResponse)
+def get_db_pool_stats(
+    current_user: dict = Depends(require_role(["Admin"]))
+):
+    """
+    Get database connection pool statistics (Admin only).
+    
+    Returns the active pool strategy, current pool gauges, and checkout
+    counters collected since the worker started, for sizing the pool
+    from real traffic.
+    """
+    return PoolStatsResponse(**get_pool_stats())
+
+
+@router.get("/db/query-stats", response_model=QueryStatsResponse)
+def get_db_query_stats(
+    current_user: dict = Depends(require_role(["Admin"]))
+):
+    """
+    Get per-route SQL statement statistics (Admin only).
+    
+    Returns how many statements each route executed and how long they took,
+    ordered by total statements, along with how many requests were flagged
+    as likely N+1 query patterns.
+    """
+    routes = [
+        RouteQueryStats(
+            route=route,
+            requests=stats["requests"],
+            statements=stats["statements"],
+            total_time_ms=stats["total_time_ms"],
+            avg_statements=round(stats["statements"] / stats["requests"], 2) if stats["requests"] else 0.0,
+            max_statements=stats["max_statements"],
+            n_plus_one_requests=stats["n_plus_one_requests"]
+        )
+        for route, stats in get_route_stats().items()
+    ]
+    routes.sort(key=lambda item: item.statements, reverse=True)
+    
+    return QueryStatsResponse(
+        routes=routes,
+        n_plus_one_threshold=DB_N_PLUS_ONE_THRESHOLD
     )
+
+
+@router.get("/ws/push-stats", response_model=PushStatsResponse)
+def get_ws_push_stats(
+    current_user: dict = Depends(require_role(["Admin"]))
+):
+    """
+    Get WebSocket push statistics for this worker (Admin only).
+    
+    Returns the open connections and messages waiting in their send queues,
+    along with counters of sent and dropped messages, of connections
+    evicted for falling behind, timing out, failing to send or exceeding the
+    per-user limit, and of connections refused or reaped as idle.
+    """
+    return PushStatsResponse(**get_push_stats())
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from datetime import date, timedelta
 from typing import Optional, Literal
 
-from api.database import get_db
+from api.db_routing import read_db, ROUTE_ANALYTICS
 from api.auth import require_role
 from api.analytics import (
     get_attendance_trends,
@@ -28,7 +28,7 @@ def get_attendance_analytics(
     employee_id: Optional[int] = Query(None, description="Filter by specific employee"),
     group_by: Literal["day", "week", "month"] = Query("month", description="Period grouping"),
     current_user: dict = Depends(require_role(["Admin"])),
-    db: Session = Depends(get_db)
+    db: Session = Depends(read_db(ROUTE_ANALYTICS))
 ):
     """
     Get attendance trends and statistics.
@@ -71,7 +71,7 @@ def get_leave_analytics(
     end_date: date = Query(..., description="End date for analysis"),
     department: Optional[str] = Query(None, description="Filter by department"),
     current_user: dict = Depends(require_role(["Admin"])),
-    db: Session = Depends(get_db)
+    db: Session = Depends(read_db(ROUTE_ANALYTICS))
 ):
     """
     Get leave usage statistics.
@@ -111,7 +111,7 @@ def get_leave_analytics(
 def get_salary_analytics(
     department: Optional[str] = Query(None, description="Filter by department"),
     current_user: dict = Depends(require_role(["Admin"])),
-    db: Session = Depends(get_db)
+    db: Session = Depends(read_db(ROUTE_ANALYTICS))
 ):
     """
     Get salary distribution and statistics.
@@ -0,0 +1,153 @@
+"""API v2 Dashboard endpoints.
+
+This module provides a live stream of the admin dashboard counters, so open
+dashboards receive small deltas instead of polling the full dashboard.
+
+EventSource cannot send an Authorization header, so the stream also accepts
+a short-lived token in its `token` query parameter, issued by
+POST /api/v2/dashboard/stream-token.
+"""
+import os
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError
+
+from api.auth import create_scoped_token, decode_access_token, get_current_user, require_role
+from api.dashboard_stream import dashboard_broadcaster, format_sse, DASHBOARD_STREAM_KEEPALIVE_SECONDS
+
+# Lifetime of stream tokens; they only need to last until the stream connects
+DASHBOARD_STREAM_TOKEN_SECONDS = int(os.getenv("DASHBOARD_STREAM_TOKEN_SECONDS", "60"))
+
+# Scope of the tokens accepted in the stream's query string
+STREAM_TOKEN_SCOPE = "dashboard_stream"
+
+# Bearer credentials are optional on the stream, which also takes a query token
+optional_bearer = HTTPBearer(auto_error=False)
+
+
+router = APIRouter(prefix="/api/v2/dashboard", tags=["Dashboard v2"])
+
+
+def get_stream_user(
+    token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer)
+) -> dict:
+    """
+    Authenticate a stream request with a bearer header or a stream token.
+    
+    Args:
+        token: Stream token from the query string, for EventSource clients
+        credentials: HTTP Authorization credentials, if sent
+        
+    Returns:
+        Dictionary containing user_id and role of an admin
+        
+    Raises:
+        HTTPException: 401 if neither authenticates, 403 if not an admin
+    """
+    if credentials is not None:
+        current_user = get_current_user(credentials)
+    elif token:
+        try:
+            payload = decode_access_token(token, scope=STREAM_TOKEN_SCOPE)
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired stream token"
+            )
+        current_user = {"user_id": payload.get("user_id"), "role": payload.get("role")}
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if current_user["role"] != "Admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions to access this resource"
+        )
+    
+    return current_user
+
+
+@router.post("/stream-token")
+async def create_stream_token(current_user: dict = Depends(require_role(["Admin"]))):
+    """
+    Issue a short-lived token for connecting to the stream (Admin only).
+
+    Pass it as `?token=` when opening the stream with EventSource. It is
+    only accepted by the stream, and only checked when connecting: issue a
+    new one to reconnect after it expires.
+
+    Args:
+        current_user: Authenticated admin user from JWT token
+
+    Returns:
+        Dictionary with the token and its lifetime in seconds
+    """
+    return {
+        "token": create_scoped_token(
+            current_user["user_id"],
+            current_user["role"],
+            STREAM_TOKEN_SCOPE,
+            DASHBOARD_STREAM_TOKEN_SECONDS
+        ),
+        "expires_in": DASHBOARD_STREAM_TOKEN_SECONDS
+    }
+
+
+@router.get("/stream")
+async def stream_admin_dashboard(
+    request: Request,
+    current_user: dict = Depends(get_stream_user)
+):
+    """
+    Stream admin dashboard counters as Server-Sent Events (Admin only).
+
+    Sends a `snapshot` event with every counter on connect, then a `delta`
+    event with the changed counters (new - old) whenever attendance or leave
+    requests change. A comment line is sent every
+    DASHBOARD_STREAM_KEEPALIVE_SECONDS to keep idle connections open.
+
+    Authenticate with the usual Authorization header or, from EventSource,
+    a token from POST /stream-token in the `token` query parameter.
+
+    Args:
+        request: Incoming request, used to detect disconnects
+        current_user: Authenticated admin user from JWT or stream token
+
+    Returns:
+        text/event-stream response
+    """
+    queue = await dashboard_broadcaster.subscribe()
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(
+                        queue.get(), timeout=DASHBOARD_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield format_sse(event, data)
+        finally:
+            dashboard_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+        }
+    )
@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from datetime import date
 from typing import Optional
 
-from api.database import get_db
+from api.db_routing import read_db, ROUTE_EXPORTS
 from api.auth import require_role
 from api.exports import (
     export_attendance_csv,
@@ -28,7 +28,7 @@ def export_attendance(
     department: Optional[str] = Query(None, description="Filter by department"),
     format: str = Query("csv", description="Export format (csv only for now)"),
     current_user: dict = Depends(require_role(["Admin"])),
-    db: Session = Depends(get_db)
+    db: Session = Depends(read_db(ROUTE_EXPORTS))
 ):
     """
     Export attendance data to CSV.
@@ -98,7 +98,7 @@ def export_leave(
     department: Optional[str] = Query(None, description="Filter by department"),
     format: str = Query("csv", description="Export format (csv only for now)"),
     current_user: dict = Depends(require_role(["Admin"])),
-    db: Session = Depends(get_db)
+    db: Session = Depends(read_db(ROUTE_EXPORTS))
 ):
     """
     Export leave data to CSV.
@@ -166,7 +166,7 @@ def export_payroll(
     department: Optional[str] = Query(None, description="Filter by department"),
     format: str = Query("csv", description="Export format (csv only for now)"),
     current_user: dict = Depends(require_role(["Admin"])),
-    db: Session = Depends(get_db)
+    db: Session = Depends(read_db(ROUTE_EXPORTS))
 ):
     """
     Export payroll data to CSV.
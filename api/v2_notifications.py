@@ -5,12 +5,14 @@ This module provides endpoints for managing user notifications.
 Requirements: 27.7
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from api.database import get_db
 from api.auth import get_current_user
 from api.models import Notification
+from api.pagination import paginate, wants_total
 from api.schemas import (
     NotificationListResponse,
     NotificationResponse,
@@ -27,6 +29,8 @@ def get_notifications(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     unread_only: bool = Query(False),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous page"),
+    include_total: Optional[bool] = Query(None, description="Count all matching notifications"),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -40,6 +44,9 @@ def get_notifications(
         page: Page number (default: 1)
         page_size: Number of notifications per page (default: 10, max: 100)
         unread_only: If True, return only unread notifications (default: False)
+        cursor: Cursor from a previous response; selects the page after it instead of page
+        include_total: Whether to count all matching notifications
+            (default: only in page mode)
         current_user: Authenticated user from JWT token
         db: Database session
         
@@ -57,21 +64,24 @@ def get_notifications(
     if unread_only:
         query = query.filter(Notification.is_read == False)
     
-    # Order by created_at descending (newest first)
-    query = query.order_by(Notification.created_at.desc())
-    
-    # Get total count before pagination
-    total = query.count()
-    
-    # Get unread count (always calculate, regardless of filter)
-    unread_count = db.query(Notification).filter(
-        Notification.user_id == user_id,
-        Notification.is_read == False
-    ).count()
-    
-    # Apply pagination
-    offset = (page - 1) * page_size
-    results = query.offset(offset).limit(page_size).all()
+    # Get unread count (always calculate, regardless of filter), and the
+    # total count in the same statement if requested
+    unread = func.count(Notification.id).filter(Notification.is_read == False)
+    if wants_total(include_total, cursor):
+        counted = unread if unread_only else func.count(Notification.id)
+        total, unread_count = db.query(counted, unread).filter(
+            Notification.user_id == user_id
+        ).one()
+    else:
+        total = None
+        unread_count = db.query(unread).filter(Notification.user_id == user_id).scalar()
+    
+    # Apply pagination, ordered by created_at descending (newest first)
+    results, next_cursor = paginate(
+        query, (Notification.created_at, Notification.id),
+        lambda notification: (notification.created_at, notification.id),
+        page, page_size, cursor
+    )
     
     # Convert to response format
     notifications = []
@@ -91,7 +101,8 @@ def get_notifications(
         unread_count=unread_count,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
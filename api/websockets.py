@@ -4,30 +4,135 @@ This module provides WebSocket connection management and real-time push
 notifications for system events. Connections are authenticated with JWT
 and maintained in a per-user registry.
 
+The sockets belong to the server's event loop, while event handlers run
+in worker threads. Handlers hand their pushes to the push gateway, which
+publishes them as one batch per event to the push broker (api.push_broker).
+Every worker receives the batch and schedules it on its own loop, for the
+connections it holds.
+
+After authenticating, a connection joins the channels user:<id>,
+role:<role> and dept:<department>. Pushes address a user ID or a channel,
+so notifying all admins is one push to role:Admin, resolved against the
+in-memory channel registry without looking recipients up in the database.
+
+Each connection has a bounded outbound queue drained by its own writer
+task, so fan-out only queues messages and one stalled browser delays no
+one else. A connection whose queue overflows (WS_SEND_QUEUE_SIZE) or whose
+send takes longer than WS_SEND_TIMEOUT_SECONDS is evicted and closed.
+
+Connections must authenticate within WS_AUTH_TIMEOUT_SECONDS, are pinged
+when quiet and reaped when silent for WS_IDLE_TIMEOUT_SECONDS, and are
+capped per user (WS_MAX_CONNECTIONS_PER_USER) and per worker
+(WS_MAX_CONNECTIONS), so half-dead sockets do not accumulate.
+
+Every push carries a sequence id and is kept in a per-channel replay buffer
+(api.push_replay). A reconnecting client sends the last sequence id and
+stream id it received in its auth message, and is replayed what it missed
+on its channels, or told to refetch if that is no longer buffered.
+
+Clients may also ask for MessagePack binary frames instead of JSON text
+frames (api.push_protocol). Each push is encoded once per protocol for
+its whole fan-out.
+
 Requirements: 25.1, 25.2, 25.3, 25.4, 25.5, 25.7
 """
+import os
+import time
+import asyncio
 import logging
 import json
-from typing import Dict, List, Optional
+import contextvars
+import concurrent.futures
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple, Union
 from fastapi import WebSocket, WebSocketDisconnect, status
 from datetime import datetime
+from starlette.concurrency import run_in_threadpool
 
 from api.auth import decode_access_token
+from api.push_broker import PushBroker, InMemoryBroker, create_push_broker
+from api.push_replay import ReplayBuffer
+from api.push_protocol import PushMessage, PROTOCOL_JSON, negotiate_protocol
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Outbound messages buffered per connection before it is evicted as too slow
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+# Longest a single send may take before the connection is evicted
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+# Seconds a new connection has to send its authentication message
+WS_AUTH_TIMEOUT_SECONDS = float(os.getenv("WS_AUTH_TIMEOUT_SECONDS", "10"))
+# A ping is sent after this many seconds without a message from the client
+WS_HEARTBEAT_SECONDS = float(os.getenv("WS_HEARTBEAT_SECONDS", "25"))
+# Connections silent for this long (no pong or other message) are closed
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60"))
+
+
+def _read_connection_limit(name: str, default: str) -> int:
+    """
+    Read a connection limit from the environment.
+
+    Raises:
+        ValueError: If the limit is below 1, which would admit no connection
+    """
+    limit = int(os.getenv(name, default))
+    if limit < 1:
+        raise ValueError(f"{name} must be at least 1, got {limit}")
+    return limit
+
+
+# Connection limits; a user's oldest connection is closed to admit a new one
+WS_MAX_CONNECTIONS_PER_USER = _read_connection_limit("WS_MAX_CONNECTIONS_PER_USER", "5")
+WS_MAX_CONNECTIONS = _read_connection_limit("WS_MAX_CONNECTIONS", "10000")
+
 # WebSocket connection registry: maps user_id to list of active WebSocket connections
 _active_connections: Dict[int, List[WebSocket]] = {}
 
+# Outbound queue of each registered connection, created on first push
+_senders: Dict[WebSocket, "ConnectionSender"] = {}
+
+# Push counters since the worker started
+_push_stats: Dict[str, int] = {
+    "messages_sent": 0,
+    "messages_dropped": 0,
+    "evicted_slow": 0,
+    "evicted_timeout": 0,
+    "evicted_error": 0,
+    "evicted_user_limit": 0,
+    "rejected_global_limit": 0,
+    "reaped_idle": 0,
+}
+
+# Channel registry: maps role:<role> and dept:<name> channels to the
+# connections that joined them (user:<id> channels are _active_connections)
+_channels: Dict[str, Set[WebSocket]] = {}
+
+# Owner and channels of each connection that joined channels
+_connection_users: Dict[WebSocket, int] = {}
+_connection_channels: Dict[WebSocket, Set[str]] = {}
+
+# One push: (target, update_type, payload); the target is a user ID or a channel name
+Push = Tuple[Union[int, str], str, dict]
+
+# Recent pushes of every channel, replayed to reconnecting clients
+replay_buffer = ReplayBuffer()
+
 
 async def handle_websocket_connection(websocket: WebSocket) -> None:
     """
     Handle WebSocket connection lifecycle.
     
-    Accepts the connection, authenticates with JWT token from initial message,
-    registers the connection in the user's connection list, and listens for
-    disconnect events to clean up.
+    Accepts the connection, authenticates with JWT token from initial message
+    (sent within WS_AUTH_TIMEOUT_SECONDS), registers the connection in the
+    user's connection list, and listens for disconnect events to clean up.
+    The auth message may carry the "last_seq" and "stream" of the last push
+    received on a previous connection; pushes missed since are replayed, or
+    a {"type": "replay_gap"} message asks the client to refetch. Its
+    "protocol" picks the encoding of every message after auth_success
+    ("json" or "msgpack"; see api.push_protocol).
+    Quiet connections are sent {"type": "ping"} messages and closed if the
+    client sends nothing (e.g. {"type": "pong"}) for WS_IDLE_TIMEOUT_SECONDS.
     
     Args:
         websocket: The WebSocket connection to handle
@@ -42,11 +147,34 @@ async def handle_websocket_connection(websocket: WebSocket) -> None:
     await websocket.accept()
     logger.info("WebSocket connection accepted, awaiting authentication")
     
+    # Pushes for this connection must be sent from the loop serving it
+    push_gateway.bind(asyncio.get_running_loop())
+    
     user_id = None
     
     try:
+        if get_connection_count() >= WS_MAX_CONNECTIONS:
+            _push_stats["rejected_global_limit"] += 1
+            await websocket.send_text(json.dumps({
+                "type": "error",
+                "message": "Server is at its connection limit, try again later"
+            }))
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            logger.warning("WebSocket closed: global connection limit reached")
+            return
+        
         # Wait for authentication message
-        auth_message = await websocket.receive_text()
+        try:
+            auth_message = await asyncio.wait_for(websocket.receive_text(), timeout=WS_AUTH_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            await websocket.send_text(json.dumps({
+                "type": "error",
+                "message": "Authentication timed out"
+            }))
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            logger.warning("WebSocket closed: no authentication message received")
+            return
+        
         auth_data = json.loads(auth_message)
         
         if auth_data.get("type") != "auth":
@@ -90,26 +218,87 @@ async def handle_websocket_connection(websocket: WebSocket) -> None:
             logger.warning(f"WebSocket authentication failed: {str(e)}")
             return
         
-        # Register connection
-        if user_id not in _active_connections:
-            _active_connections[user_id] = []
+        protocol = negotiate_protocol(auth_data.get("protocol"))
+        last_seq = auth_data.get("last_seq")
+        if not isinstance(last_seq, int) or isinstance(last_seq, bool):
+            last_seq = None
         
-        _active_connections[user_id].append(websocket)
-        logger.info(f"WebSocket authenticated and registered for user {user_id}")
+        department = await run_in_threadpool(load_department, user_id)
+        channels = [user_channel(user_id)]
+        for channel in (role_channel(payload.get("role")), department_channel(department)):
+            if channel:
+                channels.append(channel)
+        
+        # Pushes from here on are replayed below unless the client resumes
+        # from an earlier point
+        seq = replay_buffer.seq
         
         # Send authentication success message
         await websocket.send_text(json.dumps({
             "type": "auth_success",
-            "user_id": user_id
+            "user_id": user_id,
+            "channels": channels,
+            "stream": replay_buffer.stream_id,
+            "seq": seq,
+            "protocol": protocol
         }))
         
-        # Keep connection alive and listen for disconnect
+        # Make room under the per-user limit by dropping the oldest connections
+        while get_connection_count(user_id) >= WS_MAX_CONNECTIONS_PER_USER:
+            oldest = _active_connections[user_id][0]
+            _discard_connection(user_id, oldest)
+            _push_stats["evicted_user_limit"] += 1
+            asyncio.get_running_loop().create_task(_close_quietly(oldest, status.WS_1008_POLICY_VIOLATION))
+            logger.info(f"Closed the oldest WebSocket connection of user {user_id}: per-user limit reached")
+        
+        # Register the connection and join its channels, then queue what it
+        # missed. Nothing awaits in between, so pushes queued after
+        # registration are never older than the replayed ones.
+        if user_id not in _active_connections:
+            _active_connections[user_id] = []
+        
+        _active_connections[user_id].append(websocket)
+        
+        for channel in channels[1:]:
+            join_channel(channel, user_id, websocket)
+        
+        replay_from = seq if last_seq is None else min(last_seq, seq)
+        stream = auth_data.get("stream") if last_seq is not None else None
+        missed = replay_buffer.since(channels, replay_from, stream)
+        sender = _get_sender(user_id, websocket, protocol)
+        if missed is None:
+            sender.enqueue(PushMessage({"type": "replay_gap", "seq": replay_buffer.seq}))
+            logger.info(f"Replay gap for user {user_id} after seq {last_seq}, client must refetch")
+        else:
+            for message in missed:
+                sender.enqueue(message)
+        
+        logger.info(f"WebSocket authenticated and registered for user {user_id} on {', '.join(channels)}")
+        
+        # Listen for disconnect, sending a heartbeat whenever the client has
+        # been quiet for WS_HEARTBEAT_SECONDS. Any message (normally a pong)
+        # proves the client alive; one silent for WS_IDLE_TIMEOUT_SECONDS is
+        # reaped.
+        last_seen = time.monotonic()
         while True:
-            # Wait for messages (we don't expect any, but this keeps the connection alive)
             try:
-                message = await websocket.receive_text()
+                message = await asyncio.wait_for(websocket.receive_text(), timeout=WS_HEARTBEAT_SECONDS)
+                last_seen = time.monotonic()
                 # Log any messages received (for debugging)
                 logger.debug(f"Received message from user {user_id}: {message}")
+            except asyncio.TimeoutError:
+                if time.monotonic() - last_seen >= WS_IDLE_TIMEOUT_SECONDS:
+                    _push_stats["reaped_idle"] += 1
+                    _discard_connection(user_id, websocket)
+                    await _close_quietly(websocket, status.WS_1001_GOING_AWAY)
+                    logger.info(f"Reaped idle WebSocket connection for user {user_id}")
+                    break
+                
+                if websocket in _active_connections.get(user_id, []):
+                    _get_sender(user_id, websocket).enqueue(_build_message("ping", {}))
+                else:
+                    # Evicted by a push or the per-user limit
+                    break
             except WebSocketDisconnect:
                 logger.info(f"WebSocket disconnected for user {user_id}")
                 break
@@ -123,15 +312,93 @@ async def handle_websocket_connection(websocket: WebSocket) -> None:
         logger.error(f"Unexpected error in WebSocket handler: {str(e)}", exc_info=True)
     finally:
         # Clean up connection on disconnect
-        if user_id and user_id in _active_connections:
-            try:
-                _active_connections[user_id].remove(websocket)
-                if not _active_connections[user_id]:
-                    del _active_connections[user_id]
-                logger.info(f"Cleaned up WebSocket connection for user {user_id}")
-            except ValueError:
-                # Connection was already removed
-                pass
+        if user_id:
+            _discard_connection(user_id, websocket)
+            logger.info(f"Cleaned up WebSocket connection for user {user_id}")
+
+
+def user_channel(user_id: int) -> str:
+    """Name of the channel reaching every connection of a user."""
+    return f"user:{user_id}"
+
+
+def role_channel(role: Optional[str]) -> Optional[str]:
+    """Name of the channel of a role, e.g. role:Admin."""
+    return f"role:{role}" if role else None
+
+
+def department_channel(department: Optional[str]) -> Optional[str]:
+    """Name of the channel of a department, e.g. dept:Engineering."""
+    return f"dept:{department}" if department else None
+
+
+def load_department(user_id: int) -> Optional[str]:
+    """
+    Look up a user's department when their connection authenticates.
+    
+    Args:
+        user_id: The user ID
+        
+    Returns:
+        The department from the user's profile, or None if unavailable
+    """
+    from api.database import get_session_factory
+    from api.models import Profile
+    
+    try:
+        db = get_session_factory()()
+        try:
+            return db.query(Profile.department).filter(Profile.user_id == user_id).scalar()
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"Failed to load department for user {user_id}: {str(e)}")
+        return None
+
+
+def join_channel(channel: str, user_id: int, websocket: WebSocket) -> None:
+    """
+    Subscribe a connection to a role or department channel.
+    
+    Args:
+        channel: Channel name
+        user_id: Owner of the connection
+        websocket: The connection
+    """
+    _channels.setdefault(channel, set()).add(websocket)
+    _connection_users[websocket] = user_id
+    _connection_channels.setdefault(websocket, set()).add(channel)
+
+
+def _leave_channels(websocket: WebSocket) -> None:
+    """Unsubscribe a connection from all role and department channels."""
+    for channel in _connection_channels.pop(websocket, ()):
+        members = _channels.get(channel)
+        if members is not None:
+            members.discard(websocket)
+            if not members:
+                del _channels[channel]
+    
+    _connection_users.pop(websocket, None)
+
+
+def get_channel_members(target: Union[int, str]) -> List[Tuple[int, WebSocket]]:
+    """
+    Get the connections a push target reaches.
+    
+    Args:
+        target: A user ID, or a channel name (user:<id>, role:<role>, dept:<name>)
+        
+    Returns:
+        List of (user_id, connection) pairs
+    """
+    if isinstance(target, str) and target.startswith("user:"):
+        target = int(target[len("user:"):])
+    
+    if isinstance(target, int):
+        return [(target, connection) for connection in _active_connections.get(target, [])]
+    
+    return [(_connection_users[connection], connection) for connection in _channels.get(target, ())]
 
 
 def get_active_connections(user_id: int) -> List[WebSocket]:
@@ -153,6 +420,257 @@ def get_active_connections(user_id: int) -> List[WebSocket]:
     return _active_connections.get(user_id, []).copy()
 
 
+class ConnectionSender:
+    """
+    Bounded outbound queue of one WebSocket connection.
+    
+    Messages are queued without waiting and written by a writer task that
+    runs while the queue is non-empty, so a stalled connection only delays
+    its own messages. Each queued message may carry a future resolved with
+    whether it was sent. Messages are written in the connection's protocol,
+    as text (JSON) or binary (MessagePack) frames.
+    """
+    
+    def __init__(self, user_id: int, websocket: WebSocket, protocol: str = PROTOCOL_JSON):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.protocol = protocol
+        self._queue: Deque[Tuple[PushMessage, Optional[asyncio.Future]]] = deque()
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+    
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+    
+    def enqueue(self, message: PushMessage, delivered: Optional[asyncio.Future] = None) -> bool:
+        """
+        Queue a message for sending; must be called on the connection's loop.
+        
+        Args:
+            message: The message
+            delivered: Optional future resolved with whether it was sent
+            
+        Returns:
+            False if the queue is full and the connection was evicted
+        """
+        if self.closed:
+            _resolve(delivered, False)
+            return False
+        
+        if len(self._queue) >= WS_SEND_QUEUE_SIZE:
+            _resolve(delivered, False)
+            _push_stats["messages_dropped"] += 1
+            _evict(self, "slow", "send queue full")
+            return False
+        
+        self._queue.append((message, delivered))
+        
+        if self._writer is None or self._writer.done():
+            # Run in a fresh context so the writer does not inherit the
+            # state of the request that happened to start it
+            loop = asyncio.get_running_loop()
+            self._writer = contextvars.Context().run(loop.create_task, self._write())
+        
+        return True
+    
+    async def _write(self) -> None:
+        """Send queued messages until the queue is empty."""
+        while self._queue and not self.closed:
+            message, delivered = self._queue[0]
+            
+            try:
+                data = message.encode(self.protocol)
+            except Exception as e:
+                logger.error(f"Failed to encode push for user {self.user_id}: {str(e)}")
+                self._queue.popleft()
+                _push_stats["messages_dropped"] += 1
+                _resolve(delivered, False)
+                continue
+            
+            send = self.websocket.send_bytes if isinstance(data, bytes) else self.websocket.send_text
+            
+            try:
+                await asyncio.wait_for(send(data), timeout=WS_SEND_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                _evict(self, "timeout", f"send timed out after {WS_SEND_TIMEOUT_SECONDS}s")
+                return
+            except Exception as e:
+                _evict(self, "error", str(e))
+                return
+            
+            self._queue.popleft()
+            _push_stats["messages_sent"] += 1
+            _resolve(delivered, True)
+    
+    def close(self) -> int:
+        """
+        Stop sending, failing every queued message.
+        
+        Returns:
+            Number of messages discarded
+        """
+        self.closed = True
+        discarded = len(self._queue)
+        
+        while self._queue:
+            _, delivered = self._queue.popleft()
+            _resolve(delivered, False)
+        
+        if self._writer is not None and not self._writer.done() and self._writer is not _current_task():
+            self._writer.cancel()
+        
+        return discarded
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    """Get the running task, if called from one."""
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+def _resolve(future: Optional[asyncio.Future], result: bool) -> None:
+    """Resolve a delivery future unless it is absent or already done."""
+    if future is not None and not future.done():
+        future.set_result(result)
+
+
+def _get_sender(user_id: int, websocket: WebSocket, protocol: str = PROTOCOL_JSON) -> ConnectionSender:
+    """Get the sender of a registered connection, creating it on first use."""
+    sender = _senders.get(websocket)
+    if sender is None:
+        sender = ConnectionSender(user_id, websocket, protocol)
+        _senders[websocket] = sender
+    return sender
+
+
+def _discard_connection(user_id: int, websocket: WebSocket) -> None:
+    """Remove a connection from the registry and stop its sender."""
+    connections = _active_connections.get(user_id)
+    if connections is not None:
+        try:
+            connections.remove(websocket)
+        except ValueError:
+            # Connection was already removed
+            pass
+        if not connections:
+            del _active_connections[user_id]
+    
+    _leave_channels(websocket)
+    
+    sender = _senders.pop(websocket, None)
+    if sender is not None:
+        sender.close()
+
+
+def _evict(sender: ConnectionSender, reason: str, detail: str) -> None:
+    """
+    Drop a connection that failed or fell behind, and close it.
+    
+    Args:
+        sender: The connection's sender
+        reason: Counter to increment: "slow", "timeout" or "error"
+        detail: Description for the log
+    """
+    if sender.closed:
+        return
+    
+    _push_stats["messages_dropped"] += sender.close()
+    _discard_connection(sender.user_id, sender.websocket)
+    _push_stats[f"evicted_{reason}"] += 1
+    logger.warning(f"Evicted WebSocket connection for user {sender.user_id}: {detail}")
+    
+    if reason != "error":
+        # Closing makes the connection's handler stop receiving and exit
+        asyncio.get_running_loop().create_task(_close_quietly(sender.websocket))
+
+
+async def _close_quietly(websocket: WebSocket, code: int = status.WS_1013_TRY_AGAIN_LATER) -> None:
+    """Close a dropped connection, ignoring errors from a dead peer."""
+    try:
+        await asyncio.wait_for(websocket.close(code=code), timeout=WS_SEND_TIMEOUT_SECONDS)
+    except Exception:
+        pass
+
+
+def _build_message(update_type: str, payload: dict, seq: Optional[int] = None) -> PushMessage:
+    """Build a push message, with its sequence id if it is replayable."""
+    message = {
+        "type": update_type,
+        "payload": payload,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    if seq is not None:
+        message["seq"] = seq
+    return PushMessage(message)
+
+
+def _channel_name(target: Union[int, str]) -> str:
+    """Name of the channel of a push target."""
+    return user_channel(target) if isinstance(target, int) else target
+
+
+def record_update(target: Union[int, str], update_type: str, payload: dict) -> PushMessage:
+    """
+    Number an update and keep it in the target's replay buffer.
+    
+    Args:
+        target: A user ID or channel name
+        update_type: Type of update
+        payload: Dictionary containing update data
+        
+    Returns:
+        The message, with its sequence id
+    """
+    return replay_buffer.record(
+        _channel_name(target),
+        lambda seq: _build_message(update_type, payload, seq)
+    )
+
+
+def publish_update(target: Union[int, str], update_type: str, payload: dict) -> int:
+    """
+    Queue an update on every connection a target reaches, without waiting.
+    
+    The update is recorded for replay even if nobody is connected, and
+    encoded once per protocol for all connections. Must be called on the event loop
+    serving the connections. Connections whose send queue is full are
+    evicted.
+    
+    Args:
+        target: A user ID or channel name (see get_channel_members())
+        update_type: Type of update
+        payload: Dictionary containing update data
+        
+    Returns:
+        Number of connections the update was queued on
+    """
+    return publish_message(target, record_update(target, update_type, payload))
+
+
+def publish_message(target: Union[int, str], message: PushMessage) -> int:
+    """
+    Queue a message on every connection a target reaches.
+    
+    Args:
+        target: A user ID or channel name (see get_channel_members())
+        message: The message
+        
+    Returns:
+        Number of connections the message was queued on
+    """
+    members = get_channel_members(target)
+    if not members:
+        return 0
+    
+    return sum(
+        1 for user_id, connection in members
+        if _get_sender(user_id, connection).enqueue(message)
+    )
+
+
 async def push_update(
     user_id: int,
     update_type: str,
@@ -161,9 +679,9 @@ async def push_update(
     """
     Push update to all active WebSocket connections for a user.
     
-    Sends a JSON message to all active connections for the specified user.
-    If the user has no active connections, returns False (caller should
-    fall back to database storage).
+    Queues the message on every connection and waits until each has been
+    sent or its connection evicted. If the user has no active connections,
+    returns False (caller should fall back to database storage).
     
     Args:
         user_id: The user ID to push to
@@ -189,56 +707,208 @@ async def push_update(
             # Fall back to database storage
             create_notification(db, user_id, "leave_approved", "...")
     """
+    message = record_update(user_id, update_type, payload)
     connections = _active_connections.get(user_id, [])
     
     if not connections:
         logger.debug(f"No active WebSocket connections for user {user_id}")
         return False
     
-    # Build message
-    message = json.dumps({
-        "type": update_type,
-        "payload": payload,
-        "timestamp": datetime.utcnow().isoformat()
-    })
+    loop = asyncio.get_running_loop()
+    
+    # Queue on all connections first, so they are written concurrently
+    deliveries = []
+    for connection in list(connections):
+        delivered = loop.create_future()
+        _get_sender(user_id, connection).enqueue(message, delivered)
+        deliveries.append(delivered)
+    
+    sent_count = sum(await asyncio.gather(*deliveries))
     
-    # Send to all connections
-    sent_count = 0
-    failed_connections = []
+    logger.info(f"Pushed update '{update_type}' to {sent_count} connections for user {user_id}")
     
-    for connection in connections:
+    return sent_count > 0
+
+
+async def push_many(pushes: Sequence[Push]) -> int:
+    """
+    Queue a batch of updates, one per (target, update_type, payload).
+    
+    Each update is recorded for replay even if nobody is connected here.
+    Must run on the event loop serving the connections. Returns once the
+    updates are queued; each connection's writer sends them independently.
+    
+    Args:
+        pushes: Updates to push, each to a user ID or channel
+        
+    Returns:
+        Number of targets with at least one connection the update was queued on
+    """
+    delivered = 0
+    
+    for target, update_type, payload in pushes:
         try:
-            await connection.send_text(message)
-            sent_count += 1
+            if publish_update(target, update_type, payload):
+                delivered += 1
         except Exception as e:
-            logger.error(f"Failed to send WebSocket message to user {user_id}: {str(e)}")
-            failed_connections.append(connection)
+            logger.error(f"Failed to push '{update_type}' to {target}: {str(e)}", exc_info=True)
     
-    # Clean up failed connections
-    if failed_connections:
-        for connection in failed_connections:
-            try:
-                _active_connections[user_id].remove(connection)
-            except ValueError:
-                pass
+    return delivered
+
+
+def get_push_stats() -> Dict[str, int]:
+    """
+    Get WebSocket push counters since the worker started.
+    
+    Returns:
+        Dictionary with the current connection and queued message gauges,
+        and counters of sent and dropped messages and evicted connections
+        (slow: send queue full, timeout: send timed out, error: send failed,
+        user_limit: replaced by a newer connection of the same user), of
+        connections rejected at the global limit and reaped as idle
+    """
+    return {
+        "connections": get_connection_count(),
+        "queued_messages": sum(sender.queued for sender in list(_senders.values())),
+        **_push_stats,
+    }
+
+
+class PushGateway:
+    """
+    Entry point for pushes from synchronous code.
+    
+    submit() publishes a batch to the push broker, which carries it to every
+    worker. Each worker's gateway is bound to the event loop serving its
+    WebSocket connections, and deliver() schedules received batches on that
+    loop with run_coroutine_threadsafe; callers never wait for the sends.
+    Batches arriving while no loop is bound are only recorded for replay.
+    """
+    
+    def __init__(self, broker: Optional[PushBroker] = None):
+        self.broker = broker or InMemoryBroker()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Bind the gateway to the loop owning the connections, and subscribe
+        this worker to the broker.
         
-        if not _active_connections[user_id]:
-            del _active_connections[user_id]
+        Args:
+            loop: The server's running event loop
+        """
+        self._loop = loop
+        self.broker.start(self.deliver)
     
-    logger.info(f"Pushed update '{update_type}' to {sent_count} connections for user {user_id}")
+    def submit(self, pushes: Sequence[Push]) -> Optional[Union[asyncio.Task, concurrent.futures.Future]]:
+        """
+        Publish a batch of pushes to every worker.
+        
+        Args:
+            pushes: Updates to push, as (target, update_type, payload)
+            
+        Returns:
+            With the in-memory broker, the task or future of the local
+            delivery (see deliver()); otherwise None
+        """
+        if not pushes:
+            return None
+        
+        # Not subscribed to the broker until bound, so record the batch here
+        if self._loop is None:
+            self.deliver(pushes)
+        
+        try:
+            return self.broker.publish(list(pushes))
+        except Exception as e:
+            logger.error(f"Failed to publish pushes: {str(e)}", exc_info=True)
+            return None
     
-    return sent_count > 0
+    def deliver(self, pushes: Sequence[Push]) -> Optional[Union[asyncio.Task, concurrent.futures.Future]]:
+        """
+        Schedule a batch of pushes on this worker's connections.
+        
+        Called by the broker, from any thread. The batch is only handed to
+        the loop: recording for replay and resolving targets to connections
+        happen there (see push_many()), as the connection and channel
+        registries are only changed, and may only be read, on the loop.
+        Without a running loop there are no connections to reach, and the
+        batch is only recorded for replay.
+        
+        Args:
+            pushes: Updates to push, as (target, update_type, payload)
+            
+        Returns:
+            Task or future resolving to the number of targets reached, or
+            None if nothing was scheduled
+        """
+        pushes = list(pushes)
+        loop = self._loop
+        
+        if not pushes:
+            return None
+        
+        if loop is None or loop.is_closed():
+            self._record(pushes)
+            return None
+        
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        # Called on the loop itself (an inline handler in async code)
+        if running_loop is loop:
+            return loop.create_task(push_many(pushes))
+        
+        try:
+            return asyncio.run_coroutine_threadsafe(push_many(pushes), loop)
+        except RuntimeError:
+            # The loop was closed in the meantime
+            self._record(pushes)
+            return None
+    
+    def _record(self, pushes: Sequence[Push]) -> None:
+        """Record pushes for replay without sending them."""
+        for target, update_type, payload in pushes:
+            try:
+                record_update(target, update_type, payload)
+            except Exception as e:
+                logger.error(f"Failed to record '{update_type}' for {target}: {str(e)}", exc_info=True)
+    
+    def close(self) -> None:
+        """Unsubscribe from the broker."""
+        self.broker.stop()
+
+
+# Process-wide gateway used by the notification handlers
+push_gateway = PushGateway(create_push_broker())
 
 
 def clear_connections() -> None:
     """
-    Clear all active WebSocket connections.
+    Clear all active WebSocket connections and push counters.
     
     This is primarily useful for testing to ensure a clean state
     between test runs.
     """
     global _active_connections
+    
+    for sender in list(_senders.values()):
+        try:
+            sender.close()
+        except RuntimeError:
+            # The writer's event loop has been closed
+            pass
+    _senders.clear()
+    _channels.clear()
+    _connection_users.clear()
+    _connection_channels.clear()
+    replay_buffer.clear()
+    
     _active_connections = {}
+    for counter in _push_stats:
+        _push_stats[counter] = 0
     logger.info("Cleared all WebSocket connections")
 
 
@@ -256,4 +926,5 @@ def get_connection_count(user_id: Optional[int] = None) -> int:
     if user_id is not None:
         return len(_active_connections.get(user_id, []))
     
-    return sum(len(connections) for connections in _active_connections.values())
+    # Copied first, as the push stats endpoint reads this from a worker thread
+    return sum(len(connections) for connections in list(_active_connections.values()))
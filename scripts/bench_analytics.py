@@ -0,0 +1,269 @@
+"""Benchmark for the SQL-side analytics aggregation.
+
+Seeds a throwaway database with attendance records and leave requests,
+then runs get_attendance_trends() and get_leave_statistics() against their
+previous implementations, which loaded every row as an ORM object and
+aggregated in Python. Both must return the same result; their time and
+peak Python memory are reported.
+
+Usage:
+    python scripts/bench_analytics.py [--employees 500] [--days 365] [--leave-requests 20] [--runs 3]
+    python scripts/bench_analytics.py --database-url postgresql://...
+
+A --database-url must point to an empty scratch database: the tables are
+created for the benchmark and dropped afterwards.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+# api.database reads its configuration on import; nothing connects to it here
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("JWT_SECRET_KEY", "analytics-benchmark")
+
+from sqlalchemy import create_engine, insert, inspect, and_
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base
+from api.models import User, Attendance, LeaveRequest
+from api.analytics import get_attendance_trends, get_leave_statistics
+
+STATUSES = ["Present"] * 7 + ["Absent", "Leave", "Half-day"]
+LEAVE_TYPES = ["Sick", "Casual", "Vacation", "Unpaid"]
+LEAVE_STATUSES = ["Approved", "Approved", "Pending", "Rejected"]
+
+BENCH_TABLES = [User.__table__, Attendance.__table__, LeaveRequest.__table__]
+
+
+def legacy_attendance_trends(db, start_date, end_date, employee_id=None, group_by="month"):
+    """The previous get_attendance_trends(), bucketing ORM objects in Python."""
+    query = db.query(Attendance).filter(
+        and_(
+            Attendance.date >= start_date,
+            Attendance.date <= end_date,
+            Attendance.deleted_at.is_(None)
+        )
+    )
+    if employee_id is not None:
+        query = query.filter(Attendance.user_id == employee_id)
+
+    periods_data = defaultdict(lambda: {"present": 0, "absent": 0, "leave": 0, "half_day": 0, "total": 0})
+    for record in query.all():
+        if group_by == "day":
+            period_key = record.date.isoformat()
+        elif group_by == "week":
+            year, week, _ = record.date.isocalendar()
+            period_key = f"{year}-W{week:02d}"
+        else:
+            period_key = record.date.strftime("%Y-%m")
+
+        status_lower = record.status.lower().replace("-", "_")
+        if status_lower in periods_data[period_key]:
+            periods_data[period_key][status_lower] += 1
+        periods_data[period_key]["total"] += 1
+
+    periods = []
+    for period_key in sorted(periods_data.keys()):
+        data = periods_data[period_key]
+        total = data["total"]
+        periods.append({
+            "period": period_key,
+            "present": data["present"],
+            "absent": data["absent"],
+            "leave": data["leave"],
+            "half_day": data["half_day"],
+            "attendance_percentage": round((data["present"] / total * 100) if total > 0 else 0.0, 2)
+        })
+
+    totals = {key: sum(p[key] for p in periods) for key in ("present", "absent", "leave", "half_day")}
+    grand_total = sum(totals.values())
+    return {
+        "periods": periods,
+        "total_stats": {
+            "total_records": grand_total,
+            **totals,
+            "attendance_percentage": round((totals["present"] / grand_total * 100) if grand_total > 0 else 0.0, 2),
+            "status_distribution": {
+                key: round(value / grand_total * 100, 2) if grand_total > 0 else 0.0
+                for key, value in totals.items()
+            }
+        }
+    }
+
+
+def legacy_leave_statistics(db, start_date, end_date):
+    """The previous get_leave_statistics(), without the department filter."""
+    records = db.query(LeaveRequest).filter(
+        and_(
+            LeaveRequest.start_date >= start_date,
+            LeaveRequest.end_date <= end_date,
+            LeaveRequest.deleted_at.is_(None)
+        )
+    ).all()
+
+    by_type = defaultdict(int)
+    for record in records:
+        by_type[record.leave_type] += 1
+
+    by_status = defaultdict(int)
+    for record in records:
+        by_status[record.status] += 1
+
+    total_requests = len(records)
+    approval_rate = (by_status.get("Approved", 0) / total_requests * 100) if total_requests > 0 else 0.0
+
+    employee_days = defaultdict(int)
+    for record in records:
+        employee_days[record.user_id] += record.days_count
+
+    total_days = sum(employee_days.values())
+    unique_employees = len(employee_days)
+    return {
+        "by_type": dict(by_type),
+        "by_status": dict(by_status),
+        "approval_rate": round(approval_rate, 2),
+        "average_days_per_employee": round((total_days / unique_employees) if unique_employees > 0 else 0.0, 2),
+        "total_requests": total_requests,
+        "total_days": total_days
+    }
+
+
+def seed(engine, employees: int, days: int, leave_requests: int, start_date: date) -> None:
+    """Create the tables and insert attendance and leave for each employee."""
+    Base.metadata.create_all(bind=engine, tables=BENCH_TABLES)
+    rng = random.Random(42)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": user_id, "email": f"bench{user_id}@example.com", "password_hash": "x", "role": "Employee"}
+            for user_id in range(1, employees + 1)
+        ])
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            conn.execute(insert(Attendance), [
+                {"user_id": user_id, "date": day, "status": rng.choice(STATUSES)}
+                for user_id in range(1, employees + 1)
+            ])
+        for _ in range(leave_requests):
+            rows = []
+            for user_id in range(1, employees + 1):
+                start = start_date + timedelta(days=rng.randrange(max(days - 5, 1)))
+                length = rng.randint(1, 5)
+                rows.append({
+                    "user_id": user_id, "leave_type": rng.choice(LEAVE_TYPES),
+                    "start_date": start, "end_date": start + timedelta(days=length - 1),
+                    "days_count": length, "status": rng.choice(LEAVE_STATUSES)
+                })
+            conn.execute(insert(LeaveRequest), rows)
+
+
+def report(name: str, legacy_run, current_run) -> bool:
+    """Print one comparison line; return whether both results were identical."""
+    legacy, legacy_seconds, legacy_kib = legacy_run
+    current, current_seconds, current_kib = current_run
+    identical = legacy == current
+    print(
+        f"{name:<16}  python: {legacy_seconds * 1000:8.1f} ms {legacy_kib:10.0f} KiB  "
+        f"sql: {current_seconds * 1000:8.1f} ms {current_kib:8.0f} KiB  "
+        f"speedup: {legacy_seconds / current_seconds:5.1f}x  identical: {identical}"
+    )
+    return identical
+
+
+def measure(function, session_factory, runs: int, **kwargs):
+    """Run an analytics function; return its result, median seconds and peak KiB.
+
+    Memory is traced in a separate run, as tracing slows the timed ones.
+    """
+    def run():
+        db = session_factory()
+        try:
+            return function(db, **kwargs)
+        finally:
+            db.close()
+
+    timings, result = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        run()
+        peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+    return result, statistics.median(timings), peak_kib
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--leave-requests", type=int, default=20, help="Leave requests per employee")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--database-url", help="Database to benchmark against (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    temp_dir = None
+    database_url = args.database_url
+    if database_url is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'bench.db')}"
+
+    engine = create_engine(database_url)
+    if args.database_url is not None and inspect(engine).has_table(Attendance.__tablename__):
+        print("The database already has an attendance table; use an empty scratch database", file=sys.stderr)
+        engine.dispose()
+        return 2
+
+    session_factory = sessionmaker(bind=engine)
+    start_date = date.today() - timedelta(days=args.days)
+    end_date = start_date + timedelta(days=args.days - 1)
+
+    try:
+        print(
+            f"Seeding {args.employees * args.days} attendance records and "
+            f"{args.employees * args.leave_requests} leave requests on {engine.dialect.name}..."
+        )
+        seed(engine, args.employees, args.days, args.leave_requests, start_date)
+
+        identical = True
+        for group_by in ("day", "week", "month"):
+            kwargs = {"start_date": start_date, "end_date": end_date, "group_by": group_by}
+            identical &= report(
+                f"trends {group_by}",
+                measure(legacy_attendance_trends, session_factory, args.runs, **kwargs),
+                measure(get_attendance_trends, session_factory, args.runs, **kwargs)
+            )
+
+        kwargs = {"start_date": start_date, "end_date": end_date}
+        identical &= report(
+            "leave statistics",
+            measure(legacy_leave_statistics, session_factory, args.runs, **kwargs),
+            measure(get_leave_statistics, session_factory, args.runs, **kwargs)
+        )
+
+        return 0 if identical else 1
+    finally:
+        if args.database_url is not None:
+            Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+        engine.dispose()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,9 @@ os.environ["JWT_SECRET_KEY"] = "test-secret-key-for-testing-only"
 os.environ["JWT_ALGORITHM"] = "HS256"
 os.environ["JWT_EXPIRATION_HOURS"] = "24"
 os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+# Dashboard response caches are exercised explicitly in their own tests
+os.environ["ADMIN_DASHBOARD_CACHE_SECONDS"] = "0"
+os.environ["EMPLOYEE_DASHBOARD_CACHE_SECONDS"] = "0"
 
 
 @pytest.fixture(scope="session", autouse=True)
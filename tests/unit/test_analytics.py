@@ -0,0 +1,171 @@
+"""Unit tests for the analytics engine."""
+import pytest
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base
+from api.models import User, Profile, Attendance, LeaveRequest
+from api.analytics import (
+    build_period_start,
+    get_attendance_trends,
+    build_leave_statistics_statement,
+    get_leave_statistics,
+)
+
+
+@pytest.fixture
+def db_session():
+    """Create an isolated SQLite session with attendance across a year boundary."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    
+    session.add_all([
+        User(id=1, email="one@example.com", password_hash="x", role="Employee"),
+        User(id=2, email="two@example.com", password_hash="x", role="Employee"),
+    ])
+    records = [
+        (1, date(2020, 12, 28), "Present"),
+        (2, date(2020, 12, 28), "Absent"),
+        (1, date(2020, 12, 31), "Half-day"),
+        (1, date(2021, 1, 3), "Leave"),
+        (1, date(2021, 1, 4), "Present"),
+        (2, date(2021, 1, 4), "Present"),
+        (2, date(2021, 1, 10), "Remote"),
+        (1, date(2021, 2, 1), "Present"),
+    ]
+    for user_id, day, status in records:
+        session.add(Attendance(user_id=user_id, date=day, status=status))
+    session.add(Attendance(user_id=2, date=date(2021, 2, 1), status="Absent", deleted_at=datetime.utcnow()))
+    session.commit()
+    
+    yield session
+    session.close()
+
+
+def periods(result):
+    return [(p["period"], p["present"], p["absent"], p["leave"], p["half_day"]) for p in result["periods"]]
+
+
+class TestAttendanceTrends:
+    """Test attendance trends aggregated in SQL."""
+    
+    def test_group_by_day(self, db_session):
+        result = get_attendance_trends(db_session, date(2020, 12, 1), date(2021, 2, 28), group_by="day")
+        
+        assert periods(result) == [
+            ("2020-12-28", 1, 1, 0, 0),
+            ("2020-12-31", 0, 0, 0, 1),
+            ("2021-01-03", 0, 0, 1, 0),
+            ("2021-01-04", 2, 0, 0, 0),
+            ("2021-01-10", 0, 0, 0, 0),
+            ("2021-02-01", 1, 0, 0, 0),
+        ]
+    
+    def test_group_by_iso_week(self, db_session):
+        result = get_attendance_trends(db_session, date(2020, 12, 1), date(2021, 2, 28), group_by="week")
+        
+        assert periods(result) == [
+            ("2020-W53", 1, 1, 1, 1),
+            ("2021-W01", 2, 0, 0, 0),
+            ("2021-W05", 1, 0, 0, 0),
+        ]
+        # Unknown statuses count towards the period total only
+        assert result["periods"][1]["attendance_percentage"] == 66.67
+    
+    def test_group_by_month(self, db_session):
+        result = get_attendance_trends(db_session, date(2020, 12, 1), date(2021, 2, 28))
+        
+        assert periods(result) == [
+            ("2020-12", 1, 1, 0, 1),
+            ("2021-01", 2, 0, 1, 0),
+            ("2021-02", 1, 0, 0, 0),
+        ]
+        assert result["total_stats"]["total_records"] == 7
+        assert result["total_stats"]["attendance_percentage"] == 57.14
+    
+    def test_employee_and_date_filters(self, db_session):
+        result = get_attendance_trends(db_session, date(2021, 1, 1), date(2021, 1, 31), employee_id=1)
+        
+        assert periods(result) == [("2021-01", 1, 0, 1, 0)]
+    
+    def test_no_records(self, db_session):
+        result = get_attendance_trends(db_session, date(2019, 1, 1), date(2019, 12, 31))
+        
+        assert result["periods"] == []
+        assert result["total_stats"]["total_records"] == 0
+    
+    def test_postgres_truncates_in_sql(self):
+        sql = str(build_period_start("postgresql", "week").compile(dialect=postgresql.dialect()))
+        
+        assert "date_trunc" in sql
+
+
+class TestLeaveStatistics:
+    """Test leave statistics aggregated in SQL."""
+    
+    @pytest.fixture(autouse=True)
+    def leave_requests(self, db_session):
+        """Add profiles and leave requests for both users."""
+        db_session.add_all([
+            User(id=3, email="three@example.com", password_hash="x", role="Employee"),
+            Profile(user_id=1, employee_id="EMP00001", first_name="One", last_name="User", department="Engineering"),
+            Profile(user_id=2, employee_id="EMP00002", first_name="Two", last_name="User", department="Sales"),
+        ])
+        requests = [
+            (1, "Sick", date(2024, 1, 2), date(2024, 1, 3), 2, "Approved"),
+            (1, "Vacation", date(2024, 3, 4), date(2024, 3, 8), 5, "Approved"),
+            (2, "Sick", date(2024, 2, 1), date(2024, 2, 1), 1, "Rejected"),
+            (2, "Casual", date(2024, 5, 6), date(2024, 5, 6), 1, "Pending"),
+            (3, "Casual", date(2023, 12, 28), date(2024, 1, 2), 4, "Approved"),
+        ]
+        for user_id, leave_type, start, end, days, status in requests:
+            db_session.add(LeaveRequest(
+                user_id=user_id, leave_type=leave_type, start_date=start, end_date=end,
+                days_count=days, status=status
+            ))
+        db_session.add(LeaveRequest(
+            user_id=2, leave_type="Unpaid", start_date=date(2024, 6, 3), end_date=date(2024, 6, 3),
+            days_count=1, status="Approved", deleted_at=datetime.utcnow()
+        ))
+        db_session.commit()
+    
+    def test_statistics_for_range(self, db_session):
+        result = get_leave_statistics(db_session, date(2024, 1, 1), date(2024, 12, 31))
+        
+        assert result == {
+            "by_type": {"Casual": 1, "Sick": 2, "Vacation": 1},
+            "by_status": {"Approved": 2, "Pending": 1, "Rejected": 1},
+            "approval_rate": 50.0,
+            "average_days_per_employee": 4.5,
+            "total_requests": 4,
+            "total_days": 9,
+        }
+    
+    def test_department_filter(self, db_session):
+        result = get_leave_statistics(db_session, date(2024, 1, 1), date(2024, 12, 31), department="Sales")
+        
+        assert result["by_type"] == {"Casual": 1, "Sick": 1}
+        assert result["approval_rate"] == 0.0
+        assert result["average_days_per_employee"] == 2.0
+    
+    def test_no_requests(self, db_session):
+        result = get_leave_statistics(db_session, date(2019, 1, 1), date(2019, 12, 31))
+        
+        assert result == {
+            "by_type": {},
+            "by_status": {},
+            "approval_rate": 0.0,
+            "average_days_per_employee": 0.0,
+            "total_requests": 0,
+            "total_days": 0,
+        }
+    
+    def test_postgres_uses_grouping_sets(self):
+        statement = build_leave_statistics_statement("postgresql", date(2024, 1, 1), date(2024, 12, 31))
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        
+        assert "GROUPING SETS" in sql
+        assert "UNION" not in sql
@@ -0,0 +1,174 @@
+"""Unit tests for the async ports of the high-traffic routes."""
+import os
+import pytest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Set up test environment variables BEFORE importing api modules
+os.environ["JWT_SECRET_KEY"] = "test-secret-key-for-testing-only"
+os.environ["JWT_ALGORITHM"] = "HS256"
+os.environ["JWT_EXPIRATION_HOURS"] = "24"
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from api.async_routes import router
+from api.database import Base, get_async_db, get_async_database_url
+from api.models import User, Attendance, LeaveRequest, Notification
+from api.auth import hash_password, create_access_token
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Create a fresh SQLite database file with all tables."""
+    path = tmp_path / "async_test.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    return path
+
+
+@pytest.fixture
+def sync_session(db_path):
+    """Sync session on the test database for arranging and asserting data."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(db_path):
+    """Test client for an app serving only the async router."""
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+    
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    
+    with patch("api.async_routes.dispatch_event") as mock_dispatch:
+        test_client = TestClient(app)
+        test_client.dispatched = mock_dispatch
+        yield test_client
+
+
+@pytest.fixture
+def employee(sync_session):
+    """Create an employee and return (user_id, auth headers)."""
+    user = User(email="employee@test.com", password_hash=hash_password("Test1234"), role="Employee")
+    sync_session.add(user)
+    sync_session.commit()
+    token = create_access_token(user_id=user.id, role=user.role)
+    return user.id, {"Authorization": f"Bearer {token}"}
+
+
+class TestAsyncDatabaseUrl:
+    """Test async driver URL conversion."""
+    
+    def test_postgres_url_uses_asyncpg(self):
+        url = get_async_database_url("postgresql://user:pw@localhost:5432/db")
+        assert url == "postgresql+asyncpg://user:pw@localhost:5432/db"
+    
+    def test_sqlite_url_uses_aiosqlite(self):
+        assert get_async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    
+    def test_async_url_is_unchanged(self):
+        url = "postgresql+asyncpg://user:pw@localhost/db"
+        assert get_async_database_url(url) == url
+    
+    def test_unknown_scheme_raises(self):
+        with pytest.raises(ValueError):
+            get_async_database_url("oracle://user:pw@localhost/db")
+
+
+class TestAsyncAttendance:
+    """Test async check-in and check-out."""
+    
+    def test_check_in_success(self, client, employee, sync_session):
+        user_id, headers = employee
+        response = client.post("/api/attendance/check-in", headers=headers)
+        
+        assert response.status_code == 201
+        data = response.json()
+        assert data["date"] == date.today().isoformat()
+        
+        record = sync_session.query(Attendance).filter(Attendance.user_id == user_id).first()
+        assert record is not None
+        assert record.status == "Present"
+        client.dispatched.assert_called_once()
+    
+    def test_duplicate_check_in_rejected(self, client, employee):
+        _, headers = employee
+        client.post("/api/attendance/check-in", headers=headers)
+        response = client.post("/api/attendance/check-in", headers=headers)
+        
+        assert response.status_code == 400
+        assert "Already checked in" in response.json()["detail"]
+    
+    def test_check_out_without_check_in(self, client, employee):
+        _, headers = employee
+        response = client.post("/api/attendance/check-out", headers=headers)
+        
+        assert response.status_code == 400
+    
+    def test_check_out_marks_half_day(self, client, employee):
+        _, headers = employee
+        client.post("/api/attendance/check-in", headers=headers)
+        response = client.post("/api/attendance/check-out", headers=headers)
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "Half-day"
+
+
+class TestAsyncDashboardAndNotifications:
+    """Test async employee dashboard and notifications list."""
+    
+    def test_employee_dashboard(self, client, employee, sync_session):
+        user_id, headers = employee
+        today = date.today()
+        sync_session.add(Attendance(
+            user_id=user_id, date=today, check_in=datetime.utcnow(), status="Present"
+        ))
+        sync_session.add(LeaveRequest(
+            user_id=user_id, leave_type="Sick", start_date=today + timedelta(days=3),
+            end_date=today + timedelta(days=4), days_count=2, status="Pending"
+        ))
+        sync_session.commit()
+        
+        response = client.get("/api/dashboard/employee", headers=headers)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["attendance_summary"]["present"] == 1
+        assert data["pending_leaves_count"] == 1
+        assert data["today_status"]["checked_in"] is True
+        assert len(data["recent_leaves"]) == 1
+    
+    def test_notifications_counts(self, client, employee, sync_session):
+        user_id, headers = employee
+        for index in range(3):
+            sync_session.add(Notification(
+                user_id=user_id, notification_type="test",
+                message=f"Message {index}", is_read=index == 0
+            ))
+        sync_session.commit()
+        
+        response = client.get("/api/notifications?page=1&page_size=2", headers=headers)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3
+        assert data["unread_count"] == 2
+        assert len(data["notifications"]) == 2
@@ -0,0 +1,123 @@
+"""Unit tests for single-statement attendance writes."""
+import pytest
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base
+from api.models import User, Attendance
+from api.attendance_statements import build_check_in_statement, build_check_out_statement
+from api.query_metrics import start_collection, finish_collection, clear_route_stats, install_query_listeners
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Provide a session on an isolated SQLite database with one user."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'attendance.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    session.add(User(id=1, email="employee@example.com", password_hash="x", role="Employee"))
+    session.commit()
+
+    yield session
+
+    session.close()
+    engine.dispose()
+
+
+class TestCheckInStatement:
+    """Test the check-in upsert."""
+
+    def test_postgres_statement_uses_on_conflict_returning(self):
+        statement = build_check_in_statement("postgresql", 1, date(2024, 1, 15), datetime(2024, 1, 15, 9, 0))
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        assert "ON CONFLICT (user_id, date) DO NOTHING" in sql
+        assert "RETURNING attendance.id" in sql
+
+    def test_first_check_in_returns_row(self, db):
+        now = datetime(2024, 1, 15, 9, 0)
+        row = db.execute(build_check_in_statement("sqlite", 1, date(2024, 1, 15), now)).first()
+        db.commit()
+
+        assert row is not None
+        assert row.date == date(2024, 1, 15)
+        assert row.check_in == now
+        assert row.status == "Present"
+        assert db.query(Attendance).count() == 1
+
+    def test_duplicate_check_in_returns_no_row(self, db):
+        today = date(2024, 1, 15)
+        db.execute(build_check_in_statement("sqlite", 1, today, datetime(2024, 1, 15, 9, 0)))
+        db.commit()
+
+        row = db.execute(build_check_in_statement("sqlite", 1, today, datetime(2024, 1, 15, 9, 5))).first()
+
+        assert row is None
+        assert db.query(Attendance).count() == 1
+
+    def test_check_in_is_a_single_statement(self, db):
+        install_query_listeners()
+        collector, token = start_collection("/api/attendance/check-in")
+
+        db.execute(build_check_in_statement("sqlite", 1, date(2024, 1, 15), datetime(2024, 1, 15, 9, 0))).first()
+
+        finish_collection(collector, token)
+        clear_route_stats()
+        db.commit()
+
+        assert collector.statement_count == 1
+
+
+class TestCheckOutStatement:
+    """Test the check-out update."""
+
+    def check_in(self, db, check_in_time):
+        db.add(Attendance(user_id=1, date=date(2024, 1, 15), check_in=check_in_time, status="Present"))
+        db.commit()
+
+    def test_short_day_marked_half_day(self, db):
+        self.check_in(db, datetime(2024, 1, 15, 9, 0))
+        now = datetime(2024, 1, 15, 12, 30)
+
+        row = db.execute(build_check_out_statement(1, date(2024, 1, 15), now)).first()
+        db.commit()
+
+        assert row.check_out == now
+        assert row.status == "Half-day"
+
+    def test_full_day_marked_present(self, db):
+        self.check_in(db, datetime(2024, 1, 15, 9, 0))
+
+        row = db.execute(build_check_out_statement(1, date(2024, 1, 15), datetime(2024, 1, 15, 17, 0))).first()
+        db.commit()
+
+        assert row.status == "Present"
+        assert db.query(Attendance).one().status == "Present"
+
+    def test_exactly_four_hours_is_present(self, db):
+        self.check_in(db, datetime(2024, 1, 15, 9, 0))
+
+        row = db.execute(build_check_out_statement(1, date(2024, 1, 15), datetime(2024, 1, 15, 13, 0))).first()
+
+        assert row.status == "Present"
+
+    def test_no_check_in_returns_no_row(self, db):
+        row = db.execute(build_check_out_statement(1, date(2024, 1, 15), datetime(2024, 1, 15, 17, 0))).first()
+
+        assert row is None
+
+    def test_check_out_is_a_single_statement(self, db):
+        self.check_in(db, datetime(2024, 1, 15, 9, 0))
+        install_query_listeners()
+        collector, token = start_collection("/api/attendance/check-out")
+
+        db.execute(build_check_out_statement(1, date(2024, 1, 15), datetime(2024, 1, 15, 17, 0))).first()
+
+        finish_collection(collector, token)
+        clear_route_stats()
+        db.commit()
+
+        assert collector.statement_count == 1
@@ -0,0 +1,389 @@
+"""Unit tests for the dashboard aggregate queries and response caches."""
+import pytest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.index import app
+from api.auth import create_access_token
+from api.database import Base, get_db
+from api.models import User, Profile, Attendance, LeaveRequest
+from api.events import (
+    dispatch_event,
+    get_registered_handlers,
+    EVENT_ATTENDANCE_UPDATED,
+    EVENT_LEAVE_APPROVED,
+    EVENT_ROLE_CHANGED,
+)
+from api.dashboard_cache import (
+    TTLCache,
+    admin_dashboard_cache,
+    employee_dashboard_cache,
+    invalidate_admin_dashboard,
+    invalidate_employee_dashboard,
+    receive_invalidations,
+    register_cache_invalidation_handlers,
+)
+from api.dashboard_queries import (
+    build_admin_stats_statement,
+    build_employee_dashboard_statement,
+    employee_dashboard_from_rows,
+)
+from api.query_metrics import start_collection, finish_collection, clear_route_stats, install_query_listeners
+
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Provide a session factory on an isolated SQLite database with dashboard data."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'dashboard.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = factory()
+    db.add(User(id=1, email="admin@example.com", password_hash="x", role="Admin"))
+    db.add(Profile(user_id=1, employee_id="ADM00001", first_name="Test", last_name="Admin"))
+    statuses = ["Present", "Present", "Absent", "Half-day", "Leave"]
+    for index, attendance_status in enumerate(statuses):
+        user_id = index + 2
+        db.add(User(id=user_id, email=f"employee{user_id}@example.com", password_hash="x", role="Employee"))
+        db.add(Profile(
+            user_id=user_id,
+            employee_id=f"EMP{user_id:05d}",
+            first_name="Test",
+            last_name=f"Employee{user_id}",
+            department="Engineering"
+        ))
+        db.add(Attendance(user_id=user_id, date=TODAY, status=attendance_status))
+        # Yesterday's attendance must not be counted
+        db.add(Attendance(user_id=user_id, date=TODAY - timedelta(days=1), status="Present"))
+
+    db.add(LeaveRequest(
+        id=1, user_id=6, leave_type="Vacation", start_date=TODAY, end_date=TODAY,
+        days_count=1, status="Approved", created_at=datetime(2024, 1, 10, 9, 0)
+    ))
+    for leave_id in range(2, 5):
+        db.add(LeaveRequest(
+            id=leave_id, user_id=2, leave_type="Sick",
+            start_date=TODAY + timedelta(days=leave_id), end_date=TODAY + timedelta(days=leave_id),
+            days_count=1, status="Pending", created_at=datetime(2024, 1, 10, 9, leave_id)
+        ))
+    db.commit()
+    db.close()
+
+    yield factory
+
+    engine.dispose()
+
+
+class TestTTLCache:
+    """Test the in-process TTL cache."""
+
+    def test_get_returns_value_until_expiry(self):
+        cache = TTLCache(5)
+
+        with patch("api.dashboard_cache.time.monotonic", return_value=100.0):
+            cache.set("key", "value")
+            assert cache.get("key") == "value"
+
+        with patch("api.dashboard_cache.time.monotonic", return_value=105.0):
+            assert cache.get("key") is None
+
+    def test_zero_ttl_disables_cache(self):
+        cache = TTLCache(0)
+        cache.set("key", "value")
+
+        assert cache.get("key") is None
+
+    def test_invalidate_all_and_single_key(self):
+        cache = TTLCache(5)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+        cache.invalidate()
+        assert cache.get("b") is None
+
+    def test_cache_is_bounded(self):
+        cache = TTLCache(5, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") == 3
+
+
+class TestCrossWorkerInvalidation:
+    """Test that invalidations reach every worker through the push broker."""
+
+    @pytest.fixture(autouse=True)
+    def caches(self, monkeypatch):
+        monkeypatch.setattr(admin_dashboard_cache, "ttl_seconds", 60)
+        monkeypatch.setattr(employee_dashboard_cache, "ttl_seconds", 60)
+        admin_dashboard_cache.set("page", "admin")
+        employee_dashboard_cache.set(2, "employee 2")
+        employee_dashboard_cache.set(3, "employee 3")
+        yield
+        admin_dashboard_cache.invalidate()
+        employee_dashboard_cache.invalidate()
+
+    def test_invalidations_are_published(self):
+        with patch("api.dashboard_cache._cache_broker") as broker:
+            invalidate_admin_dashboard({"user_id": 2})
+            invalidate_employee_dashboard({"user_id": 2})
+
+        assert broker.publish.call_args_list[0].args == ([{"cache": "admin"}],)
+        assert broker.publish.call_args_list[1].args == ([{"cache": "employee", "user_id": 2}],)
+
+    def test_invalidation_from_another_worker_applies(self):
+        receive_invalidations([{"cache": "employee", "user_id": 2}])
+
+        assert employee_dashboard_cache.get(2) is None
+        assert employee_dashboard_cache.get(3) == "employee 3"
+        assert admin_dashboard_cache.get("page") == "admin"
+
+        receive_invalidations([{"cache": "admin"}])
+
+        assert admin_dashboard_cache.get("page") is None
+
+    def test_publish_failure_still_invalidates_locally(self):
+        with patch("api.dashboard_cache._cache_broker") as broker:
+            broker.publish.side_effect = RuntimeError("broker down")
+            invalidate_admin_dashboard()
+
+        assert admin_dashboard_cache.get("page") is None
+
+
+class TestAdminStatsStatement:
+    """Test the single-statement admin dashboard counts."""
+
+    def test_counts_match_data(self, session_factory):
+        db = session_factory()
+
+        row = db.execute(build_admin_stats_statement(TODAY)).one()
+
+        assert row.total_employees == 5
+        assert row.on_leave_today == 1
+        assert row.pending_approvals == 3
+        assert (row.present, row.absent, row.leave, row.half_day) == (2, 1, 1, 1)
+        db.close()
+
+    def test_day_without_attendance_returns_zero_counts(self, session_factory):
+        db = session_factory()
+
+        row = db.execute(build_admin_stats_statement(TODAY + timedelta(days=30))).one()
+
+        assert row.total_employees == 5
+        assert (row.present, row.absent, row.leave, row.half_day) == (0, 0, 0, 0)
+        db.close()
+
+    def test_counts_are_a_single_statement(self, session_factory):
+        db = session_factory()
+        install_query_listeners()
+        collector, token = start_collection("/api/dashboard/admin")
+
+        db.execute(build_admin_stats_statement(TODAY)).one()
+
+        finish_collection(collector, token)
+        clear_route_stats()
+        db.close()
+
+        assert collector.statement_count == 1
+
+
+class TestEmployeeDashboardStatement:
+    """Test the single-statement employee dashboard."""
+
+    def fetch(self, db, user_id):
+        rows = db.execute(build_employee_dashboard_statement(user_id, TODAY)).all()
+        return employee_dashboard_from_rows(user_id, TODAY, rows)
+
+    def test_payload_matches_data(self, session_factory):
+        db = session_factory()
+
+        dashboard = self.fetch(db, 2)
+
+        # Yesterday only counts towards this month's summary after the 1st
+        assert dashboard.attendance_summary.present == (2 if TODAY.day > 1 else 1)
+        assert dashboard.attendance_summary.absent == 0
+        assert dashboard.pending_leaves_count == 3
+        assert dashboard.today_status.checked_in is True
+        assert dashboard.today_status.checked_out is False
+        assert [r.date for r in dashboard.recent_attendance] == [TODAY, TODAY - timedelta(days=1)]
+        assert [r.id for r in dashboard.recent_leaves] == [4, 3, 2]
+        assert dashboard.recent_leaves[0].leave_type == "Sick"
+        db.close()
+
+    def test_user_without_records(self, session_factory):
+        db = session_factory()
+
+        dashboard = self.fetch(db, 1)
+
+        assert dashboard.attendance_summary.present == 0
+        assert dashboard.pending_leaves_count == 0
+        assert dashboard.today_status.checked_in is False
+        assert dashboard.recent_attendance == []
+        assert dashboard.recent_leaves == []
+        db.close()
+
+    def test_recent_lists_are_capped(self, session_factory):
+        db = session_factory()
+        for days_ago in range(2, 10):
+            db.add(Attendance(user_id=2, date=TODAY - timedelta(days=days_ago), status="Present"))
+        db.commit()
+
+        dashboard = self.fetch(db, 2)
+
+        assert len(dashboard.recent_attendance) == 5
+        assert dashboard.recent_attendance[-1].date == TODAY - timedelta(days=4)
+        db.close()
+
+    def test_dashboard_is_a_single_statement(self, session_factory):
+        db = session_factory()
+        install_query_listeners()
+        collector, token = start_collection("/api/dashboard/employee")
+
+        db.execute(build_employee_dashboard_statement(2, TODAY)).all()
+
+        finish_collection(collector, token)
+        clear_route_stats()
+        db.close()
+
+        assert collector.statement_count == 1
+
+
+class TestDashboardEndpoints:
+    """Test pending list paging and response caching on the dashboards."""
+
+    @pytest.fixture
+    def client(self, session_factory):
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        # Other test modules may have cleared the application's handlers
+        if invalidate_admin_dashboard not in get_registered_handlers(EVENT_ATTENDANCE_UPDATED):
+            register_cache_invalidation_handlers()
+
+        previous = app.dependency_overrides.get(get_db)
+        app.dependency_overrides[get_db] = override_get_db
+        admin_dashboard_cache.invalidate()
+        employee_dashboard_cache.invalidate()
+        yield TestClient(app)
+        for cache in (admin_dashboard_cache, employee_dashboard_cache):
+            cache.ttl_seconds = 0
+            cache.invalidate()
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
+
+    @pytest.fixture
+    def headers(self):
+        return {"Authorization": f"Bearer {create_access_token(1, 'Admin')}"}
+
+    def test_pending_list_is_capped_with_cursor(self, client, headers):
+        first = client.get("/api/dashboard/admin?pending_limit=2", headers=headers).json()
+
+        assert first["stats"]["present_today"] == 2
+        assert first["stats"]["pending_approvals"] == 3
+        assert [r["id"] for r in first["pending_leave_requests"]] == [4, 3]
+        assert first["pending_next_cursor"]
+
+        second = client.get(
+            f"/api/dashboard/admin?pending_limit=2&pending_cursor={first['pending_next_cursor']}",
+            headers=headers
+        ).json()
+
+        assert [r["id"] for r in second["pending_leave_requests"]] == [2]
+        assert second["pending_next_cursor"] is None
+
+    def test_invalid_pending_limit_returns_400(self, client, headers):
+        response = client.get("/api/dashboard/admin?pending_limit=0", headers=headers)
+
+        assert response.status_code == 400
+
+    def test_cached_response_until_event(self, client, headers, session_factory):
+        admin_dashboard_cache.ttl_seconds = 60
+        first = client.get("/api/dashboard/admin", headers=headers).json()
+
+        db = session_factory()
+        db.query(Attendance).filter(
+            Attendance.date == TODAY, Attendance.status == "Absent"
+        ).update({"status": "Present"})
+        db.commit()
+        db.close()
+
+        cached = client.get("/api/dashboard/admin", headers=headers).json()
+        assert cached == first
+
+        dispatch_event(EVENT_ATTENDANCE_UPDATED, {"user_id": 4})
+
+        refreshed = client.get("/api/dashboard/admin", headers=headers).json()
+        assert refreshed["stats"]["present_today"] == 3
+
+    def test_leave_event_invalidates(self, client, headers):
+        admin_dashboard_cache.ttl_seconds = 60
+        client.get("/api/dashboard/admin", headers=headers)
+
+        dispatch_event(EVENT_LEAVE_APPROVED, {"leave_request_id": 2})
+
+        assert len(admin_dashboard_cache._entries) == 0
+
+    def test_role_change_invalidates(self, client, headers):
+        admin_dashboard_cache.ttl_seconds = 60
+        client.get("/api/dashboard/admin", headers=headers)
+
+        dispatch_event(EVENT_ROLE_CHANGED, {"user_id": 2, "old_role": "Employee", "new_role": "Admin", "changed_by": 1})
+
+        assert len(admin_dashboard_cache._entries) == 0
+
+    def test_employee_creation_invalidates(self, client, headers):
+        admin_dashboard_cache.ttl_seconds = 60
+        total = client.get("/api/dashboard/admin", headers=headers).json()["stats"]["total_employees"]
+
+        response = client.post("/api/employees", headers=headers, json={
+            "email": "new.hire@example.com",
+            "password": "Password123!",
+            "first_name": "New",
+            "last_name": "Hire"
+        })
+
+        assert response.status_code == 201
+        refreshed = client.get("/api/dashboard/admin", headers=headers).json()
+        assert refreshed["stats"]["total_employees"] == total + 1
+
+    def test_employee_cache_invalidated_per_user(self, client, session_factory):
+        employee_dashboard_cache.ttl_seconds = 60
+        headers_2 = {"Authorization": f"Bearer {create_access_token(2, 'Employee')}"}
+        headers_3 = {"Authorization": f"Bearer {create_access_token(3, 'Employee')}"}
+
+        assert client.get("/api/dashboard/employee", headers=headers_2).json()["pending_leaves_count"] == 3
+        client.get("/api/dashboard/employee", headers=headers_3)
+
+        db = session_factory()
+        db.query(LeaveRequest).filter(LeaveRequest.id == 4).update({"status": "Approved"})
+        db.commit()
+        db.close()
+
+        assert client.get("/api/dashboard/employee", headers=headers_2).json()["pending_leaves_count"] == 3
+
+        dispatch_event(EVENT_LEAVE_APPROVED, {"user_id": 2, "request_id": 4})
+
+        assert employee_dashboard_cache.get(3) is not None
+        assert client.get("/api/dashboard/employee", headers=headers_2).json()["pending_leaves_count"] == 2
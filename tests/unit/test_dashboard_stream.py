@@ -0,0 +1,263 @@
+"""Unit tests for the admin dashboard SSE stream."""
+import asyncio
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.index import app
+from api.auth import create_access_token, create_scoped_token, decode_access_token
+from api.database import Base
+from api.models import User, Attendance
+from api.events import dispatch_event, EVENT_ATTENDANCE_UPDATED
+from api.v2_dashboard import get_stream_user, STREAM_TOKEN_SCOPE
+from api.dashboard_stream import (
+    DashboardBroadcaster,
+    load_dashboard_counters,
+    diff_counters,
+    format_sse,
+)
+
+
+def counters(present=0, pending=0):
+    return {
+        "stats": {"total_employees": 3, "present_today": present, "on_leave_today": 0, "pending_approvals": pending},
+        "attendance_overview": {"present": present, "absent": 0, "leave": 0, "half_day": 0},
+    }
+
+
+class FakeCounters:
+    """Counter source whose values the test controls."""
+
+    def __init__(self):
+        self.current = counters()
+        self.loads = 0
+
+    def __call__(self, today=None):
+        self.loads += 1
+        return self.current
+
+
+@pytest.fixture
+def source():
+    fake = FakeCounters()
+    with patch("api.dashboard_stream.load_dashboard_counters", fake), \
+            patch("api.dashboard_stream.COALESCE_SECONDS", 0):
+        yield fake
+
+
+async def next_message(queue):
+    return await asyncio.wait_for(queue.get(), timeout=2)
+
+
+class TestCounters:
+    """Test counter loading and diffing."""
+
+    def test_load_counts_from_database(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'stream.db'}")
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        db = factory()
+        db.add(User(id=1, email="employee@example.com", password_hash="x", role="Employee"))
+        db.add(Attendance(user_id=1, date=date.today(), status="Half-day"))
+        db.commit()
+        db.close()
+
+        with patch("api.dashboard_stream.get_session_factory", return_value=factory):
+            loaded = load_dashboard_counters()
+
+        engine.dispose()
+        assert loaded["stats"]["total_employees"] == 1
+        assert loaded["stats"]["present_today"] == 0
+        assert loaded["attendance_overview"]["half_day"] == 1
+
+    def test_diff_only_contains_changes(self):
+        delta = diff_counters(counters(present=2, pending=1), counters(present=3, pending=0))
+
+        assert delta == {
+            "stats": {"present_today": 1, "pending_approvals": -1},
+            "attendance_overview": {"present": 1},
+        }
+        assert diff_counters(counters(), counters()) == {}
+
+    def test_format_sse(self):
+        assert format_sse("delta", {"stats": {"present_today": 1}}) == \
+            'event: delta\ndata: {"stats":{"present_today":1}}\n\n'
+
+
+class TestDashboardBroadcaster:
+    """Test snapshot and delta fan-out."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_on_subscribe(self, source):
+        broadcaster = DashboardBroadcaster()
+        queue = await broadcaster.subscribe()
+
+        assert await next_message(queue) == ("snapshot", counters())
+        broadcaster.unsubscribe(queue)
+
+    @pytest.mark.asyncio
+    async def test_event_pushes_delta_to_every_subscriber(self, source):
+        broadcaster = DashboardBroadcaster()
+        first = await broadcaster.subscribe()
+        second = await broadcaster.subscribe()
+        await next_message(first)
+        await next_message(second)
+
+        source.current = counters(present=1)
+        broadcaster.notify({"user_id": 1})
+
+        expected = ("delta", {"stats": {"present_today": 1}, "attendance_overview": {"present": 1}})
+        assert await next_message(first) == expected
+        assert await next_message(second) == expected
+        # One recomputation serves all subscribers
+        assert source.loads == 2
+
+        broadcaster.unsubscribe(first)
+        broadcaster.unsubscribe(second)
+
+    @pytest.mark.asyncio
+    async def test_dispatched_event_reaches_subscriber(self, source):
+        broadcaster = DashboardBroadcaster()
+        queue = await broadcaster.subscribe()
+        await next_message(queue)
+
+        source.current = counters(pending=1)
+        await asyncio.to_thread(dispatch_event, EVENT_ATTENDANCE_UPDATED, {"user_id": 1})
+
+        assert await next_message(queue) == ("delta", {"stats": {"pending_approvals": 1}})
+        broadcaster.unsubscribe(queue)
+
+    @pytest.mark.asyncio
+    async def test_unchanged_counters_send_nothing(self, source):
+        broadcaster = DashboardBroadcaster()
+        queue = await broadcaster.subscribe()
+        await next_message(queue)
+
+        await broadcaster.refresh()
+
+        assert queue.empty()
+        broadcaster.unsubscribe(queue)
+
+    @pytest.mark.asyncio
+    async def test_last_unsubscribe_stops_broadcaster(self, source):
+        broadcaster = DashboardBroadcaster()
+        queue = await broadcaster.subscribe()
+
+        broadcaster.unsubscribe(queue)
+        broadcaster.notify({"user_id": 1})
+
+        assert broadcaster.subscriber_count == 0
+        assert broadcaster._task is None
+        assert broadcaster._snapshot is None
+
+    @pytest.mark.asyncio
+    async def test_failed_first_snapshot_stops_broadcaster(self):
+        broadcaster = DashboardBroadcaster()
+        started = []
+        start = broadcaster._start
+
+        def start_and_keep_task():
+            start()
+            started.append(broadcaster._task)
+
+        broadcaster._start = start_and_keep_task
+
+        with patch("api.dashboard_stream.load_dashboard_counters", side_effect=RuntimeError("db down")):
+            with pytest.raises(RuntimeError):
+                await broadcaster.subscribe()
+        await asyncio.wait(started, timeout=2)
+
+        assert broadcaster.subscriber_count == 0
+        assert broadcaster._task is None
+        assert started[0].cancelled()
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_resynchronized_with_snapshot(self, source):
+        broadcaster = DashboardBroadcaster()
+        queue = await broadcaster.subscribe()
+
+        with patch("api.dashboard_stream.SUBSCRIBER_QUEUE_SIZE", 2):
+            slow = await broadcaster.subscribe()
+        for present in range(1, 4):
+            source.current = counters(present=present)
+            await broadcaster.refresh()
+
+        # The overflowing delta replaced the backlog; later deltas follow the snapshot
+        assert await next_message(slow) == ("snapshot", counters(present=2))
+        assert await next_message(slow) == ("delta", {"stats": {"present_today": 1}, "attendance_overview": {"present": 1}})
+        assert slow.empty()
+        broadcaster.unsubscribe(queue)
+        broadcaster.unsubscribe(slow)
+
+
+class TestStreamEndpoint:
+    """Test access to the stream endpoint."""
+
+    def test_employee_forbidden(self):
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {create_access_token(1, 'Employee')}"}
+
+        response = client.get("/api/v2/dashboard/stream", headers=headers)
+
+        assert response.status_code == 403
+
+    def test_stream_token_issued_to_admin(self):
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {create_access_token(1, 'Admin')}"}
+
+        response = client.post("/api/v2/dashboard/stream-token", headers=headers)
+
+        assert response.status_code == 200
+        payload = decode_access_token(response.json()["token"], scope=STREAM_TOKEN_SCOPE)
+        assert (payload["user_id"], payload["role"]) == (1, "Admin")
+
+    def test_query_token_authenticates_stream(self):
+        token = create_scoped_token(1, "Admin", STREAM_TOKEN_SCOPE, 60)
+
+        assert get_stream_user(token=token, credentials=None) == {"user_id": 1, "role": "Admin"}
+
+    def test_event_source_connects_with_query_token(self, source):
+        client = TestClient(app)
+        token = create_scoped_token(1, "Admin", STREAM_TOKEN_SCOPE, 60)
+
+        # End the stream after the first event
+        with patch("starlette.requests.Request.is_disconnected", AsyncMock(side_effect=[False, True])):
+            response = client.get(f"/api/v2/dashboard/stream?token={token}")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.startswith("event: snapshot")
+
+    def test_employee_query_token_forbidden(self):
+        client = TestClient(app)
+        token = create_scoped_token(1, "Employee", STREAM_TOKEN_SCOPE, 60)
+
+        response = client.get(f"/api/v2/dashboard/stream?token={token}")
+
+        assert response.status_code == 403
+
+    def test_access_token_rejected_in_query(self):
+        client = TestClient(app)
+
+        response = client.get(f"/api/v2/dashboard/stream?token={create_access_token(1, 'Admin')}")
+
+        assert response.status_code == 401
+
+    def test_expired_query_token_rejected(self):
+        client = TestClient(app)
+        token = create_scoped_token(1, "Admin", STREAM_TOKEN_SCOPE, -1)
+
+        response = client.get(f"/api/v2/dashboard/stream?token={token}")
+
+        assert response.status_code == 401
+
+    def test_stream_token_rejected_as_access_token(self):
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {create_scoped_token(1, 'Admin', STREAM_TOKEN_SCOPE, 60)}"}
+
+        response = client.post("/api/v2/dashboard/stream-token", headers=headers)
+
+        assert response.status_code == 401
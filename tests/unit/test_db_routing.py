@@ -0,0 +1,150 @@
+"""Unit tests for read-replica routing."""
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+import api.db_routing as db_routing
+from api.db_routing import (
+    record_write,
+    receive_writes,
+    has_recent_write,
+    should_use_replica,
+    clear_recent_writes,
+    cookie_has_recent_write,
+    read_db,
+    ROUTE_ADMIN_DASHBOARD,
+    ROUTE_EXPORTS,
+    LAST_WRITE_COOKIE,
+)
+from fastapi.testclient import TestClient
+
+from api.index import app
+from api.auth import create_access_token
+
+
+@pytest.fixture(autouse=True)
+def replica_configured(monkeypatch):
+    """Configure a replica URL and a clean read-your-writes guard."""
+    monkeypatch.setattr(db_routing, "DATABASE_REPLICA_URL", "postgresql://replica/db")
+    monkeypatch.setattr(db_routing, "REPLICA_STICKY_SECONDS", 10.0)
+    monkeypatch.setattr(db_routing, "REPLICA_ROUTES", {ROUTE_ADMIN_DASHBOARD})
+    clear_recent_writes()
+    yield
+    clear_recent_writes()
+
+
+class TestRoutingPolicy:
+    """Test route selection between primary and replica."""
+    
+    def test_routed_route_uses_replica(self):
+        assert should_use_replica(ROUTE_ADMIN_DASHBOARD, 1) is True
+    
+    def test_unrouted_route_uses_primary(self):
+        assert should_use_replica(ROUTE_EXPORTS, 1) is False
+    
+    def test_no_replica_configured_uses_primary(self, monkeypatch):
+        monkeypatch.setattr(db_routing, "DATABASE_REPLICA_URL", None)
+        assert should_use_replica(ROUTE_ADMIN_DASHBOARD, 1) is False
+    
+    def test_parse_replica_routes(self):
+        assert db_routing._parse_replica_routes(None) == db_routing.DEFAULT_REPLICA_ROUTES
+        assert db_routing._parse_replica_routes("analytics, exports,") == {"analytics", "exports"}
+        assert db_routing._parse_replica_routes("") == set()
+
+
+class TestReadYourWrites:
+    """Test the read-your-writes guard."""
+    
+    def test_recent_write_pins_user_to_primary(self):
+        record_write(1)
+        
+        assert has_recent_write(1) is True
+        assert should_use_replica(ROUTE_ADMIN_DASHBOARD, 1) is False
+        # Other users are unaffected
+        assert should_use_replica(ROUTE_ADMIN_DASHBOARD, 2) is True
+    
+    def test_write_expires_after_window(self):
+        with patch("api.db_routing.time.monotonic", return_value=100.0):
+            record_write(1)
+        
+        with patch("api.db_routing.time.monotonic", return_value=111.0):
+            assert has_recent_write(1) is False
+            assert should_use_replica(ROUTE_ADMIN_DASHBOARD, 1) is True
+    
+    def test_write_is_published_to_other_workers(self):
+        with patch("api.db_routing._guard_broker") as broker:
+            record_write(1)
+        
+        broker.publish.assert_called_once_with([{"user_id": 1}])
+    
+    def test_write_published_by_another_worker_pins_user(self):
+        # A write recorded elsewhere, e.g. an admin approving user 2's leave
+        receive_writes([{"user_id": 2}])
+        
+        assert has_recent_write(2) is True
+        assert should_use_replica(ROUTE_ADMIN_DASHBOARD, 2) is False
+    
+    def test_publish_failure_still_records_locally(self):
+        with patch("api.db_routing._guard_broker") as broker:
+            broker.publish.side_effect = RuntimeError("broker down")
+            record_write(1)
+        
+        assert has_recent_write(1) is True
+    
+    def test_last_write_cookie_pins_reads_on_any_worker(self):
+        # No write recorded in this process, only the client's cookie
+        with patch("api.db_routing.time.time", return_value=1000.0):
+            assert should_use_replica(ROUTE_ADMIN_DASHBOARD, 1, "995.0") is False
+            assert should_use_replica(ROUTE_ADMIN_DASHBOARD, 1, "989.0") is True
+    
+    def test_malformed_cookie_ignored(self):
+        assert cookie_has_recent_write("not-a-time") is False
+        assert cookie_has_recent_write(None) is False
+    
+    def test_successful_write_request_sets_cookie(self):
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {create_access_token(1, 'Admin')}"}
+        
+        response = client.post("/api/v2/dashboard/stream-token", headers=headers)
+        
+        assert response.status_code == 200
+        assert cookie_has_recent_write(response.cookies.get(LAST_WRITE_COOKIE)) is True
+    
+    def test_failed_write_request_sets_no_cookie(self):
+        client = TestClient(app)
+        
+        response = client.post("/api/auth/login", json={"email": "nobody@example.com", "password": "Password123!"})
+        
+        assert response.status_code >= 400
+        assert LAST_WRITE_COOKIE not in response.cookies
+
+
+class TestReadDbDependency:
+    """Test the read_db dependency factory."""
+    
+    def test_yields_primary_session_when_not_routed(self):
+        primary = MagicMock()
+        dependency = read_db(ROUTE_EXPORTS)
+        
+        generator = dependency(current_user={"user_id": 1, "role": "Admin"}, db=primary, last_write_at=None)
+        assert next(generator) is primary
+    
+    def test_yields_primary_session_after_cookie_write(self, monkeypatch):
+        primary = MagicMock()
+        monkeypatch.setattr(db_routing, "get_replica_session_factory", lambda: pytest.fail("replica used"))
+        dependency = read_db(ROUTE_ADMIN_DASHBOARD)
+        
+        generator = dependency(current_user={"user_id": 1, "role": "Admin"}, db=primary, last_write_at=f"{time.time():.3f}")
+        assert next(generator) is primary
+    
+    def test_yields_replica_session_when_routed(self, monkeypatch):
+        replica = MagicMock()
+        monkeypatch.setattr(db_routing, "get_replica_session_factory", lambda: lambda: replica)
+        dependency = read_db(ROUTE_ADMIN_DASHBOARD)
+        
+        generator = dependency(current_user={"user_id": 1, "role": "Admin"}, db=MagicMock(), last_write_at=None)
+        assert next(generator) is replica
+        
+        with pytest.raises(StopIteration):
+            next(generator)
+        replica.close.assert_called_once()
@@ -0,0 +1,216 @@
+"""Unit tests for conditional GET on polled endpoints."""
+import pytest
+from datetime import date, datetime
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.index import app
+from api.auth import create_access_token
+from api.database import Base, get_db
+from api.models import User, Notification
+from api.events import dispatch_event, get_registered_handlers, EVENT_PAYSLIP_GENERATED
+from api.etags import (
+    etag_matches,
+    get_data_version,
+    bump_data_version,
+    receive_data_versions,
+    register_version_handlers,
+    track_request_events,
+)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Provide a session factory on an isolated SQLite database with notifications."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'etags.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = factory()
+    db.add(User(id=1, email="employee@example.com", password_hash="x", role="Employee"))
+    for index in range(3):
+        db.add(Notification(
+            id=index + 1,
+            user_id=1,
+            notification_type="leave_approved",
+            message=f"Notification {index + 1}",
+            created_at=datetime(2024, 1, 15, 9, index)
+        ))
+    db.commit()
+    db.close()
+
+    yield factory
+
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory):
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Other test modules may have cleared the application's handlers
+    if bump_data_version not in get_registered_handlers(EVENT_PAYSLIP_GENERATED):
+        register_version_handlers()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+
+
+def auth_headers(user_id=1, role="Employee"):
+    return {"Authorization": f"Bearer {create_access_token(user_id, role)}"}
+
+
+class TestEtagMatching:
+    """Test If-None-Match comparison."""
+
+    def test_weak_comparison(self):
+        assert etag_matches('W/"abc"', 'W/"abc"')
+        assert etag_matches('"abc"', 'W/"abc"')
+        assert etag_matches('"x", W/"abc"', 'W/"abc"')
+        assert etag_matches("*", 'W/"abc"')
+
+    def test_mismatch_or_missing(self):
+        assert not etag_matches('W/"other"', 'W/"abc"')
+        assert not etag_matches(None, 'W/"abc"')
+        assert not etag_matches("", 'W/"abc"')
+
+
+class TestConditionalGet:
+    """Test 304 responses on the notifications list."""
+
+    def test_unchanged_poll_returns_304(self, client):
+        headers = auth_headers()
+        first = client.get("/api/notifications", headers=headers)
+
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "private, no-cache"
+
+        second = client.get("/api/notifications", headers={**headers, "If-None-Match": etag})
+
+        assert second.status_code == 304
+        assert second.headers["etag"] == etag
+        assert second.content == b""
+
+    def test_304_carries_cors_headers(self, client):
+        headers = {**auth_headers(), "Origin": "http://localhost:3000"}
+        etag = client.get("/api/notifications", headers=headers).headers["etag"]
+
+        response = client.get("/api/notifications", headers={**headers, "If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert "access-control-allow-origin" in response.headers
+
+    def test_304_skips_the_endpoint(self, client):
+        headers = auth_headers()
+        etag = client.get("/api/notifications", headers=headers).headers["etag"]
+
+        with patch.dict(app.dependency_overrides, {get_db: lambda: pytest.fail("database used")}):
+            response = client.get("/api/notifications", headers={**headers, "If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    def test_etag_differs_per_query_and_user(self, client):
+        first_page = client.get("/api/notifications?page=1&page_size=2", headers=auth_headers())
+        second_page = client.get("/api/notifications?page=2&page_size=2", headers=auth_headers())
+        other_user = client.get("/api/notifications?page=1&page_size=2", headers=auth_headers(2))
+
+        assert len({first_page.headers["etag"], second_page.headers["etag"], other_user.headers["etag"]}) == 3
+
+    def test_write_request_invalidates(self, client):
+        headers = auth_headers()
+        etag = client.get("/api/notifications", headers=headers).headers["etag"]
+        version = get_data_version()
+
+        assert client.post("/api/notifications/1/read", headers=headers).status_code == 200
+        assert get_data_version() != version
+
+        response = client.get("/api/notifications", headers={**headers, "If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.json()["unread_count"] == 2
+
+    def test_version_published_by_another_worker_invalidates(self, client):
+        headers = auth_headers()
+        etag = client.get("/api/notifications", headers=headers).headers["etag"]
+
+        receive_data_versions([{"version": "published-by-another-worker"}])
+
+        assert get_data_version() == "published-by-another-worker"
+        response = client.get("/api/notifications", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_bump_is_published_to_other_workers(self):
+        with patch("api.etags._version_broker") as broker:
+            bump_data_version()
+
+        broker.publish.assert_called_once_with([{"version": get_data_version()}])
+
+    def test_etag_changes_at_midnight(self, client):
+        headers = auth_headers()
+        with patch("api.etags.date") as mock_date:
+            mock_date.today.return_value = date(2024, 1, 15)
+            etag = client.get("/api/dashboard/employee", headers=headers).headers["etag"]
+
+            mock_date.today.return_value = date(2024, 1, 16)
+            response = client.get("/api/dashboard/employee", headers={**headers, "If-None-Match": etag})
+
+        assert response.status_code != 304
+        assert response.headers.get("etag") != etag
+
+    def test_login_does_not_bump(self, client):
+        version = get_data_version()
+
+        client.post("/api/auth/login", json={"email": "nobody@example.com", "password": "Password123!"})
+
+        assert get_data_version() == version
+
+    def test_event_bumps_once_for_its_request(self, client):
+        with patch("api.etags._version_broker") as broker:
+            dispatched = track_request_events()
+            dispatch_event(EVENT_PAYSLIP_GENERATED, {"user_id": 1})
+
+        # Noted for the request, so its middleware does not bump again
+        assert dispatched == [{"user_id": 1}]
+        assert broker.publish.call_count == 1
+
+    def test_etag_stable_without_writes(self, client):
+        headers = auth_headers()
+
+        assert client.get("/api/notifications", headers=headers).headers["etag"] == \
+            client.get("/api/notifications", headers=headers).headers["etag"]
+
+    def test_dispatched_event_invalidates(self, client):
+        headers = auth_headers()
+        etag = client.get("/api/notifications", headers=headers).headers["etag"]
+
+        dispatch_event(EVENT_PAYSLIP_GENERATED, {"user_id": 1})
+
+        response = client.get("/api/notifications", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_unauthenticated_request_not_short_circuited(self, client):
+        response = client.get("/api/notifications", headers={"If-None-Match": "*"})
+
+        assert response.status_code in (401, 403)
+        assert "etag" not in response.headers
+
+    def test_other_paths_have_no_etag(self, client):
+        response = client.get("/api/attendance/me", headers=auth_headers())
+
+        assert "etag" not in response.headers
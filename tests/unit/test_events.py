@@ -2,12 +2,16 @@
 
 Requirements: 26.1, 26.2, 26.3, 26.4, 26.5, 26.6, 26.7
 """
+import threading
 import pytest
+from unittest.mock import MagicMock, patch
 from api.events import (
     register_handler,
     dispatch_event,
     clear_handlers,
     get_registered_handlers,
+    defer_registration,
+    EventBus,
     EVENT_LEAVE_REQUESTED,
     EVENT_LEAVE_APPROVED,
     EVENT_LEAVE_REJECTED,
@@ -148,6 +152,54 @@ class TestEventDispatching:
         assert handler2_called[0] == test_payload
 
 
+class TestDeferredRegistration:
+    """Test handler registration deferred until first use."""
+    
+    def test_deferred_registration_runs_on_first_dispatch(self):
+        """Test that deferred registrations run once, before the first dispatch."""
+        registrations = []
+        handler_called = []
+        
+        def register() -> None:
+            registrations.append(True)
+            register_handler(EVENT_LEAVE_REQUESTED, handler_called.append)
+        
+        defer_registration(register)
+        assert registrations == []
+        
+        dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 123})
+        dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 456})
+        
+        assert len(registrations) == 1
+        assert handler_called == [{"user_id": 123}, {"user_id": 456}]
+    
+    def test_get_registered_handlers_runs_deferred_registration(self):
+        """Test that querying handlers runs pending registrations."""
+        def handler(payload: dict) -> None:
+            pass
+        
+        defer_registration(lambda: register_handler(EVENT_LEAVE_APPROVED, handler))
+        
+        assert get_registered_handlers(EVENT_LEAVE_APPROVED) == [handler]
+    
+    def test_clear_handlers_drops_pending_registrations(self):
+        """Test that clear_handlers also discards deferred registrations."""
+        defer_registration(lambda: register_handler(EVENT_LEAVE_APPROVED, lambda payload: None))
+        clear_handlers()
+        
+        assert get_registered_handlers(EVENT_LEAVE_APPROVED) == []
+    
+    def test_failing_registration_does_not_break_dispatch(self):
+        """Test that a failing deferred registration is logged, not raised."""
+        def register() -> None:
+            raise RuntimeError("registration failed")
+        
+        defer_registration(register)
+        
+        # Should not raise exception
+        dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 123})
+
+
 class TestSupportedEventTypes:
     """Test that all required event types are supported."""
     
@@ -255,3 +307,115 @@ class TestEventIntegration:
         
         assert len(received_payload) == 1
         assert received_payload[0] == expected_payload
+
+
+class TestSessionHandlers:
+    """Test dispatcher-owned database sessions."""
+    
+    def test_session_handler_gets_dispatcher_session(self):
+        """Test that with_session handlers share one session, closed after delivery."""
+        session = MagicMock()
+        received = []
+        
+        register_handler(EVENT_LEAVE_REQUESTED, lambda payload: received.append(payload["db"]), with_session=True)
+        register_handler(EVENT_LEAVE_REQUESTED, lambda payload: received.append(payload["db"]), with_session=True)
+        
+        with patch("api.database.get_session_factory", return_value=lambda: session):
+            dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 123})
+        
+        assert received == [session, session]
+        session.close.assert_called_once()
+    
+    def test_caller_session_is_not_passed_on(self):
+        """Test that a db key in the dispatched payload is dropped."""
+        received_payload = []
+        
+        register_handler(EVENT_LEAVE_REQUESTED, received_payload.append)
+        
+        dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 123, "db": object()})
+        
+        assert received_payload == [{"user_id": 123}]
+    
+    def test_plain_handlers_do_not_open_a_session(self):
+        """Test that no session is opened when no handler needs one."""
+        register_handler(EVENT_LEAVE_REQUESTED, lambda payload: None)
+        
+        with patch("api.database.get_session_factory") as mock_factory:
+            dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 123})
+        
+        mock_factory.assert_not_called()
+
+
+class TestBackgroundDispatch:
+    """Test background dispatch on the event bus."""
+    
+    @pytest.fixture
+    def bus(self):
+        bus = EventBus(workers=2, max_size=10, put_timeout=0.01)
+        with patch("api.events.EVENT_DISPATCH_MODE", "background"), patch("api.events.event_bus", bus):
+            yield bus
+        bus.shutdown(timeout=5)
+    
+    def test_queued_handler_runs_off_the_dispatching_thread(self, bus):
+        """Test that dispatch returns before queued handlers run on a worker."""
+        release = threading.Event()
+        handled = []
+        
+        def slow_handler(payload: dict) -> None:
+            release.wait(5)
+            handled.append(threading.current_thread().name)
+        
+        register_handler(EVENT_LEAVE_REQUESTED, slow_handler)
+        
+        dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 123})
+        assert handled == []
+        
+        release.set()
+        assert bus.shutdown(timeout=5) is True
+        assert handled[0].startswith("event-worker-")
+    
+    def test_inline_handler_runs_before_dispatch_returns(self, bus):
+        """Test that inline handlers still run on the dispatching thread."""
+        handled = []
+        
+        register_handler(EVENT_LEAVE_REQUESTED, handled.append, inline=True)
+        
+        dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 123})
+        
+        assert handled == [{"user_id": 123}]
+    
+    def test_shutdown_drains_queued_events(self, bus):
+        """Test that shutdown delivers every queued event."""
+        handled = []
+        
+        register_handler(EVENT_LEAVE_REQUESTED, lambda payload: handled.append(payload["user_id"]))
+        
+        for user_id in range(5):
+            dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": user_id})
+        
+        assert bus.shutdown(timeout=5) is True
+        assert sorted(handled) == [0, 1, 2, 3, 4]
+    
+    def test_full_queue_delivers_on_dispatching_thread(self):
+        """Test backpressure: a full queue makes the producer deliver the event itself."""
+        bus = EventBus(workers=1, max_size=1, put_timeout=0.01)
+        release = threading.Event()
+        handled = []
+        
+        def handler(payload: dict) -> None:
+            if payload["user_id"] == 0:
+                release.wait(5)
+            handled.append((payload["user_id"], threading.current_thread().name))
+        
+        # Occupy the only worker, then fill the queue
+        bus.publish(EVENT_LEAVE_REQUESTED, {"user_id": 0}, [handler])
+        while bus.pending:
+            pass
+        bus.publish(EVENT_LEAVE_REQUESTED, {"user_id": 1}, [handler])
+        bus.publish(EVENT_LEAVE_REQUESTED, {"user_id": 2}, [handler])
+        
+        assert handled == [(2, threading.current_thread().name)]
+        
+        release.set()
+        assert bus.shutdown(timeout=5) is True
+        assert sorted(user_id for user_id, _ in handled) == [0, 1, 2]
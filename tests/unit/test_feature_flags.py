@@ -1,5 +1,7 @@
 """Unit tests for feature flag functionality."""
 import pytest
+from unittest.mock import Mock, patch
+from fastapi import HTTPException
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from api.database import Base
@@ -7,7 +9,11 @@ from api.models import FeatureFlag
 from api.feature_flags import (
     is_feature_enabled,
     get_all_feature_flags,
-    seed_default_feature_flags
+    seed_default_feature_flags,
+    get_feature_flags_snapshot,
+    invalidate_feature_flags,
+    notify_feature_flags_changed,
+    require_feature
 )
 
 
@@ -136,3 +142,89 @@ class TestFeatureFlagStorage:
             FeatureFlag.feature_name == "analytics"
         ).first()
         assert flag.enabled is True
+
+
+class TestFeatureFlagSnapshot:
+    """Test the process-wide feature flag snapshot."""
+    
+    @pytest.fixture(autouse=True)
+    def fresh_snapshot(self, db_session):
+        """Start from an empty snapshot with one disabled flag."""
+        db_session.add(FeatureFlag(feature_name="analytics", enabled=False))
+        db_session.commit()
+        invalidate_feature_flags()
+        yield
+        invalidate_feature_flags()
+    
+    def enable(self, db_session):
+        flag = db_session.query(FeatureFlag).filter(FeatureFlag.feature_name == "analytics").first()
+        flag.enabled = True
+        db_session.commit()
+    
+    def test_snapshot_loaded_once(self, db_session):
+        """Test that repeated checks do not query the database."""
+        with patch("api.feature_flags.get_all_feature_flags", wraps=get_all_feature_flags) as load:
+            for _ in range(3):
+                assert get_feature_flags_snapshot(db_session) == {"analytics": False}
+        
+        assert load.call_count == 1
+    
+    def test_snapshot_is_read_only(self, db_session):
+        """Test that callers cannot modify the shared snapshot."""
+        snapshot = get_feature_flags_snapshot(db_session)
+        
+        with pytest.raises(TypeError):
+            snapshot["analytics"] = True
+    
+    def test_snapshot_reloaded_after_ttl(self, db_session):
+        """Test that changes made elsewhere are picked up once the TTL expires."""
+        get_feature_flags_snapshot(db_session)
+        self.enable(db_session)
+        
+        assert get_feature_flags_snapshot(db_session)["analytics"] is False
+        with patch("api.feature_flags.FEATURE_FLAG_CACHE_TTL_SECONDS", 0):
+            assert get_feature_flags_snapshot(db_session)["analytics"] is True
+    
+    def test_change_notification_invalidates_immediately(self, db_session):
+        """Test that a notified change is seen on the next check."""
+        get_feature_flags_snapshot(db_session)
+        self.enable(db_session)
+        
+        notify_feature_flags_changed("analytics")
+        
+        assert get_feature_flags_snapshot(db_session)["analytics"] is True
+    
+    def test_change_published_to_other_workers(self):
+        """Test that a change is published on the broker."""
+        broker = Mock()
+        
+        with patch("api.feature_flags._flag_broker", broker):
+            notify_feature_flags_changed("analytics")
+        
+        broker.publish.assert_called_once_with([{"feature_name": "analytics"}])
+    
+    def test_load_overtaken_by_invalidation_is_discarded(self, db_session):
+        """Test that a snapshot loaded before an invalidation is not kept."""
+        def load_then_invalidate(db):
+            flags = get_all_feature_flags(db)
+            invalidate_feature_flags()
+            return flags
+        
+        with patch("api.feature_flags.get_all_feature_flags", side_effect=load_then_invalidate):
+            get_feature_flags_snapshot(db_session)
+        self.enable(db_session)
+        
+        assert get_feature_flags_snapshot(db_session)["analytics"] is True
+    
+    def test_require_feature_uses_snapshot(self, db_session):
+        """Test that the dependency hides disabled features and allows enabled ones."""
+        dependency = require_feature("analytics")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            dependency(Mock(), db_session)
+        assert exc_info.value.status_code == 404
+        
+        self.enable(db_session)
+        notify_feature_flags_changed("analytics")
+        
+        assert dependency(Mock(), db_session) is True
@@ -94,6 +94,7 @@ class TestNotificationHandlers:
     def test_handle_leave_approved(self):
         """Test leave_approved event handler creates notification."""
         db_mock = MagicMock()
+        db_mock.query.return_value.scalar.return_value = False
         
         payload = {
             "user_id": 123,
@@ -116,9 +117,54 @@ class TestNotificationHandlers:
             assert "2024-01-15" in call_args[1]['message']
             assert call_args[1]['related_entity_id'] == 789
     
+    def test_handle_leave_approved_reraises_storage_failure(self):
+        """Test a failed insert propagates so the event is retried, with nothing pushed."""
+        db_mock = MagicMock()
+        db_mock.query.return_value.scalar.return_value = False
+        
+        payload = {
+            "user_id": 123,
+            "request_id": 789,
+            "leave_type": "Sick",
+            "start_date": "2024-01-15",
+            "end_date": "2024-01-17",
+            "db": db_mock
+        }
+        
+        with patch('api.notifications.create_notification', side_effect=RuntimeError("db down")), \
+             patch('api.websockets.push_gateway.submit') as mock_submit:
+            with pytest.raises(RuntimeError):
+                handle_leave_approved(payload)
+        
+        mock_submit.assert_not_called()
+    
+    def test_handle_leave_requested_reraises_storage_failure(self):
+        """Test a failed insert rolls back and propagates so the event is retried."""
+        db_mock = MagicMock()
+        db_mock.query.return_value.filter.return_value.all.return_value = [MagicMock(id=10)]
+        db_mock.commit.side_effect = RuntimeError("db down")
+        
+        payload = {
+            "user_id": 1,
+            "request_id": 5,
+            "leave_type": "Sick",
+            "start_date": "2024-01-15",
+            "end_date": "2024-01-15",
+            "days_count": 1,
+            "db": db_mock
+        }
+        
+        with patch('api.websockets.push_gateway.submit') as mock_submit:
+            with pytest.raises(RuntimeError):
+                handle_leave_requested(payload)
+        
+        db_mock.rollback.assert_called()
+        mock_submit.assert_not_called()
+    
     def test_handle_leave_rejected_with_comments(self):
         """Test leave_rejected event handler includes admin comments."""
         db_mock = MagicMock()
+        db_mock.query.return_value.scalar.return_value = False
         
         payload = {
             "user_id": 456,
@@ -168,11 +214,14 @@ class TestNotificationHandlers:
             "db": db_mock
         }
         
-        with patch('api.notifications.create_notification') as mock_create:
+        with patch('api.websockets.push_gateway.submit') as mock_submit:
             handle_leave_requested(payload)
-            
-            # Verify create_notification was called twice (once for each admin)
-            assert mock_create.call_count == 2
+        
+        # One notification per admin, committed together, then one push
+        added = db_mock.add_all.call_args[0][0]
+        assert [notification.user_id for notification in added] == [10, 20]
+        db_mock.commit.assert_called_once()
+        mock_submit.assert_called_once()
     
     def test_handle_leave_approved_without_db_session(self):
         """Test handler gracefully handles missing db session."""
@@ -0,0 +1,336 @@
+"""Unit tests for the transactional event outbox."""
+import pytest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from api.index import app
+from api.auth import create_access_token
+from api.database import Base, get_db
+from api.models import User, Profile, EventOutbox, LeaveRequest, Notification
+from api.events import (
+    register_handler,
+    dispatch_event,
+    clear_handlers,
+    set_outbox_wakeup,
+    EVENT_LEAVE_REQUESTED,
+    EVENT_LEAVE_APPROVED,
+    EVENT_ROLE_CHANGED,
+)
+from api.outbox import (
+    OutboxRelay,
+    record_event,
+    build_claim_statement,
+    relay_batch,
+    purge_processed_events,
+    retry_delay,
+)
+from api.notifications import handle_leave_approved, handle_leave_rejected, handle_leave_requested
+from api.role_management import update_user_role
+
+
+@pytest.fixture(autouse=True)
+def outbox_enabled():
+    """Enable the outbox with no handlers registered."""
+    clear_handlers()
+    with patch("api.events.EVENT_OUTBOX_ENABLED", True), patch("api.outbox.EVENT_OUTBOX_ENABLED", True):
+        yield
+    set_outbox_wakeup(None)
+    clear_handlers()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Provide a session factory on an isolated SQLite database."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'outbox.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = factory()
+    db.add(User(id=1, email="admin@example.com", password_hash="x", role="Admin"))
+    db.add(User(id=2, email="employee@example.com", password_hash="x", role="Employee"))
+    db.add(Profile(user_id=2, employee_id="EMP00002", first_name="Test", last_name="Employee"))
+    db.commit()
+    db.close()
+
+    yield factory
+
+    engine.dispose()
+
+
+def outbox_rows(factory):
+    db = factory()
+    try:
+        return db.query(EventOutbox).order_by(EventOutbox.id).all()
+    finally:
+        db.close()
+
+
+class TestRecordEvent:
+    """Test recording events with the business change."""
+
+    def test_event_committed_with_change(self, session_factory):
+        db = session_factory()
+        db.add(LeaveRequest(
+            user_id=2, leave_type="Sick", start_date=date.today(), end_date=date.today(),
+            days_count=1, status="Pending"
+        ))
+        record_event(db, EVENT_LEAVE_REQUESTED, {"user_id": 2})
+        db.commit()
+        db.close()
+
+        rows = outbox_rows(session_factory)
+        assert [(row.event_type, row.payload, row.processed_at) for row in rows] == \
+            [(EVENT_LEAVE_REQUESTED, {"user_id": 2}, None)]
+
+    def test_rollback_discards_event(self, session_factory):
+        db = session_factory()
+        record_event(db, EVENT_LEAVE_REQUESTED, {"user_id": 2})
+        db.rollback()
+        db.close()
+
+        assert outbox_rows(session_factory) == []
+
+    def test_nothing_recorded_when_disabled(self, session_factory):
+        db = session_factory()
+        with patch("api.outbox.EVENT_OUTBOX_ENABLED", False):
+            assert record_event(db, EVENT_LEAVE_REQUESTED, {"user_id": 2}) is None
+        db.commit()
+        db.close()
+
+        assert outbox_rows(session_factory) == []
+
+    def test_role_change_recorded(self, session_factory):
+        db = session_factory()
+        update_user_role(user_id=2, new_role="Admin", admin_id=1, db=db)
+        db.close()
+
+        rows = outbox_rows(session_factory)
+        assert [(row.event_type, row.payload) for row in rows] == [(EVENT_ROLE_CHANGED, {
+            "user_id": 2, "old_role": "Employee", "new_role": "Admin", "changed_by": 1
+        })]
+
+    def test_leave_approval_endpoint_records_event(self, session_factory):
+        db = session_factory()
+        db.add(LeaveRequest(
+            id=1, user_id=2, leave_type="Vacation", start_date=date.today(), end_date=date.today(),
+            days_count=1, status="Pending"
+        ))
+        db.commit()
+        db.close()
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            client = TestClient(app)
+            response = client.put(
+                "/api/leave/1/approve",
+                json={"comments": "Enjoy"},
+                headers={"Authorization": f"Bearer {create_access_token(1, 'Admin')}"}
+            )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        rows = outbox_rows(session_factory)
+        assert [(row.event_type, row.payload["request_id"], row.payload["reviewed_by"]) for row in rows] == \
+            [(EVENT_LEAVE_APPROVED, 1, 1)]
+
+
+class TestDispatchWithOutbox:
+    """Test dispatch_event() while the outbox is enabled."""
+
+    def test_only_inline_handlers_run_and_relay_is_woken(self):
+        inline, queued, wakeups = [], [], []
+        register_handler(EVENT_LEAVE_REQUESTED, inline.append, inline=True)
+        register_handler(EVENT_LEAVE_REQUESTED, queued.append)
+        set_outbox_wakeup(lambda: wakeups.append(True))
+
+        dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 2})
+
+        assert inline == [{"user_id": 2}]
+        assert queued == []
+        assert wakeups == [True]
+
+
+class TestRelay:
+    """Test claiming and delivering recorded events."""
+
+    def record(self, factory, count):
+        db = factory()
+        for user_id in range(count):
+            record_event(db, EVENT_LEAVE_REQUESTED, {"user_id": user_id})
+        db.commit()
+        db.close()
+
+    def test_claim_uses_skip_locked(self):
+        sql = str(build_claim_statement(10).compile(dialect=postgresql.dialect()))
+
+        assert "processed_at IS NULL" in sql
+        assert "next_attempt_at" in sql
+        assert "FOR UPDATE SKIP LOCKED" in sql
+
+    def test_relay_delivers_to_queued_handlers_and_marks_processed(self, session_factory):
+        inline, queued = [], []
+        register_handler(EVENT_LEAVE_REQUESTED, inline.append, inline=True)
+        register_handler(EVENT_LEAVE_REQUESTED, lambda payload: queued.append(payload["user_id"]))
+        self.record(session_factory, 3)
+
+        assert relay_batch(session_factory, batch_size=2) == 2
+        assert relay_batch(session_factory, batch_size=2) == 1
+        assert relay_batch(session_factory, batch_size=2) == 0
+
+        assert queued == [0, 1, 2]
+        assert inline == []
+        assert all(row.processed_at is not None for row in outbox_rows(session_factory))
+
+    def test_failed_delivery_is_retried(self, session_factory):
+        attempts = []
+
+        def flaky_handler(payload: dict) -> None:
+            attempts.append(payload["user_id"])
+            if len(attempts) == 1:
+                raise RuntimeError("handler down")
+
+        register_handler(EVENT_LEAVE_REQUESTED, flaky_handler)
+        self.record(session_factory, 1)
+
+        relay_batch(session_factory)
+        row = outbox_rows(session_factory)[0]
+        assert row.processed_at is None
+        assert row.attempts == 1
+        assert row.last_error == "handler down"
+        assert row.next_attempt_at > datetime.utcnow()
+
+        # Not claimed again while backing off
+        assert relay_batch(session_factory) == 0
+        assert attempts == [0]
+
+        db = session_factory()
+        db.query(EventOutbox).update({EventOutbox.next_attempt_at: datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+
+        relay_batch(session_factory)
+        assert attempts == [0, 0]
+        assert outbox_rows(session_factory)[0].processed_at is not None
+
+    def test_retry_delay_doubles(self):
+        with patch("api.outbox.EVENT_OUTBOX_RETRY_SECONDS", 5):
+            assert [retry_delay(attempts).total_seconds() for attempts in (1, 2, 3)] == [5, 10, 20]
+
+    def test_run_until_empty_does_not_spin_on_failures(self, session_factory):
+        attempts = []
+
+        def failing_handler(payload: dict) -> None:
+            attempts.append(payload["user_id"])
+            raise RuntimeError("handler down")
+
+        register_handler(EVENT_LEAVE_REQUESTED, failing_handler)
+        self.record(session_factory, 1)
+
+        OutboxRelay(session_factory, batch_size=1).run_until_empty()
+
+        assert attempts == [0]
+        assert outbox_rows(session_factory)[0].attempts == 1
+
+    def test_event_abandoned_after_max_attempts(self, session_factory):
+        def failing_handler(payload: dict) -> None:
+            raise RuntimeError("handler down")
+
+        register_handler(EVENT_LEAVE_REQUESTED, failing_handler)
+        self.record(session_factory, 1)
+
+        with patch("api.outbox.EVENT_OUTBOX_MAX_ATTEMPTS", 2), patch("api.outbox.EVENT_OUTBOX_RETRY_SECONDS", 0):
+            relay_batch(session_factory)
+            relay_batch(session_factory)
+
+        row = outbox_rows(session_factory)[0]
+        assert row.attempts == 2
+        assert row.processed_at is not None
+
+    def test_purge_removes_old_processed_events(self, session_factory):
+        db = session_factory()
+        now = datetime.utcnow()
+        db.add(EventOutbox(event_type=EVENT_LEAVE_REQUESTED, payload={}, created_at=now, processed_at=now - timedelta(hours=48)))
+        db.add(EventOutbox(event_type=EVENT_LEAVE_REQUESTED, payload={}, created_at=now, processed_at=now))
+        db.add(EventOutbox(event_type=EVENT_LEAVE_REQUESTED, payload={}, created_at=now - timedelta(hours=48)))
+        db.commit()
+        db.close()
+
+        assert purge_processed_events(session_factory, retention_hours=24) == 1
+        assert len(outbox_rows(session_factory)) == 2
+
+    def test_relay_thread_delivers_after_dispatch(self, session_factory):
+        delivered = []
+        register_handler(EVENT_LEAVE_REQUESTED, lambda payload: delivered.append(payload["user_id"]))
+        relay = OutboxRelay(session_factory, batch_size=10, poll_seconds=60)
+        relay.start()
+        try:
+            self.record(session_factory, 2)
+            dispatch_event(EVENT_LEAVE_REQUESTED, {"user_id": 0})
+        finally:
+            relay.stop(timeout=5)
+
+        assert sorted(delivered) == [0, 1]
+
+
+class TestRedelivery:
+    """Test that handlers tolerate an event delivered twice."""
+
+    def test_redelivered_leave_request_notifies_admins_once(self, session_factory):
+        payload = {
+            "user_id": 2, "request_id": 7, "leave_type": "Sick",
+            "start_date": "2024-03-10", "end_date": "2024-03-10", "days_count": 1
+        }
+
+        with patch("api.websockets.push_gateway.submit"):
+            for _ in range(2):
+                db = session_factory()
+                handle_leave_requested({**payload, "db": db})
+                db.close()
+
+        db = session_factory()
+        notified = [row.user_id for row in db.query(Notification).filter(Notification.related_entity_id == 7).all()]
+        db.close()
+        assert notified == [1]
+
+    @pytest.mark.parametrize("handler, notification_type", [
+        (handle_leave_approved, "leave_approved"),
+        (handle_leave_rejected, "leave_rejected"),
+    ])
+    def test_redelivered_leave_decision_notifies_employee_once(self, session_factory, handler, notification_type):
+        payload = {
+            "user_id": 2, "request_id": 7, "leave_type": "Sick",
+            "start_date": "2024-03-10", "end_date": "2024-03-10", "admin_comments": None
+        }
+
+        with patch("api.websockets.push_gateway.submit") as submit:
+            for _ in range(2):
+                db = session_factory()
+                handler({**payload, "db": db})
+                db.close()
+
+        db = session_factory()
+        notified = [
+            row.user_id
+            for row in db.query(Notification).filter(
+                Notification.related_entity_id == 7,
+                Notification.notification_type == notification_type
+            ).all()
+        ]
+        db.close()
+        assert notified == [2]
+        assert submit.call_count == 1
@@ -0,0 +1,162 @@
+"""Unit tests for keyset pagination."""
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.index import app
+from api.auth import create_access_token
+from api.database import Base, get_db
+from api.models import User, Notification
+from api.pagination import encode_cursor, decode_cursor, paginate, wants_total
+
+
+KEY_COLUMNS = (Notification.created_at, Notification.id)
+
+
+def notification_key(notification):
+    return (notification.created_at, notification.id)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Provide a session factory on an isolated SQLite database with notifications."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pagination.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = factory()
+    db.add(User(id=1, email="employee@example.com", password_hash="x", role="Employee"))
+    # Pairs of notifications share a created_at so the id tie-breaker matters
+    for index in range(7):
+        db.add(Notification(
+            id=index + 1,
+            user_id=1,
+            notification_type="leave_approved",
+            message=f"Notification {index + 1}",
+            is_read=index % 2 == 0,
+            created_at=datetime(2024, 1, 15, 9, index // 2)
+        ))
+    db.commit()
+    db.close()
+
+    yield factory
+
+    engine.dispose()
+
+
+class TestCursorEncoding:
+    """Test opaque cursor encoding."""
+
+    def test_round_trip(self):
+        cursor = encode_cursor((datetime(2024, 1, 15, 9, 30, 0, 123456), 42))
+
+        assert decode_cursor(cursor, KEY_COLUMNS) == (datetime(2024, 1, 15, 9, 30, 0, 123456), 42)
+
+    def test_malformed_cursor_rejected(self):
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor("not-a-cursor", KEY_COLUMNS)
+
+        assert exc_info.value.status_code == 400
+
+    def test_cursor_for_other_key_rejected(self):
+        with pytest.raises(HTTPException):
+            decode_cursor(encode_cursor((42,)), KEY_COLUMNS)
+
+    def test_wants_total_defaults(self):
+        assert wants_total(None, None) is True
+        assert wants_total(None, "cursor") is False
+        assert wants_total(True, "cursor") is True
+        assert wants_total(False, None) is False
+
+
+class TestPaginate:
+    """Test walking a list page by page."""
+
+    def test_cursor_pages_cover_all_rows_in_order(self, session_factory):
+        db = session_factory()
+        query = db.query(Notification).filter(Notification.user_id == 1)
+
+        seen = []
+        rows, cursor = paginate(query, KEY_COLUMNS, notification_key, 1, 3)
+        seen.extend(row.id for row in rows)
+        while cursor:
+            rows, cursor = paginate(query, KEY_COLUMNS, notification_key, 1, 3, cursor)
+            seen.extend(row.id for row in rows)
+
+        assert seen == [7, 6, 5, 4, 3, 2, 1]
+        db.close()
+
+    def test_offset_mode_matches_cursor_mode(self, session_factory):
+        db = session_factory()
+        query = db.query(Notification).filter(Notification.user_id == 1)
+
+        first_page, cursor = paginate(query, KEY_COLUMNS, notification_key, 1, 3)
+        by_offset, _ = paginate(query, KEY_COLUMNS, notification_key, 2, 3)
+        by_cursor, _ = paginate(query, KEY_COLUMNS, notification_key, 1, 3, cursor)
+
+        assert [row.id for row in by_offset] == [row.id for row in by_cursor]
+        db.close()
+
+    def test_last_page_has_no_cursor(self, session_factory):
+        db = session_factory()
+        query = db.query(Notification).filter(Notification.user_id == 1)
+
+        rows, cursor = paginate(query, KEY_COLUMNS, notification_key, 1, 7)
+
+        assert len(rows) == 7
+        assert cursor is None
+        db.close()
+
+
+class TestNotificationsCursorMode:
+    """Test cursor mode on the v2 notifications endpoint."""
+
+    @pytest.fixture
+    def client(self, session_factory):
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        previous = app.dependency_overrides.get(get_db)
+        app.dependency_overrides[get_db] = override_get_db
+        yield TestClient(app)
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
+
+    @pytest.fixture
+    def headers(self):
+        return {"Authorization": f"Bearer {create_access_token(1, 'Employee')}"}
+
+    def test_cursor_mode_skips_total(self, client, headers):
+        first = client.get("/api/v2/notifications?page_size=4", headers=headers).json()
+
+        assert first["total"] == 7
+        assert first["unread_count"] == 3
+        assert first["next_cursor"]
+
+        second = client.get(
+            f"/api/v2/notifications?page_size=4&cursor={first['next_cursor']}",
+            headers=headers
+        ).json()
+
+        assert second["total"] is None
+        assert second["unread_count"] == 3
+        assert second["next_cursor"] is None
+        ids = [n["id"] for n in first["notifications"] + second["notifications"]]
+        assert ids == [7, 6, 5, 4, 3, 2, 1]
+
+    def test_invalid_cursor_returns_400(self, client, headers):
+        response = client.get("/api/v2/notifications?cursor=bogus", headers=headers)
+
+        assert response.status_code == 400
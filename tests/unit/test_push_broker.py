@@ -0,0 +1,129 @@
+"""Unit tests for the cross-worker push brokers."""
+import json
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from fastapi import WebSocket
+
+from api.push_broker import (
+    PushBroker,
+    InMemoryBroker,
+    PostgresBroker,
+    create_push_broker,
+    split_notifications,
+)
+from api import websockets
+from api.websockets import PushGateway, clear_connections
+
+
+@pytest.fixture(autouse=True)
+def clear_websocket_connections():
+    """Clear WebSocket connections before and after each test."""
+    clear_connections()
+    yield
+    clear_connections()
+
+
+class TestCreatePushBroker:
+    """Test broker selection."""
+
+    def test_memory_is_default(self):
+        assert isinstance(create_push_broker("memory"), InMemoryBroker)
+
+    def test_postgres_broker_uses_libpq_url(self):
+        broker = create_push_broker("postgres", "postgresql+psycopg2://user:secret@db:5432/dayflow")
+
+        assert isinstance(broker, PostgresBroker)
+        assert broker.dsn == "postgresql://user:secret@db:5432/dayflow"
+        assert broker.channel == "dayflow_push"
+
+    def test_postgres_broker_on_other_channel(self):
+        broker = create_push_broker("postgres", "postgresql://user@db/dayflow", channel="dayflow_feature_flags")
+
+        assert broker.channel == "dayflow_feature_flags"
+
+    def test_postgres_broker_requires_postgres_url(self):
+        with pytest.raises(ValueError):
+            create_push_broker("postgres", "sqlite:///./test.db")
+
+    def test_unknown_broker_rejected(self):
+        with pytest.raises(ValueError):
+            create_push_broker("redis")
+
+    def test_broker_base_is_abstract(self):
+        class PublishOnlyBroker(PushBroker):
+            def publish(self, pushes):
+                return None
+
+        with pytest.raises(TypeError):
+            PushBroker()
+        with pytest.raises(TypeError):
+            PublishOnlyBroker()
+
+
+class TestSplitNotifications:
+    """Test packing push batches into pg_notify payloads."""
+
+    def test_small_batch_is_one_notification(self):
+        pushes = [[1, "leave_requested", {"request_id": 5}], [2, "leave_requested", {"request_id": 5}]]
+
+        payloads = split_notifications(pushes)
+
+        assert len(payloads) == 1
+        assert json.loads(payloads[0]) == pushes
+
+    def test_large_batch_split_under_limit(self):
+        pushes = [[user_id, "attendance_updated", {"message": "x" * 50}] for user_id in range(20)]
+
+        payloads = split_notifications(pushes, max_bytes=300)
+
+        assert len(payloads) > 1
+        assert all(len(payload.encode("utf-8")) <= 300 for payload in payloads)
+        assert [push for payload in payloads for push in json.loads(payload)] == pushes
+
+    def test_oversized_push_rejected(self):
+        with pytest.raises(ValueError):
+            split_notifications([[1, "leave_requested", {"message": "x" * 500}]], max_bytes=300)
+
+
+class TestBrokerDelivery:
+    """Test that published batches reach the local connections."""
+
+    @pytest.mark.asyncio
+    async def test_in_memory_broker_delivers_locally(self):
+        websocket = AsyncMock(spec=WebSocket)
+        websockets._active_connections[10] = [websocket]
+        gateway = PushGateway(InMemoryBroker())
+        gateway.bind(asyncio.get_running_loop())
+
+        future = await asyncio.to_thread(gateway.submit, [(10, "leave_approved", {"request_id": 1})])
+
+        assert await asyncio.wrap_future(future) == 1
+        assert json.loads(websocket.send_text.call_args[0][0])["type"] == "leave_approved"
+
+    @pytest.mark.asyncio
+    async def test_notification_delivered_to_subscribed_worker(self):
+        """Test that a notification received by the listener reaches local sockets."""
+        websocket = AsyncMock(spec=WebSocket)
+        websockets._active_connections[10] = [websocket]
+        broker = PostgresBroker("postgresql://localhost/dayflow")
+        gateway = PushGateway(broker)
+        # Subscribe without starting the LISTEN thread
+        gateway._loop = asyncio.get_running_loop()
+        scheduled = []
+        broker._deliver = lambda pushes: scheduled.append(gateway.deliver(pushes))
+
+        payload = split_notifications([[10, "leave_approved", {"request_id": 1}], [99, "leave_approved", {}]])[0]
+        await asyncio.to_thread(broker.receive, payload)
+
+        assert await asyncio.wrap_future(scheduled[0]) == 1
+        assert websocket.send_text.call_count == 1
+
+    def test_malformed_notification_ignored(self):
+        received = []
+        broker = PostgresBroker("postgresql://localhost/dayflow")
+        broker._deliver = received.append
+
+        broker.receive("not json")
+
+        assert received == []
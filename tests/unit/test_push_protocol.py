@@ -0,0 +1,53 @@
+"""Unit tests for WebSocket push protocols."""
+import json
+import pytest
+from unittest.mock import patch
+
+from api.push_protocol import PushMessage, negotiate_protocol, PROTOCOL_JSON, PROTOCOL_MSGPACK
+
+
+class TestNegotiation:
+    """Test choosing a connection's protocol."""
+
+    def test_json_by_default(self):
+        assert negotiate_protocol(None) == PROTOCOL_JSON
+        assert negotiate_protocol("xml") == PROTOCOL_JSON
+
+    def test_msgpack_falls_back_without_package(self):
+        with patch("api.push_protocol.msgpack", None):
+            assert negotiate_protocol(PROTOCOL_MSGPACK) == PROTOCOL_JSON
+
+
+class TestPushMessage:
+    """Test encoding push messages."""
+
+    def test_json_encoded_once(self):
+        message = PushMessage({"type": "attendance_updated", "payload": {"n": 1}})
+
+        with patch("api.push_protocol.json.dumps") as dumps:
+            encoded = [message.encode(PROTOCOL_JSON) for _ in range(3)]
+
+        dumps.assert_not_called()
+        assert json.loads(encoded[0]) == {"type": "attendance_updated", "payload": {"n": 1}}
+        assert encoded[0] is encoded[2]
+
+    def test_unserializable_payload_rejected_up_front(self):
+        with pytest.raises(TypeError):
+            PushMessage({"type": "attendance_updated", "payload": object()})
+
+    def test_msgpack_unavailable_without_package(self):
+        message = PushMessage({"type": "ping"})
+
+        with patch("api.push_protocol.msgpack", None):
+            with pytest.raises(ValueError):
+                message.encode(PROTOCOL_MSGPACK)
+
+    def test_msgpack_encoded_once(self):
+        msgpack = pytest.importorskip("msgpack")
+        message = PushMessage({"type": "attendance_updated", "payload": {"n": 1}})
+
+        encoded = message.encode(PROTOCOL_MSGPACK)
+
+        assert isinstance(encoded, bytes)
+        assert message.encode(PROTOCOL_MSGPACK) is encoded
+        assert msgpack.unpackb(encoded) == {"type": "attendance_updated", "payload": {"n": 1}}
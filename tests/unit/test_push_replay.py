@@ -0,0 +1,53 @@
+"""Unit tests for the WebSocket push replay buffer."""
+from api.push_replay import ReplayBuffer
+
+
+def record(buffer, channel, text):
+    return buffer.record(channel, lambda seq: f"{seq}:{text}")
+
+
+class TestReplayBuffer:
+    """Test recording and replaying pushes."""
+
+    def test_sequence_ids_are_monotonic_across_channels(self):
+        buffer = ReplayBuffer(size=10, max_channels=10)
+
+        assert record(buffer, "user:1", "a") == "1:a"
+        assert record(buffer, "role:Admin", "b") == "2:b"
+        assert record(buffer, "user:1", "c") == "3:c"
+        assert buffer.seq == 3
+
+    def test_since_merges_channels_in_sequence_order(self):
+        buffer = ReplayBuffer(size=10, max_channels=10)
+        for channel, text in [("user:1", "a"), ("role:Admin", "b"), ("user:2", "c"), ("user:1", "d")]:
+            record(buffer, channel, text)
+
+        assert buffer.since(["user:1", "role:Admin"], 0) == ["1:a", "2:b", "4:d"]
+        assert buffer.since(["user:1", "role:Admin"], 2) == ["4:d"]
+        assert buffer.since(["user:1", "dept:Sales"], 4) == []
+
+    def test_gap_when_missed_messages_were_dropped(self):
+        buffer = ReplayBuffer(size=2, max_channels=10)
+        for text in "abc":
+            record(buffer, "user:1", text)
+
+        assert buffer.since(["user:1"], 0) is None
+        assert buffer.since(["user:1"], 1) == ["2:b", "3:c"]
+
+    def test_gap_for_other_stream_or_future_seq(self):
+        buffer = ReplayBuffer(size=10, max_channels=10)
+        record(buffer, "user:1", "a")
+
+        assert buffer.since(["user:1"], 0, buffer.stream_id) == ["1:a"]
+        assert buffer.since(["user:1"], 0, "another-worker") is None
+        assert buffer.since(["user:1"], 5) is None
+
+    def test_gap_when_channel_evicted(self):
+        buffer = ReplayBuffer(size=10, max_channels=2)
+        record(buffer, "user:1", "a")
+        record(buffer, "user:2", "b")
+        record(buffer, "user:3", "c")
+
+        assert buffer.since(["user:1"], 0) is None
+        assert buffer.since(["user:1"], 1) == []
+        assert buffer.since(["user:2", "user:3"], 0) == ["2:b", "3:c"]
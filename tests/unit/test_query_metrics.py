@@ -0,0 +1,180 @@
+"""Unit tests for per-request database query instrumentation."""
+import os
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# Set up test environment variables BEFORE importing api modules
+os.environ["JWT_SECRET_KEY"] = "test-secret-key-for-testing-only"
+os.environ["JWT_ALGORITHM"] = "HS256"
+os.environ["JWT_EXPIRATION_HOURS"] = "24"
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+import api.index as index
+from api.database import Base, get_db
+from api.query_metrics import (
+    QueryCollector,
+    statement_shape,
+    install_query_listeners,
+    start_collection,
+    finish_collection,
+    get_current_collector,
+    get_route_stats,
+    clear_route_stats,
+    HEADER_QUERY_COUNT,
+    HEADER_N_PLUS_ONE,
+    UNMATCHED_ROUTE,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    """Start each test with empty route statistics."""
+    clear_route_stats()
+    yield
+    clear_route_stats()
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """Provide an isolated SQLite engine with the schema created."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'metrics.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+class TestQueryCollector:
+    """Test statement counting and N+1 detection."""
+
+    def test_statement_shape_collapses_whitespace(self):
+        assert statement_shape("SELECT *\n  FROM users\tWHERE id = ?") == "SELECT * FROM users WHERE id = ?"
+
+    def test_record_counts_statements_and_time(self):
+        collector = QueryCollector("/api/test")
+        collector.record("SELECT 1", 0.002)
+        collector.record("SELECT 2", 0.003)
+
+        assert collector.statement_count == 2
+        assert collector.total_time_ms == 5.0
+
+    def test_repeated_shape_flagged_as_n_plus_one(self):
+        collector = QueryCollector("/api/test")
+        for _ in range(5):
+            collector.record("SELECT * FROM users WHERE id = ?", 0.001)
+        collector.record("SELECT * FROM profiles", 0.001)
+
+        suspects = collector.likely_n_plus_one(threshold=5)
+
+        assert suspects == [("SELECT * FROM users WHERE id = ?", 5)]
+
+    def test_distinct_statements_not_flagged(self):
+        collector = QueryCollector("/api/test")
+        collector.record("SELECT * FROM users", 0.001)
+        collector.record("SELECT * FROM profiles", 0.001)
+
+        assert collector.likely_n_plus_one(threshold=2) == []
+
+
+class TestCursorListeners:
+    """Test that engine cursor events feed the current collector."""
+
+    def test_statements_recorded_for_current_request(self, sqlite_engine):
+        install_query_listeners()
+        collector, token = start_collection("/api/test")
+
+        with sqlite_engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT 1"))
+
+        assert get_current_collector() is collector
+        finish_collection(collector, token)
+
+        assert collector.statement_count == 3
+        assert get_current_collector() is None
+        assert get_route_stats()["/api/test"]["statements"] == 3
+
+    def test_statements_outside_request_ignored(self, sqlite_engine):
+        install_query_listeners()
+
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert get_route_stats() == {}
+
+    def test_n_plus_one_request_counted_and_logged(self, sqlite_engine, caplog):
+        install_query_listeners()
+        collector, token = start_collection("/api/test")
+
+        with sqlite_engine.connect() as conn:
+            for user_id in range(6):
+                conn.execute(text("SELECT * FROM users WHERE id = :id"), {"id": user_id})
+
+        finish_collection(collector, token)
+
+        assert get_route_stats()["/api/test"]["n_plus_one_requests"] == 1
+        assert "Possible N+1 query pattern" in caplog.text
+
+
+class TestQueryMetricsMiddleware:
+    """Test the HTTP middleware in the application."""
+
+    @pytest.fixture
+    def client(self, sqlite_engine):
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=sqlite_engine)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        previous = index.app.dependency_overrides.get(get_db)
+        index.app.dependency_overrides[get_db] = override_get_db
+        yield TestClient(index.app)
+        if previous is None:
+            index.app.dependency_overrides.pop(get_db, None)
+        else:
+            index.app.dependency_overrides[get_db] = previous
+
+    def test_stats_aggregated_under_route_template(self, client):
+        response = client.post("/api/auth/login", json={
+            "email": "nobody@example.com",
+            "password": "Password123!"
+        })
+
+        assert response.status_code == 401
+        stats = get_route_stats()
+        assert stats["/api/auth/login"]["requests"] == 1
+        assert stats["/api/auth/login"]["statements"] >= 1
+
+    def test_unmatched_paths_share_one_bucket(self, client):
+        for path in ("/no-such-page", "/wp-login.php", "/api/unknown/123"):
+            assert client.get(path).status_code == 404
+
+        stats = get_route_stats()
+        assert list(stats) == [UNMATCHED_ROUTE]
+        assert stats[UNMATCHED_ROUTE]["requests"] == 3
+
+    def test_headers_omitted_by_default(self, client, monkeypatch):
+        monkeypatch.setattr(index, "DB_QUERY_HEADERS", False)
+
+        response = client.get("/health")
+
+        assert HEADER_QUERY_COUNT not in response.headers
+
+    def test_headers_returned_when_enabled(self, client, monkeypatch):
+        monkeypatch.setattr(index, "DB_QUERY_HEADERS", True)
+
+        response = client.post("/api/auth/login", json={
+            "email": "nobody@example.com",
+            "password": "Password123!"
+        })
+
+        assert int(response.headers[HEADER_QUERY_COUNT]) >= 1
+        assert response.headers[HEADER_N_PLUS_ONE] == "0"
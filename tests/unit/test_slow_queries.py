@@ -0,0 +1,132 @@
+"""Unit tests for the slow-query log."""
+import json
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, text
+
+import api.slow_queries as slow_queries
+from api.slow_queries import parameter_shape, install_slow_query_log
+from api.query_metrics import start_collection, finish_collection, clear_route_stats
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    """Provide a slow-query log file path."""
+    return str(tmp_path / "logs" / "slow_queries.log")
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """Provide an isolated SQLite engine."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    yield engine
+    engine.dispose()
+
+
+def read_records(path):
+    """Read the JSON records written to the slow-query log."""
+    for handler in slow_queries._slow_query_logger.handlers:
+        handler.flush()
+    with open(path) as log_file:
+        return [json.loads(line) for line in log_file if line.strip()]
+
+
+class TestParameterShape:
+    """Test that parameters are described by type only."""
+
+    def test_dict_parameters(self):
+        assert parameter_shape({"id": 5, "email": "a@example.com"}) == {"id": "int", "email": "str"}
+
+    def test_positional_parameters(self):
+        assert parameter_shape((5, "Pending")) == ["int", "str"]
+
+    def test_executemany_parameters(self):
+        shape = parameter_shape([(1, "a"), (2, "b")], executemany=True)
+        assert shape == {"executemany": 2, "first": ["int", "str"]}
+
+
+class TestSlowQueryRecorder:
+    """Test recording of slow statements."""
+
+    def test_disabled_without_log_path(self, sqlite_engine, monkeypatch):
+        monkeypatch.setattr(slow_queries, "DB_SLOW_QUERY_LOG", None)
+        assert install_slow_query_log(sqlite_engine) is False
+
+    def test_slow_statement_written_with_route(self, sqlite_engine, log_path, monkeypatch):
+        monkeypatch.setattr(slow_queries, "DB_SLOW_QUERY_MS", 0.0)
+        monkeypatch.setattr(slow_queries, "DB_SLOW_QUERY_SAMPLE_RATE", 1.0)
+        assert install_slow_query_log(sqlite_engine, log_path) is True
+
+        collector, token = start_collection("/api/leave/all-requests")
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT :value"), {"value": 42})
+        finish_collection(collector, token)
+        clear_route_stats()
+
+        records = read_records(log_path)
+        assert len(records) == 1
+        assert records[0]["route"] == "/api/leave/all-requests"
+        assert records[0]["statement"] == "SELECT ?"
+        assert records[0]["parameters"] == ["int"]
+        # EXPLAIN is only captured on PostgreSQL
+        assert records[0]["plan"] is None
+
+    def test_fast_statement_not_written(self, sqlite_engine, log_path, monkeypatch):
+        monkeypatch.setattr(slow_queries, "DB_SLOW_QUERY_MS", 60000.0)
+        install_slow_query_log(sqlite_engine, log_path)
+
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert read_records(log_path) == []
+
+    def test_sampling_skips_statements(self, sqlite_engine, log_path, monkeypatch):
+        monkeypatch.setattr(slow_queries, "DB_SLOW_QUERY_MS", 0.0)
+        monkeypatch.setattr(slow_queries, "DB_SLOW_QUERY_SAMPLE_RATE", 0.0)
+        install_slow_query_log(sqlite_engine, log_path)
+
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert read_records(log_path) == []
+
+
+class TestExplainCapture:
+    """Test EXPLAIN capture on PostgreSQL connections."""
+
+    def make_connection(self, dialect_name, cursor):
+        conn = MagicMock()
+        conn.dialect.name = dialect_name
+        conn.connection.dbapi_connection.cursor.return_value = cursor
+        return conn
+
+    def test_plan_captured_on_postgres(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("Seq Scan on leave_requests",)]
+        conn = self.make_connection("postgresql", cursor)
+
+        plan = slow_queries._explain(conn, "SELECT * FROM leave_requests", {})
+
+        assert plan == ["Seq Scan on leave_requests"]
+        cursor.execute.assert_any_call("EXPLAIN (ANALYZE off) SELECT * FROM leave_requests", {})
+        cursor.close.assert_called_once()
+
+    def test_failed_explain_rolls_back_to_savepoint(self):
+        cursor = MagicMock()
+
+        def execute(sql, *args):
+            if sql.startswith("EXPLAIN"):
+                raise Exception("syntax error")
+
+        cursor.execute.side_effect = execute
+        conn = self.make_connection("postgresql", cursor)
+
+        assert slow_queries._explain(conn, "SELECT broken", {}) is None
+        cursor.execute.assert_any_call("ROLLBACK TO SAVEPOINT slow_query_explain")
+
+    def test_no_plan_on_other_dialects(self):
+        cursor = MagicMock()
+        conn = self.make_connection("sqlite", cursor)
+
+        assert slow_queries._explain(conn, "SELECT 1", ()) is None
+        cursor.execute.assert_not_called()
@@ -13,7 +13,12 @@ from api.websockets import (
     push_update,
     get_active_connections,
     clear_connections,
-    get_connection_count
+    get_connection_count,
+    PushGateway,
+    publish_update,
+    get_push_stats,
+    join_channel,
+    get_channel_members,
 )
 
 
@@ -361,3 +366,511 @@ class TestWebSocketIntegration:
         
         # Verify database was queried for admins
         # Note: This test may need adjustment based on how asyncio is handled
+
+
+class TestPushGateway:
+    """Test scheduling pushes from synchronous code on the server loop."""
+    
+    @pytest.mark.asyncio
+    async def test_submit_from_worker_thread_runs_on_bound_loop(self):
+        """Test that a batch submitted from another thread is sent on the bound loop."""
+        from api.websockets import _active_connections
+        
+        gateway = PushGateway()
+        gateway.bind(asyncio.get_running_loop())
+        websocket1 = AsyncMock(spec=WebSocket)
+        websocket2 = AsyncMock(spec=WebSocket)
+        _active_connections[10] = [websocket1]
+        _active_connections[20] = [websocket2]
+        
+        future = await asyncio.to_thread(gateway.submit, [
+            (10, "leave_requested", {"request_id": 1}),
+            (20, "leave_requested", {"request_id": 1}),
+        ])
+        
+        assert await asyncio.wrap_future(future) == 2
+        assert websocket1.send_text.call_count == 1
+        assert websocket2.send_text.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_submit_without_connections_is_recorded_for_replay(self):
+        """Test that a push nobody is connected for reaches no one but can be replayed."""
+        from api.websockets import replay_buffer
+        
+        gateway = PushGateway()
+        gateway.bind(asyncio.get_running_loop())
+        last_seq = replay_buffer.seq
+        
+        task = gateway.submit([(10, "leave_requested", {"request_id": 1})])
+        
+        assert await task == 0
+        assert len(replay_buffer.since(["user:10"], last_seq)) == 1
+    
+    @pytest.mark.asyncio
+    async def test_registry_only_read_on_loop(self):
+        """Test that delivering from another thread never resolves targets there."""
+        import threading
+        from api import websockets
+        
+        loop_thread = threading.get_ident()
+        lookups = []
+        real_lookup = websockets.get_channel_members
+        
+        def lookup(target):
+            lookups.append(threading.get_ident())
+            return real_lookup(target)
+        
+        gateway = PushGateway()
+        gateway.bind(asyncio.get_running_loop())
+        websockets._active_connections[10] = [AsyncMock(spec=WebSocket)]
+        
+        with patch("api.websockets.get_channel_members", side_effect=lookup):
+            future = await asyncio.to_thread(gateway.deliver, [(10, "leave_requested", {"request_id": 1})])
+            assert await asyncio.wrap_future(future) == 1
+        
+        assert lookups == [loop_thread]
+    
+    def test_submit_without_loop_is_recorded_for_replay(self):
+        """Test that pushes made before a loop is bound are not sent, but can be replayed."""
+        from api.websockets import _active_connections, replay_buffer
+        
+        websocket = AsyncMock(spec=WebSocket)
+        _active_connections[10] = [websocket]
+        last_seq = replay_buffer.seq
+        
+        assert PushGateway().submit([(10, "leave_requested", {"request_id": 1})]) is None
+        
+        websocket.send_text.assert_not_called()
+        replayed = replay_buffer.since(["user:10"], last_seq, replay_buffer.stream_id)
+        assert len(replayed) == 1
+        assert replayed[0].data["seq"] == last_seq + 1
+    
+    @pytest.mark.asyncio
+    async def test_admin_fan_out_is_one_channel_push(self):
+        """Test that notifying admins is one push to role:Admin, without querying admins."""
+        from api.notifications import handle_attendance_updated
+        from unittest.mock import MagicMock
+        
+        gateway = PushGateway()
+        gateway.bind(asyncio.get_running_loop())
+        admin_sockets = {admin_id: AsyncMock(spec=WebSocket) for admin_id in (1, 2)}
+        for admin_id, websocket in admin_sockets.items():
+            join_channel("role:Admin", admin_id, websocket)
+        
+        mock_db = MagicMock()
+        mock_db.query.return_value.join.return_value.filter.return_value.first.return_value = None
+        
+        submitted = []
+        futures = []
+        
+        def submit(pushes):
+            submitted.append(pushes)
+            futures.append(gateway.submit(pushes))
+            return futures[-1]
+        
+        with patch("api.websockets.push_gateway.submit", side_effect=submit):
+            await asyncio.to_thread(handle_attendance_updated, {
+                "user_id": 123, "attendance_id": 456, "date": "2024-01-15",
+                "action": "check_in", "status": "Present", "db": mock_db
+            })
+        
+        assert [[target for target, _, _ in pushes] for pushes in submitted] == [["role:Admin"]]
+        mock_db.query.return_value.filter.return_value.all.assert_not_called()
+        
+        assert await asyncio.wrap_future(futures[0]) == 1
+        for websocket in admin_sockets.values():
+            sent_message = json.loads(websocket.send_text.call_args[0][0])
+            assert sent_message["type"] == "attendance_updated"
+
+
+class TestChannels:
+    """Test channel subscriptions."""
+    
+    @pytest.mark.asyncio
+    async def test_auth_joins_user_role_and_department_channels(self):
+        """Test that an authenticated connection joins its default channels until it disconnects."""
+        websocket = AsyncMock(spec=WebSocket)
+        websocket.receive_text = AsyncMock(side_effect=[
+            json.dumps({"type": "auth", "token": "valid_token"}),
+            Exception("Connection closed")
+        ])
+        
+        with patch('api.websockets.decode_access_token') as mock_decode, \
+                patch('api.websockets.load_department', return_value="Engineering"):
+            mock_decode.return_value = {"user_id": 123, "role": "Admin"}
+            
+            await handle_websocket_connection(websocket)
+        
+        success_message = json.loads(websocket.send_text.call_args_list[-1][0][0])
+        assert success_message["channels"] == ["user:123", "role:Admin", "dept:Engineering"]
+        assert get_channel_members("role:Admin") == []
+        assert get_channel_members("dept:Engineering") == []
+    
+    @pytest.mark.asyncio
+    async def test_channel_push_reaches_members_only(self):
+        """Test that a channel push reaches every member and no one else."""
+        from api.websockets import _active_connections
+        
+        engineering = [AsyncMock(spec=WebSocket), AsyncMock(spec=WebSocket)]
+        sales = AsyncMock(spec=WebSocket)
+        join_channel("dept:Engineering", 1, engineering[0])
+        join_channel("dept:Engineering", 2, engineering[1])
+        join_channel("dept:Sales", 3, sales)
+        _active_connections[1] = [engineering[0]]
+        
+        assert publish_update("dept:Engineering", "announcement", {"text": "hi"}) == 2
+        assert publish_update("user:1", "announcement", {"text": "just you"}) == 1
+        await push_update(1, "announcement", {"text": "flush"})
+        
+        assert engineering[0].send_text.call_count == 3
+        assert engineering[1].send_text.call_count == 1
+        assert sales.send_text.call_count == 0
+    
+    def test_channel_members_for_user_targets(self):
+        """Test that user IDs and user:<id> channels resolve to the user's connections."""
+        from api.websockets import _active_connections
+        
+        websocket = Mock(spec=WebSocket)
+        _active_connections[5] = [websocket]
+        
+        assert get_channel_members(5) == [(5, websocket)]
+        assert get_channel_members("user:5") == [(5, websocket)]
+        assert get_channel_members("role:Admin") == []
+
+
+class TestConnectionSendQueues:
+    """Test per-connection send queues and slow-consumer eviction."""
+    
+    @pytest.mark.asyncio
+    async def test_stalled_connection_does_not_delay_others(self):
+        """Test that fan-out queues without waiting on a stalled connection."""
+        from api.websockets import _active_connections
+        
+        release = asyncio.Event()
+        
+        async def stall(message):
+            await release.wait()
+        
+        stalled = AsyncMock(spec=WebSocket)
+        stalled.send_text = AsyncMock(side_effect=stall)
+        healthy = AsyncMock(spec=WebSocket)
+        _active_connections[10] = [stalled]
+        _active_connections[20] = [healthy]
+        
+        assert publish_update(10, "attendance_updated", {"n": 1}) == 1
+        assert await push_update(20, "attendance_updated", {"n": 1}) is True
+        
+        assert healthy.send_text.call_count == 1
+        assert get_push_stats()["queued_messages"] == 1
+        release.set()
+    
+    @pytest.mark.asyncio
+    async def test_overflowing_queue_evicts_connection(self):
+        """Test that a connection whose queue overflows is dropped and closed."""
+        from api.websockets import _active_connections
+        
+        release = asyncio.Event()
+        
+        async def stall(message):
+            await release.wait()
+        
+        slow = AsyncMock(spec=WebSocket)
+        slow.send_text = AsyncMock(side_effect=stall)
+        _active_connections[10] = [slow]
+        
+        with patch("api.websockets.WS_SEND_QUEUE_SIZE", 2):
+            assert publish_update(10, "attendance_updated", {"n": 1}) == 1
+            await asyncio.sleep(0)
+            assert publish_update(10, "attendance_updated", {"n": 2}) == 1
+            assert publish_update(10, "attendance_updated", {"n": 3}) == 0
+        await asyncio.sleep(0)
+        
+        assert get_connection_count(10) == 0
+        slow.close.assert_called_once_with(code=status.WS_1013_TRY_AGAIN_LATER)
+        stats = get_push_stats()
+        assert stats["evicted_slow"] == 1
+        assert stats["messages_dropped"] == 3
+        assert stats["queued_messages"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_send_timeout_evicts_connection(self):
+        """Test that a send exceeding the timeout evicts the connection."""
+        from api.websockets import _active_connections
+        
+        async def hang(message):
+            await asyncio.Event().wait()
+        
+        stuck = AsyncMock(spec=WebSocket)
+        stuck.send_text = AsyncMock(side_effect=hang)
+        _active_connections[10] = [stuck]
+        
+        with patch("api.websockets.WS_SEND_TIMEOUT_SECONDS", 0.01):
+            result = await push_update(10, "attendance_updated", {"n": 1})
+        
+        assert result is False
+        assert get_connection_count(10) == 0
+        assert get_push_stats()["evicted_timeout"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_messages_sent_in_order(self):
+        """Test that queued messages are written in order by one writer."""
+        from api.websockets import _active_connections
+        
+        websocket = AsyncMock(spec=WebSocket)
+        _active_connections[10] = [websocket]
+        
+        for n in range(3):
+            publish_update(10, "attendance_updated", {"n": n})
+        await push_update(10, "attendance_updated", {"n": 3})
+        
+        sent = [json.loads(call[0][0])["payload"]["n"] for call in websocket.send_text.call_args_list]
+        assert sent == [0, 1, 2, 3]
+        assert get_push_stats()["messages_sent"] == 4
+
+
+class TestConnectionLifecycle:
+    """Test auth timeout, heartbeats, idle reaping and connection limits."""
+    
+    @staticmethod
+    def authenticated_socket():
+        """Socket that authenticates, then stays silent."""
+        websocket = AsyncMock(spec=WebSocket)
+        messages = [json.dumps({"type": "auth", "token": "valid_token"})]
+        
+        async def receive_text():
+            if messages:
+                return messages.pop(0)
+            await asyncio.Event().wait()
+        
+        websocket.receive_text = AsyncMock(side_effect=receive_text)
+        return websocket
+    
+    @pytest.mark.asyncio
+    async def test_auth_timeout_closes_connection(self):
+        """Test that a connection that never authenticates is closed."""
+        websocket = AsyncMock(spec=WebSocket)
+        
+        async def hang():
+            await asyncio.Event().wait()
+        
+        websocket.receive_text = AsyncMock(side_effect=hang)
+        
+        with patch("api.websockets.WS_AUTH_TIMEOUT_SECONDS", 0.01):
+            await handle_websocket_connection(websocket)
+        
+        sent_message = json.loads(websocket.send_text.call_args[0][0])
+        assert "timed out" in sent_message["message"]
+        websocket.close.assert_called_once_with(code=status.WS_1008_POLICY_VIOLATION)
+    
+    @pytest.mark.asyncio
+    async def test_silent_connection_pinged_then_reaped(self):
+        """Test that a quiet client gets pings and is reaped when it never answers."""
+        websocket = self.authenticated_socket()
+        
+        with patch("api.websockets.decode_access_token", return_value={"user_id": 123, "role": "Employee"}), \
+                patch("api.websockets.load_department", return_value=None), \
+                patch("api.websockets.WS_HEARTBEAT_SECONDS", 0.01), \
+                patch("api.websockets.WS_IDLE_TIMEOUT_SECONDS", 0.05):
+            await handle_websocket_connection(websocket)
+        
+        sent_types = [json.loads(call[0][0])["type"] for call in websocket.send_text.call_args_list]
+        assert sent_types[0] == "auth_success"
+        assert "ping" in sent_types[1:]
+        websocket.close.assert_called_once_with(code=status.WS_1001_GOING_AWAY)
+        assert get_connection_count(123) == 0
+        assert get_push_stats()["reaped_idle"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_per_user_limit_closes_oldest_connection(self):
+        """Test that a user's oldest connection makes room for a new one."""
+        from api.websockets import _active_connections
+        
+        oldest = AsyncMock(spec=WebSocket)
+        newer = AsyncMock(spec=WebSocket)
+        _active_connections[123] = [oldest, newer]
+        websocket = AsyncMock(spec=WebSocket)
+        websocket.receive_text = AsyncMock(side_effect=[
+            json.dumps({"type": "auth", "token": "valid_token"}),
+            Exception("Connection closed")
+        ])
+        
+        with patch("api.websockets.decode_access_token", return_value={"user_id": 123, "role": "Employee"}), \
+                patch("api.websockets.load_department", return_value=None), \
+                patch("api.websockets.WS_MAX_CONNECTIONS_PER_USER", 2):
+            await handle_websocket_connection(websocket)
+            await asyncio.sleep(0)
+        
+        oldest.close.assert_called_once_with(code=status.WS_1008_POLICY_VIOLATION)
+        assert get_active_connections(123) == [newer]
+        assert get_push_stats()["evicted_user_limit"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_global_limit_rejects_new_connections(self):
+        """Test that connections beyond the global limit are refused before auth."""
+        from api.websockets import _active_connections
+        
+        _active_connections[1] = [Mock(spec=WebSocket)]
+        websocket = AsyncMock(spec=WebSocket)
+        
+        with patch("api.websockets.WS_MAX_CONNECTIONS", 1):
+            await handle_websocket_connection(websocket)
+        
+        websocket.receive_text.assert_not_called()
+        websocket.close.assert_called_once_with(code=status.WS_1013_TRY_AGAIN_LATER)
+        assert get_push_stats()["rejected_global_limit"] == 1
+    
+    def test_connection_limits_must_admit_a_connection(self, monkeypatch):
+        """Test that a limit below 1 is rejected when the configuration is read."""
+        from api.websockets import _read_connection_limit
+        
+        monkeypatch.setenv("WS_MAX_CONNECTIONS_PER_USER", "0")
+        with pytest.raises(ValueError):
+            _read_connection_limit("WS_MAX_CONNECTIONS_PER_USER", "5")
+        
+        monkeypatch.setenv("WS_MAX_CONNECTIONS_PER_USER", "1")
+        assert _read_connection_limit("WS_MAX_CONNECTIONS_PER_USER", "5") == 1
+
+
+class TestReplay:
+    """Test replaying missed pushes on reconnect."""
+    
+    @staticmethod
+    async def connect(auth: dict) -> tuple:
+        """Run a connection that authenticates with `auth` and stays open."""
+        websocket = AsyncMock(spec=WebSocket)
+        messages = [json.dumps({"type": "auth", "token": "valid_token", **auth})]
+        
+        async def receive_text():
+            if messages:
+                return messages.pop(0)
+            await asyncio.Event().wait()
+        
+        websocket.receive_text = AsyncMock(side_effect=receive_text)
+        task = asyncio.create_task(handle_websocket_connection(websocket))
+        # Wait for registration (the department lookup runs in a thread)
+        # and for the writer to flush whatever was queued
+        for _ in range(100):
+            if get_connection_count(123):
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        
+        sent = [json.loads(call[0][0]) for call in websocket.send_text.call_args_list]
+        return task, sent
+    
+    @pytest.mark.asyncio
+    async def test_reconnect_replays_missed_pushes(self):
+        """Test that pushes made while disconnected are replayed after auth."""
+        from api.websockets import replay_buffer
+        
+        last_seq = replay_buffer.seq
+        publish_update(123, "leave_approved", {"n": 1})
+        publish_update("role:Admin", "attendance_updated", {"n": 2})
+        publish_update("role:Employee", "attendance_updated", {"n": 3})
+        
+        with patch("api.websockets.decode_access_token", return_value={"user_id": 123, "role": "Admin"}), \
+                patch("api.websockets.load_department", return_value=None):
+            task, sent = await self.connect({"last_seq": last_seq})
+            task.cancel()
+        
+        assert sent[0]["type"] == "auth_success"
+        assert sent[0]["seq"] == last_seq + 3
+        assert [(message["seq"] - last_seq, message["payload"]["n"]) for message in sent[1:]] == [(1, 1), (2, 2)]
+    
+    @pytest.mark.asyncio
+    async def test_fresh_connection_replays_nothing(self):
+        """Test that a connection without last_seq only gets new pushes."""
+        publish_update(123, "leave_approved", {"n": 1})
+        
+        with patch("api.websockets.decode_access_token", return_value={"user_id": 123, "role": "Admin"}), \
+                patch("api.websockets.load_department", return_value=None):
+            task, sent = await self.connect({})
+            await push_update(123, "leave_approved", {"n": 2})
+            task.cancel()
+        
+        assert [message["type"] for message in sent] == ["auth_success"]
+        assert get_push_stats()["messages_sent"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_gap_when_missed_pushes_are_gone(self):
+        """Test that a client behind the replay buffer is told to refetch."""
+        from api.websockets import replay_buffer
+        
+        last_seq = replay_buffer.seq
+        with patch.object(replay_buffer, "size", 1):
+            publish_update(123, "leave_approved", {"n": 1})
+            publish_update(123, "leave_approved", {"n": 2})
+        
+        with patch("api.websockets.decode_access_token", return_value={"user_id": 123, "role": "Admin"}), \
+                patch("api.websockets.load_department", return_value=None):
+            task, sent = await self.connect({"last_seq": last_seq})
+            task.cancel()
+        
+        assert [message["type"] for message in sent] == ["auth_success", "replay_gap"]
+    
+    @pytest.mark.asyncio
+    async def test_gap_for_another_stream(self):
+        """Test that sequence ids from another worker or restart are not trusted."""
+        from api.websockets import replay_buffer
+        
+        publish_update(123, "leave_approved", {"n": 1})
+        
+        with patch("api.websockets.decode_access_token", return_value={"user_id": 123, "role": "Admin"}), \
+                patch("api.websockets.load_department", return_value=None):
+            task, sent = await self.connect({"last_seq": replay_buffer.seq - 1, "stream": "another-worker"})
+            task.cancel()
+        
+        assert [message["type"] for message in sent] == ["auth_success", "replay_gap"]
+
+
+class TestProtocols:
+    """Test protocol negotiation and encoding once per fan-out."""
+    
+    @pytest.mark.asyncio
+    async def test_fan_out_encodes_once(self):
+        """Test that a channel push is serialized once for all members."""
+        from api import push_protocol
+        
+        members = [AsyncMock(spec=WebSocket) for _ in range(3)]
+        for user_id, websocket in enumerate(members, start=1):
+            join_channel("role:Admin", user_id, websocket)
+        
+        with patch.object(push_protocol.json, "dumps", wraps=json.dumps) as dumps:
+            assert publish_update("role:Admin", "attendance_updated", {"n": 1}) == 3
+            await asyncio.sleep(0)
+        
+        assert dumps.call_count == 1
+        assert all(websocket.send_text.call_count == 1 for websocket in members)
+    
+    @pytest.mark.asyncio
+    async def test_unavailable_protocol_falls_back_to_json(self):
+        """Test that asking for msgpack without the package gets JSON."""
+        websocket = AsyncMock(spec=WebSocket)
+        websocket.receive_text = AsyncMock(side_effect=[
+            json.dumps({"type": "auth", "token": "valid_token", "protocol": "msgpack"}),
+            Exception("Connection closed")
+        ])
+        
+        with patch("api.websockets.decode_access_token", return_value={"user_id": 123, "role": "Employee"}), \
+                patch("api.websockets.load_department", return_value=None), \
+                patch("api.push_protocol.msgpack", None):
+            await handle_websocket_connection(websocket)
+        
+        success_message = json.loads(websocket.send_text.call_args_list[-1][0][0])
+        assert success_message["protocol"] == "json"
+    
+    @pytest.mark.asyncio
+    async def test_msgpack_connection_gets_binary_frames(self):
+        """Test that msgpack connections are sent binary frames."""
+        msgpack = pytest.importorskip("msgpack")
+        from api.websockets import _senders, _active_connections, ConnectionSender
+        
+        websocket = AsyncMock(spec=WebSocket)
+        _active_connections[10] = [websocket]
+        _senders[websocket] = ConnectionSender(10, websocket, "msgpack")
+        
+        assert await push_update(10, "attendance_updated", {"n": 1}) is True
+        
+        websocket.send_text.assert_not_called()
+        sent_message = msgpack.unpackb(websocket.send_bytes.call_args[0][0])
+        assert sent_message["payload"] == {"n": 1}